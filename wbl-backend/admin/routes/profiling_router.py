@@ -0,0 +1,32 @@
+from typing import Any, Dict, List
+
+from fastapi import APIRouter, Depends, HTTPException, Response
+
+from auth.models.principal import AuthenticatedUser
+from auth.services.auth_service import get_current_superuser
+from core.profiling import profile_store
+
+router = APIRouter(prefix="/admin/profiles", tags=["admin"])
+
+
+@router.get("")
+def list_profiles(current_user: AuthenticatedUser = Depends(get_current_superuser)) -> List[Dict[str, Any]]:
+    """Captured request profiles, newest first. Empty unless PROFILING_ENABLED."""
+    return [capture.summary() for capture in profile_store.list()]
+
+
+@router.get("/{profile_id}")
+def get_profile(profile_id: int, current_user: AuthenticatedUser = Depends(get_current_superuser)) -> Dict[str, Any]:
+    """One capture: its SQL statements with timings and plans, and the sampled stacks
+       (`folded` can be fed straight to flamegraph.pl or speedscope)
+    """
+    capture = profile_store.get(profile_id)
+    if capture is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return capture.to_dict()
+
+
+@router.delete("", status_code=204)
+def clear_profiles(current_user: AuthenticatedUser = Depends(get_current_superuser)):
+    profile_store.clear()
+    return Response(status_code=204)
@@ -0,0 +1,27 @@
+"""add books owner isbn index
+
+Revision ID: a8d3e5f7c2b1
+Revises: f2a9c6e1b3d5
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a8d3e5f7c2b1'
+down_revision: Union[str, None] = 'f2a9c6e1b3d5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Not unique: owning two copies of a book is allowed, upserts update the oldest copy
+    op.create_index('ix_books_owner_id_isbn', 'books', ['owner_id', 'isbn'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_books_owner_id_isbn', table_name='books')
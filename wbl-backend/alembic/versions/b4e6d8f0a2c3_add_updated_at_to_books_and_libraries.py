@@ -0,0 +1,33 @@
+"""add updated_at to books and libraries
+
+Revision ID: b4e6d8f0a2c3
+Revises: a8d3e5f7c2b1
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4e6d8f0a2c3'
+down_revision: Union[str, None] = 'a8d3e5f7c2b1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing rows get the migration time, which is all the listing validators need
+    op.add_column('books', sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()))
+    op.add_column('libraries', sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()))
+    op.create_index('ix_books_owner_id_updated_at', 'books', ['owner_id', 'updated_at'])
+    op.create_index('ix_libraries_user_id_updated_at', 'libraries', ['user_id', 'updated_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_libraries_user_id_updated_at', table_name='libraries')
+    op.drop_index('ix_books_owner_id_updated_at', table_name='books')
+    op.drop_column('libraries', 'updated_at')
+    op.drop_column('books', 'updated_at')
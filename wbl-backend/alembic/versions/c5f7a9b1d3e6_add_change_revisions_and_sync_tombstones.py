@@ -0,0 +1,50 @@
+"""add change revisions and sync tombstones
+
+Revision ID: c5f7a9b1d3e6
+Revises: b4e6d8f0a2c3
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5f7a9b1d3e6'
+down_revision: Union[str, None] = 'b4e6d8f0a2c3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE SEQUENCE change_revision_seq")
+    for table in ('books', 'libraries'):
+        # Number existing rows first, then require a revision; the server default covers raw SQL writes
+        op.add_column(table, sa.Column('revision', sa.BigInteger(), nullable=True))
+        op.execute(f"UPDATE {table} SET revision = nextval('change_revision_seq')")
+        op.alter_column(table, 'revision', nullable=False, server_default=sa.text("nextval('change_revision_seq')"))
+    op.create_index('ix_books_owner_id_revision', 'books', ['owner_id', 'revision'])
+    op.create_index('ix_libraries_user_id_revision', 'libraries', ['user_id', 'revision'])
+
+    op.create_table(
+        'sync_tombstones',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('entity', sa.String(20), nullable=False),
+        sa.Column('entity_id', sa.Integer(), nullable=False),
+        sa.Column('owner_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('revision', sa.BigInteger(), nullable=False, server_default=sa.text("nextval('change_revision_seq')")),
+        sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index('ix_sync_tombstones_owner_id_revision', 'sync_tombstones', ['owner_id', 'revision'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_sync_tombstones_owner_id_revision', table_name='sync_tombstones')
+    op.drop_table('sync_tombstones')
+    op.drop_index('ix_libraries_user_id_revision', table_name='libraries')
+    op.drop_index('ix_books_owner_id_revision', table_name='books')
+    op.drop_column('libraries', 'revision')
+    op.drop_column('books', 'revision')
+    op.execute("DROP SEQUENCE change_revision_seq")
@@ -0,0 +1,27 @@
+"""add books keyset pagination index
+
+Revision ID: d3f1a7b2c9e4
+Revises: c86f655d4c9b
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3f1a7b2c9e4'
+down_revision: Union[str, None] = 'c86f655d4c9b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Lets GET /api/books seek to (title, id) > cursor within one owner's books
+    op.create_index('ix_books_owner_id_title_id', 'books', ['owner_id', 'title', 'id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_books_owner_id_title_id', table_name='books')
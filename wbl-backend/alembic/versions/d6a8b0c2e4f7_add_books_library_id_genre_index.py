@@ -0,0 +1,25 @@
+"""add books library_id genre index
+
+Revision ID: d6a8b0c2e4f7
+Revises: c5f7a9b1d3e6
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd6a8b0c2e4f7'
+down_revision: Union[str, None] = 'c5f7a9b1d3e6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_books_library_id_genre', 'books', ['library_id', 'genre'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_books_library_id_genre', table_name='books')
@@ -0,0 +1,51 @@
+"""add books search columns and indexes
+
+Revision ID: e7b2c4d9a1f8
+Revises: d3f1a7b2c9e4
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7b2c4d9a1f8'
+down_revision: Union[str, None] = 'd3f1a7b2c9e4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Normalized ISBN for exact lookups regardless of hyphens/spaces
+    op.add_column('books', sa.Column('isbn_normalized', sa.String(20), nullable=True))
+    op.execute("UPDATE books SET isbn_normalized = regexp_replace(upper(isbn), '[^0-9X]', '', 'g')")
+    op.create_index('ix_books_isbn_normalized', 'books', ['isbn_normalized'])
+
+    # Weighted full-text document: title > author > description. Kept up to date by Postgres.
+    op.execute("""
+        ALTER TABLE books ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(author, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(description, '')), 'C')
+        ) STORED
+    """)
+    op.create_index('ix_books_search_vector', 'books', ['search_vector'], postgresql_using='gin')
+
+    # Trigram indexes serve both the similarity operator (%) and ILIKE '%term%'
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index('ix_books_title_trgm', 'books', ['title'],
+                    postgresql_using='gin', postgresql_ops={'title': 'gin_trgm_ops'})
+    op.create_index('ix_books_author_trgm', 'books', ['author'],
+                    postgresql_using='gin', postgresql_ops={'author': 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    op.drop_index('ix_books_author_trgm', table_name='books')
+    op.drop_index('ix_books_title_trgm', table_name='books')
+    op.drop_index('ix_books_search_vector', table_name='books')
+    op.drop_column('books', 'search_vector')
+    op.drop_index('ix_books_isbn_normalized', table_name='books')
+    op.drop_column('books', 'isbn_normalized')
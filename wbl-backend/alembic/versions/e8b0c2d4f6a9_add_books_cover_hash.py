@@ -0,0 +1,26 @@
+"""add books cover_hash
+
+Revision ID: e8b0c2d4f6a9
+Revises: d6a8b0c2e4f7
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8b0c2d4f6a9'
+down_revision: Union[str, None] = 'd6a8b0c2e4f7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('books', sa.Column('cover_hash', sa.String(64), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('books', 'cover_hash')
@@ -0,0 +1,34 @@
+"""create isbn metadata cache table
+
+Revision ID: f2a9c6e1b3d5
+Revises: e7b2c4d9a1f8
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2a9c6e1b3d5'
+down_revision: Union[str, None] = 'e7b2c4d9a1f8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'isbn_metadata_cache',
+        sa.Column('isbn', sa.String(20), primary_key=True),
+        sa.Column('found', sa.Boolean(), nullable=False),
+        sa.Column('title', sa.Text(), nullable=True),
+        sa.Column('authors', sa.Text(), nullable=True),
+        sa.Column('cover_url', sa.Text(), nullable=True),
+        sa.Column('fetched_at', sa.DateTime(timezone=True), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('isbn_metadata_cache')
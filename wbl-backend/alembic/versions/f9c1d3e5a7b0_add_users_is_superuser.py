@@ -0,0 +1,26 @@
+"""add users is_superuser
+
+Revision ID: f9c1d3e5a7b0
+Revises: e8b0c2d4f6a9
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f9c1d3e5a7b0'
+down_revision: Union[str, None] = 'e8b0c2d4f6a9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('is_superuser', sa.Boolean(), nullable=False, server_default=sa.false()))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'is_superuser')
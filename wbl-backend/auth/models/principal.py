@@ -0,0 +1,11 @@
+from pydantic import BaseModel
+
+
+class AuthenticatedUser(BaseModel):
+    """What protected routes get as current_user: a detached snapshot of the User row,
+    safe to cache between requests."""
+    id: int
+    username: str
+    email: str
+    is_active: bool = True
+    is_superuser: bool = False
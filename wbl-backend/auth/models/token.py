@@ -6,4 +6,5 @@ class Token(BaseModel):
 
 
 class TokenData(BaseModel):
-    email: str | None = None
\ No newline at end of file
+    email: str | None = None
+    user_id: int | None = None  # "uid" claim; older tokens don't carry it
\ No newline at end of file
@@ -1,10 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Body
 from datetime import timedelta
 from auth.models.token import Token
-from sqlalchemy.orm import Session
+from core.database import DbSession, get_session
 
-from auth.services.auth_service import authenticate_user, create_access_token
-from core.database import get_db
+from auth.services.auth_service import authenticate_user_async, create_access_token
 
 auth_router = APIRouter(
     prefix='/login',
@@ -15,13 +14,13 @@ auth_router = APIRouter(
 async def access_token(
     email: str = Body(...),
     password: str = Body(...),
-    db: Session = Depends(get_db)
+    db: DbSession = Depends(get_session)
 ) -> Token:
     """
     A simplified login endpoint for family members.
     Just provide email and password directly in the request body.
     """
-    user = authenticate_user(email, password, db)
+    user = await authenticate_user_async(email, password, db)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -30,7 +29,7 @@ async def access_token(
     # For family use, set token to expire after 30 days
     access_token_expires = timedelta(days=30)
     access_token = create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
+        data={"sub": user.email, "uid": user.id}, expires_delta=access_token_expires
     )
 
     return Token(access_token=access_token, token_type="bearer")
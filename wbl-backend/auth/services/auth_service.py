@@ -1,17 +1,25 @@
-from typing import Annotated
+from typing import Annotated, Optional
 
 from jwt.exceptions import InvalidTokenError
+from auth.models.principal import AuthenticatedUser
 from auth.models.token import TokenData
-from auth.utils.auth_utils import verify_password
+from auth.services.principal_cache import principal_cache
+from auth.utils.auth_utils import get_password_hash_async, password_needs_rehash, verify_password, verify_password_async
 from core.config_loader import settings
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
+from fastapi.requests import HTTPConnection
+from pydantic import ValidationError
+from contextvars import ContextVar
 from datetime import datetime, timedelta, timezone
 import jwt
-from core.database import get_db
-from user.models.user import User
-from user.services.user_service import get_user_by_email
+from core.database import DbSession, get_db, get_session, run_db
+from core.db_routing import current_user_id
+from user.services.user_service import get_user, get_user_by_email
+
+# The user a request authenticated as, for code outside the route (the profiling middleware)
+current_principal: ContextVar[Optional[AuthenticatedUser]] = ContextVar("current_principal", default=None)
 
 SECRET_KEY = settings.JWT_SECRET_KEY
 ALGORITHM = "HS256"
@@ -28,6 +36,26 @@ def authenticate_user(email: str, password: str, db:Session = Depends(get_db)):
     return user
 
 
+async def authenticate_user_async(email: str, password: str, db: DbSession):
+    """authenticate_user for async routes: the query runs through run_db and bcrypt in the
+    password-hash pool, so a login never blocks other requests on the event loop."""
+    user = await run_db(db, get_user_by_email, email)
+    if not user:
+        return False
+    if not await verify_password_async(password, user.password):
+        return False
+    if password_needs_rehash(user.password):
+        # The cost setting changed since this hash was made; upgrade it while we know the password
+        user.password = await get_password_hash_async(password)
+        await run_db(db, _commit_and_refresh, user)
+    return user
+
+
+def _commit_and_refresh(db: Session, user):
+    db.commit()
+    db.refresh(user)
+
+
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
     to_encode = data.copy()
     if expires_delta:
@@ -41,7 +69,7 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
 
 
 # Get current user with more friendly error messages
-async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)], db:Session = Depends(get_db)):
+async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)], db: DbSession = Depends(get_session)) -> AuthenticatedUser:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Please log in to access this feature",
@@ -52,14 +80,58 @@ async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)], db:Ses
         email = payload.get("sub")
         if email is None:
             raise credentials_exception
-        token_data = TokenData(email=email)
-    except InvalidTokenError:
+        token_data = TokenData(email=email, user_id=payload.get("uid"))
+    except (InvalidTokenError, ValidationError):
         raise credentials_exception
-    user = get_user_by_email(db, email=token_data.email)
-    if user is None:
-        raise credentials_exception
-    return user
+
+    principal = principal_cache.get(token_data.email)
+    if principal is not None and token_data.user_id is not None and principal.id != token_data.user_id:
+        # Cached for whoever has this email now; the token belongs to another account
+        principal = None
+    if principal is None:
+        user = await run_db(db, _load_user, token_data)
+        if user is None:
+            raise credentials_exception
+        principal = AuthenticatedUser.model_validate(user, from_attributes=True)
+        principal_cache.put(token_data.email, principal)
+    # Lets the session keep this user's reads on the primary right after their own writes
+    current_user_id.set(principal.id)
+    current_principal.set(principal)
+    return principal
+
+
+def _load_user(db: Session, token_data: TokenData):
+    if token_data.user_id is not None:
+        # Primary key hit; the email check rejects tokens issued before an email change
+        user = get_user(db, token_data.user_id)
+        return user if user is not None and user.email == token_data.email else None
+    return get_user_by_email(db, email=token_data.email)
+
+
+async def get_current_user_for_stream(
+    connection: HTTPConnection,
+    access_token: Optional[str] = Query(None, description="For EventSource/WebSocket clients that can't send an Authorization header"),
+    db: DbSession = Depends(get_session),
+) -> AuthenticatedUser:
+    """get_current_user for long-lived streams, which also accept the token as ?access_token=.
+
+    The session is closed once the user is known, so an open stream never pins a pooled connection.
+    """
+    authorization = connection.headers.get("authorization", "")
+    token = authorization[7:] if authorization.lower().startswith("bearer ") else access_token
+    try:
+        if not token:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Please log in to access this feature")
+        return await get_current_user(token, db)
+    finally:
+        await run_db(db, Session.close)
+
+
+async def get_current_active_user(current_user: AuthenticatedUser = Depends(get_current_user)):
+    return current_user
 
 
-async def get_current_active_user(current_user: User = Depends(get_current_user)):
+async def get_current_superuser(current_user: AuthenticatedUser = Depends(get_current_user)) -> AuthenticatedUser:
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=403, detail="Administrator access required")
     return current_user
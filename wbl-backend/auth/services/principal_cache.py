@@ -0,0 +1,73 @@
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from auth.models.principal import AuthenticatedUser
+from core.config_loader import settings
+from core.metrics import registry
+
+
+class PrincipalCache:
+    """Short-lived cache of authenticated users keyed by token subject (email).
+
+    Saves the user lookup on every authenticated request. user_service invalidates
+    entries when a user changes, so the TTL only bounds staleness across workers.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: Dict[str, Tuple[float, AuthenticatedUser]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, subject: str) -> Optional[AuthenticatedUser]:
+        with self._lock:
+            entry = self._entries.get(subject)
+            if entry is not None and entry[0] > time.monotonic():
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[subject]
+            self.misses += 1
+            return None
+
+    def put(self, subject: str, principal: AuthenticatedUser) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                # Expired entries go first; failing that, drop the oldest insert
+                now = time.monotonic()
+                for key in [key for key, (expires_at, _) in self._entries.items() if expires_at <= now]:
+                    del self._entries[key]
+                if len(self._entries) >= self.max_entries:
+                    del self._entries[next(iter(self._entries))]
+            self._entries[subject] = (time.monotonic() + self.ttl_seconds, principal)
+
+    def invalidate_user(self, user_id: int) -> None:
+        with self._lock:
+            for subject in [key for key, (_, principal) in self._entries.items() if principal.id == user_id]:
+                del self._entries[subject]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+principal_cache = PrincipalCache(
+    ttl_seconds=settings.AUTH_CACHE_TTL_SECONDS,
+    max_entries=settings.AUTH_CACHE_MAX_ENTRIES,
+)
+
+
+def _collect_principal_cache():
+    yield "auth_cache_lookups_total", "counter", "Authenticated-user cache lookups", [
+        ({"result": "hit"}, principal_cache.hits), ({"result": "miss"}, principal_cache.misses),
+    ]
+
+
+registry.add_collector(_collect_principal_cache)
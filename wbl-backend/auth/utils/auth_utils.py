@@ -1,10 +1,73 @@
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional
+
 from bcrypt import hashpw, gensalt, checkpw
 
-def get_password_hash(password: str) -> str:
-    return hashpw(password.encode("utf-8"), gensalt()).decode("utf-8")
+from core.config_loader import settings
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+_executor: Optional[Executor] = None
+
+
+def _get_executor() -> Optional[Executor]:
+    """Pool that runs every bcrypt call, created on first use (after any worker fork).
+
+    bcrypt releases the GIL, so threads hash in parallel; the pool size caps how many cores
+    logins can take at once. With PASSWORD_HASH_WORKERS=0 hashing runs inline in the caller.
+    """
+    global _executor
+    if _executor is None and settings.PASSWORD_HASH_WORKERS > 0:
+        if settings.PASSWORD_HASH_EXECUTOR == "process":
+            _executor = ProcessPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS)
+        else:
+            _executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+    return _executor
+
+
+def _hash(password: str, rounds: int) -> str:
+    return hashpw(password.encode("utf-8"), gensalt(rounds=rounds)).decode("utf-8")
+
+
+def _check(plain_password: str, hashed_password: str) -> bool:
     try:
         return checkpw(plain_password.encode("utf-8"), hashed_password.encode("utf-8"))
     except ValueError:
-        return False
\ No newline at end of file
+        return False
+
+
+def get_password_hash(password: str) -> str:
+    executor = _get_executor()
+    if executor is None:
+        return _hash(password, settings.BCRYPT_ROUNDS)
+    return executor.submit(_hash, password, settings.BCRYPT_ROUNDS).result()
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    executor = _get_executor()
+    if executor is None:
+        return _check(plain_password, hashed_password)
+    return executor.submit(_check, plain_password, hashed_password).result()
+
+
+async def get_password_hash_async(password: str) -> str:
+    """get_password_hash for async code: awaits the pool instead of blocking the event loop"""
+    executor = _get_executor()
+    if executor is None:
+        return _hash(password, settings.BCRYPT_ROUNDS)
+    return await asyncio.get_running_loop().run_in_executor(executor, _hash, password, settings.BCRYPT_ROUNDS)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    executor = _get_executor()
+    if executor is None:
+        return _check(plain_password, hashed_password)
+    return await asyncio.get_running_loop().run_in_executor(executor, _check, plain_password, hashed_password)
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """True when a stored hash uses a different bcrypt cost than BCRYPT_ROUNDS"""
+    try:
+        # $2b$12$<salt+hash>
+        return int(hashed_password.split("$")[2]) != settings.BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return False
@@ -0,0 +1,85 @@
+"""Measure GET /api/books throughput with and without the authenticated-user cache.
+
+Runs the app in-process against a temporary SQLite database (or --database-url) and
+prints requests/second for both modes as JSON.
+
+    python -m benchmarks.bench_auth_cache --requests 2000
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from auth.services.auth_service import create_access_token
+from auth.services.principal_cache import principal_cache
+from book.models.book import Book
+from core.database import Base, get_db
+from library.models.library import Library
+from main import app
+from user.models.user import User
+
+
+def run(database_url: str, requests: int, books: int) -> dict:
+    engine = create_engine(database_url)
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(bind=engine)
+
+    db = SessionLocal()
+    user = User(username="auth-bench", email="auth-bench@example.com", password="!")
+    db.add(user)
+    db.flush()
+    library = Library(name="Benchmark", user_id=user.id)
+    db.add(library)
+    db.flush()
+    db.add_all([Book(isbn=f"{n:013d}", title=f"Title {n}", author="Author", library_id=library.id, owner_id=user.id)
+                for n in range(books)])
+    db.commit()
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': user.email, 'uid': user.id})}"}
+    db.close()
+
+    def override_get_db():
+        session = SessionLocal()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    report = {"requests": requests, "books_per_page": books, "results": {}}
+    default_ttl = principal_cache.ttl_seconds
+    try:
+        with TestClient(app) as client:
+            for mode, ttl in (("uncached", 0), ("cached", default_ttl or 60)):
+                principal_cache.clear()
+                principal_cache.ttl_seconds = ttl
+                client.get("/api/books", headers=headers)  # warm up
+                start = time.perf_counter()
+                for _ in range(requests):
+                    client.get("/api/books", headers=headers)
+                elapsed = time.perf_counter() - start
+                report["results"][mode] = {"requests_per_second": round(requests / elapsed, 1)}
+    finally:
+        principal_cache.ttl_seconds = default_ttl
+        app.dependency_overrides.pop(get_db, None)
+        engine.dispose()
+    results = report["results"]
+    report["speedup"] = round(results["cached"]["requests_per_second"] / results["uncached"]["requests_per_second"], 3)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the authenticated-user cache on GET /api/books")
+    parser.add_argument("--database-url", help="SQLAlchemy URL of a throwaway database (default: temporary SQLite file)")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per mode")
+    parser.add_argument("--books", type=int, default=20, help="Books on the page being fetched")
+
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = args.database_url or f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        print(json.dumps(run(url, args.requests, args.books), indent=2))
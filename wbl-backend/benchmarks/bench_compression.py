@@ -0,0 +1,79 @@
+"""Bandwidth vs CPU for compressing typical GET /api/books payloads.
+
+Builds book pages like the listing returns (FastJSONResponse bodies of 10, 100 and 1000 rows)
+and, for every installed encoding at a few levels, reports the compressed size, the CPU time
+to compress, and the resulting time to deliver the page over a slow link (compress + transfer).
+Encodings that aren't installed (brotli, zstandard) are skipped.
+
+    python -m benchmarks.bench_compression --link-mbps 10 --repeat 20
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+
+from core.compression import available_encoders
+from core.responses import FastJSONResponse
+
+LEVELS = {"gzip": [1, 6, 9], "br": [1, 4, 11], "zstd": [1, 3, 10]}
+WORDS = "the a of library shelf reading novel history science garden winter river city night story".split()
+
+
+def book_page(rows: int, seed: int = 0) -> bytes:
+    rng = random.Random(seed)
+    books = [{
+        "isbn": f"978{rng.randrange(10**10):010d}",
+        "title": " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 6))).title(),
+        "author": f"{rng.choice(WORDS).title()} {rng.choice(WORDS).title()}",
+        "cover_image": f"https://covers.openlibrary.org/b/id/{rng.randrange(10**7)}-L.jpg",
+        "genre": rng.choice(["Fiction", "History", "Science", None]),
+        "description": " ".join(rng.choice(WORDS) for _ in range(rng.randint(0, 60))) or None,
+        "library_id": rng.randint(1, 5),
+        "id": n + 1,
+        "owner_id": 1,
+    } for n in range(rows)]
+    return FastJSONResponse(books).body
+
+
+def compress(encoder_class, level: int, body: bytes) -> bytes:
+    encoder = encoder_class(level)
+    return encoder.compress(body) + encoder.finish()
+
+
+def run(page_sizes: list[int], link_mbps: float, repeat: int) -> dict:
+    encoders = available_encoders()
+    bytes_per_second = link_mbps * 1_000_000 / 8
+    report = {"link_mbps": link_mbps, "encodings": sorted(encoders), "pages": []}
+    for rows in page_sizes:
+        body = book_page(rows)
+        results = [{"encoding": "identity", "level": None, "bytes": len(body), "ratio": 1.0, "compress_ms": 0.0,
+                    "deliver_ms": round(len(body) / bytes_per_second * 1000, 3)}]
+        for coding, encoder_class in encoders.items():
+            for level in LEVELS[coding]:
+                samples = []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    compressed = compress(encoder_class, level, body)
+                    samples.append(time.perf_counter() - start)
+                cpu = statistics.median(samples)
+                results.append({
+                    "encoding": coding,
+                    "level": level,
+                    "bytes": len(compressed),
+                    "ratio": round(len(body) / len(compressed), 2),
+                    "compress_ms": round(cpu * 1000, 3),
+                    "deliver_ms": round((cpu + len(compressed) / bytes_per_second) * 1000, 3),
+                })
+        report["pages"].append({"rows": rows, "results": results})
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark response compression of book listings")
+    parser.add_argument("--page-sizes", default="10,100,1000", help="Comma separated rows per page")
+    parser.add_argument("--link-mbps", type=float, default=10.0, help="Client bandwidth used for deliver_ms")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed runs per encoding and level; the median is reported")
+    args = parser.parse_args()
+
+    print(json.dumps(run([int(n) for n in args.page_sizes.split(",")], args.link_mbps, args.repeat), indent=2))
@@ -0,0 +1,126 @@
+"""Show how a burst of logins affects GET /api/books latency.
+
+Starts the app under uvicorn against a temporary SQLite database, keeps a few clients
+polling GET /api/books, fires a burst of concurrent logins, and reports /api/books
+latency percentiles while the burst runs: once with bcrypt inline on the event loop
+(PASSWORD_HASH_WORKERS=0, the old behaviour) and once with the password-hash pool.
+
+    python -m benchmarks.bench_login_burst --logins 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import tempfile
+import threading
+import time
+
+import httpx
+import uvicorn
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from auth.services.auth_service import create_access_token
+from auth.utils import auth_utils
+from core.config_loader import settings
+from core.database import Base, get_db
+from library.models.library import Library
+from main import app
+from user.models.user import User
+
+PASSWORD = "benchmark-password"
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def measure(base_url: str, headers: dict, logins: int, pollers: int) -> dict:
+    latencies = []
+    done = asyncio.Event()
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        async def poll():
+            while not done.is_set():
+                start = time.perf_counter()
+                await client.get("/api/books", headers=headers)
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        async def login():
+            await client.post("/api/login/access-token", json={"email": "burst@example.com", "password": PASSWORD})
+
+        poll_tasks = [asyncio.create_task(poll()) for _ in range(pollers)]
+        await asyncio.sleep(0.5)  # steady state before the burst
+        latencies.clear()
+        start = time.perf_counter()
+        await asyncio.gather(*(login() for _ in range(logins)))
+        burst_seconds = time.perf_counter() - start
+        done.set()
+        await asyncio.gather(*poll_tasks)
+
+    return {
+        "burst_seconds": round(burst_seconds, 3),
+        "books_requests": len(latencies),
+        "books_p50_ms": round(statistics.median(latencies), 2),
+        "books_p99_ms": round(percentile(latencies, 0.99), 2),
+        "books_max_ms": round(max(latencies), 2),
+    }
+
+
+def run(logins: int, pollers: int, workers: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=engine)
+        SessionLocal = sessionmaker(bind=engine)
+        db = SessionLocal()
+        user = User(username="burst", email="burst@example.com", password=auth_utils._hash(PASSWORD, settings.BCRYPT_ROUNDS))
+        db.add(user)
+        db.flush()
+        db.add(Library(name="Benchmark", user_id=user.id))
+        db.commit()
+        headers = {"Authorization": f"Bearer {create_access_token(data={'sub': user.email, 'uid': user.id})}"}
+        db.close()
+
+        def override_get_db():
+            session = SessionLocal()
+            try:
+                yield session
+            finally:
+                session.close()
+
+        app.dependency_overrides[get_db] = override_get_db
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+        thread = threading.Thread(target=server.run, daemon=True)
+        thread.start()
+        while not server.started:
+            time.sleep(0.05)
+
+        report = {"logins": logins, "pollers": pollers, "bcrypt_rounds": settings.BCRYPT_ROUNDS, "results": {}}
+        try:
+            for mode, pool_size in (("inline", 0), ("pool", workers)):
+                settings.PASSWORD_HASH_WORKERS = pool_size
+                auth_utils._executor = None
+                report["results"][mode] = asyncio.run(measure(f"http://127.0.0.1:{port}", headers, logins, pollers))
+        finally:
+            server.should_exit = True
+            thread.join()
+            app.dependency_overrides.pop(get_db, None)
+            engine.dispose()
+        return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark GET /api/books latency during a login burst")
+    parser.add_argument("--logins", type=int, default=20, help="Concurrent logins in the burst")
+    parser.add_argument("--pollers", type=int, default=4, help="Clients polling GET /api/books")
+    parser.add_argument("--workers", type=int, default=settings.PASSWORD_HASH_WORKERS or 4, help="Password-hash pool size")
+
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.logins, args.pollers, args.workers), indent=2))
@@ -0,0 +1,110 @@
+"""Compare OFFSET paging with keyset (cursor) paging on GET /api/books.
+
+Seeds a dedicated benchmark user with --rows books (once), then times the service
+call that backs each page depth. Prints a JSON report to stdout.
+
+    python -m benchmarks.bench_pagination --database-url postgresql+psycopg2://... --rows 1000000
+
+Point it at a throwaway database: it writes to the users, libraries and books tables.
+"""
+import argparse
+import json
+import statistics
+import time
+
+from sqlalchemy import create_engine, func, insert, text
+from sqlalchemy.orm import sessionmaker
+
+from book.models.book import Book
+from book.services.book_service import BookService
+from core.database import Base
+from core.pagination import encode_cursor
+from library.models.library import Library
+from user.models.user import User
+
+BENCH_EMAIL = "pagination-bench@example.com"
+
+
+def seed(db, rows: int) -> int:
+    """Create the benchmark owner and library and fill them up to `rows` books"""
+    user = db.query(User).filter(User.email == BENCH_EMAIL).first()
+    if user is None:
+        user = User(username="pagination-bench", email=BENCH_EMAIL, password="!")
+        db.add(user)
+        db.flush()
+        db.add(Library(name="Benchmark", user_id=user.id))
+        db.commit()
+    library = db.query(Library).filter(Library.user_id == user.id).first()
+
+    existing = db.query(func.count(Book.id)).filter(Book.owner_id == user.id).scalar()
+    missing = rows - existing
+    if missing <= 0:
+        return user.id
+
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text("""
+            INSERT INTO books (isbn, title, author, library_id, owner_id)
+            SELECT lpad(g::text, 13, '0'), 'Title ' || md5(g::text), 'Author ' || (g % 5000), :library_id, :owner_id
+            FROM generate_series(:start, :stop) AS g
+        """), {"start": existing + 1, "stop": rows, "library_id": library.id, "owner_id": user.id})
+        db.commit()
+        db.execute(text("ANALYZE books"))
+    else:
+        for start in range(existing + 1, rows + 1, 10000):
+            db.execute(insert(Book), [
+                {"isbn": f"{n:013d}", "title": f"Title {n * 2654435761 % 2**32:010d}", "author": f"Author {n % 5000}",
+                 "library_id": library.id, "owner_id": user.id}
+                for n in range(start, min(start + 10000, rows + 1))
+            ])
+        db.commit()
+    return user.id
+
+
+def time_call(fn, repeat: int) -> float:
+    """Median wall time of `fn` in milliseconds"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def run(database_url: str, rows: int, page_size: int, pages: list[int], repeat: int) -> dict:
+    engine = create_engine(database_url)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    try:
+        owner_id = seed(db, rows)
+        results = []
+        for page in pages:
+            skip = (page - 1) * page_size
+            if skip >= rows:
+                continue
+            cursor = None
+            if skip:
+                # Key of the last row on the previous page, found without timing it
+                previous = BookService.get_books(db, skip=skip - 1, limit=1, owner_id=owner_id)[0]
+                cursor = encode_cursor(previous.title, previous.id)
+            offset_ms = time_call(lambda: BookService.get_books(db, skip=skip, limit=page_size, owner_id=owner_id), repeat)
+            cursor_ms = time_call(lambda: BookService.get_books_page(db, limit=page_size, cursor=cursor, owner_id=owner_id), repeat)
+            db.expunge_all()
+            results.append({"page": page, "offset_ms": round(offset_ms, 3), "cursor_ms": round(cursor_ms, 3)})
+        return {"rows": rows, "page_size": page_size, "dialect": engine.dialect.name, "results": results}
+    finally:
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark offset vs cursor pagination of books")
+    parser.add_argument("--database-url", required=True, help="SQLAlchemy URL of a throwaway database")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Number of books to seed for the benchmark user")
+    parser.add_argument("--page-size", type=int, default=100, help="Books per page")
+    parser.add_argument("--pages", default="1,10,100,1000,5000,9999", help="Comma separated page numbers to time")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per page; the median is reported")
+
+    args = parser.parse_args()
+
+    report = run(args.database_url, args.rows, args.page_size, [int(p) for p in args.pages.split(",")], args.repeat)
+    print(json.dumps(report, indent=2))
@@ -0,0 +1,106 @@
+"""Compare rows/second of the two GET /api/books serialization paths.
+
+"orm" is the old path: ORM objects validated through List[BookResponseWithId], dumped to
+JSON-compatible data and encoded with the stdlib json module. "rows" selects only the listing
+columns as tuples and encodes plain dicts with FastJSONResponse (orjson when installed).
+"rows_stdlib" isolates the encoder's share. Runs against a temporary SQLite database
+(or --database-url) and prints the results as JSON.
+
+    python -m benchmarks.bench_serialization --page-size 1000 --repeat 20
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+from typing import List
+
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from book.models.book import Book
+from book.schemas.book import BookResponseWithId
+from book.services.book_service import BookService
+from core.database import Base
+from core.responses import FastJSONResponse, orjson
+from library.models.library import Library
+from user.models.user import User
+
+BOOK_LIST = TypeAdapter(List[BookResponseWithId])
+
+
+def seed(db, rows: int) -> int:
+    user = User(username="serialization-bench", email="serialization-bench@example.com", password="!")
+    db.add(user)
+    db.flush()
+    library = Library(name="Benchmark", user_id=user.id)
+    db.add(library)
+    db.flush()
+    db.execute(insert(Book), [
+        {"isbn": f"{n:013d}", "title": f"Title {n:07d}", "author": f"Author {n % 500}", "genre": "Fiction",
+         "description": "A reasonably sized description of the book " * 3, "library_id": library.id, "owner_id": user.id}
+        for n in range(rows)
+    ])
+    db.commit()
+    return user.id
+
+
+def orm_path(db, owner_id: int, page_size: int) -> bytes:
+    books, _ = BookService.get_books_page(db, limit=page_size, owner_id=owner_id)
+    content = BOOK_LIST.dump_python(BOOK_LIST.validate_python(books), mode="json")
+    body = json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    db.expunge_all()  # a request starts with an empty identity map
+    return body
+
+
+def rows_path(db, owner_id: int, page_size: int) -> bytes:
+    books, _ = BookService.get_books_page(db, limit=page_size, owner_id=owner_id, as_rows=True)
+    return FastJSONResponse(books).body
+
+
+def rows_stdlib_path(db, owner_id: int, page_size: int) -> bytes:
+    books, _ = BookService.get_books_page(db, limit=page_size, owner_id=owner_id, as_rows=True)
+    return json.dumps(books, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def run(database_url: str, page_size: int, repeat: int) -> dict:
+    engine = create_engine(database_url)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    try:
+        owner_id = seed(db, page_size)
+        # Both paths must produce the same document
+        assert json.loads(orm_path(db, owner_id, page_size)) == json.loads(rows_path(db, owner_id, page_size))
+
+        results = {}
+        for name, path in (("orm", orm_path), ("rows", rows_path), ("rows_stdlib", rows_stdlib_path)):
+            path(db, owner_id, page_size)  # warm up
+            samples = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                path(db, owner_id, page_size)
+                samples.append(time.perf_counter() - start)
+            median = statistics.median(samples)
+            results[name] = {"ms_per_page": round(median * 1000, 3), "rows_per_second": round(page_size / median)}
+        return {"page_size": page_size, "dialect": engine.dialect.name, "orjson": orjson is not None,
+                "speedup": round(results["rows"]["rows_per_second"] / results["orm"]["rows_per_second"], 2),
+                "results": results}
+    finally:
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark book listing serialization paths")
+    parser.add_argument("--database-url", help="SQLAlchemy URL of a throwaway database (default: temporary SQLite file)")
+    parser.add_argument("--page-size", type=int, default=1000, help="Books per page")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed runs per path; the median is reported")
+    args = parser.parse_args()
+
+    if args.database_url:
+        print(json.dumps(run(args.database_url, args.page_size, args.repeat), indent=2))
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            print(json.dumps(run(f"sqlite:///{os.path.join(tmp, 'bench.db')}", args.page_size, args.repeat), indent=2))
@@ -0,0 +1,493 @@
+"""Reproducible load test of the main API endpoints, with a comparison mode for regressions.
+
+`run` seeds synthetic users, libraries and books (deterministic, once per database), starts the
+app under uvicorn in a separate process against that database with OpenLibrary stubbed, then
+drives each scenario in turn at a fixed concurrency for a fixed time. Throughput and
+p50/p95/p99 latency per scenario are written as JSON.
+
+    python -m benchmarks.load_test run --books 100000 --concurrency 16 --duration 10 --output before.json
+    python -m benchmarks.load_test run ... --output after.json
+    python -m benchmarks.load_test compare before.json after.json --threshold 0.10
+
+The server is started through core.server like production; compare --workers 1 with
+--workers <cores> (and enough --concurrency to keep them busy) to see how throughput scales.
+
+`compare` prints the change per scenario and exits with status 1 when throughput dropped, or
+p95/p99 latency grew, by more than the threshold, so it can gate CI.
+
+The default database is a temporary SQLite file, good for comparing commits on one machine.
+For production-like numbers seed Postgres with --database-url (10M books takes a while, and
+later runs reuse the data), or point --base-url at a running deployment that uses that database.
+Against --base-url the isbn scenario needs the server's OPENLIBRARY_BASE_URL pointed at
+--stub-port, and is skipped otherwise.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import platform
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+import httpx
+
+SCENARIOS = ("list", "search", "get", "create", "update", "delete", "login", "isbn")
+PASSWORD = "load-test-password"
+EMAIL = "load-test-{}@example.com"
+SEED = 20261017
+BATCH_SIZE = 10_000
+STUB_ISBNS = 1000
+
+WORDS = ("silent", "river", "garden", "winter", "glass", "forest", "iron", "summer", "hidden", "paper",
+         "north", "stone", "velvet", "ocean", "crimson", "lantern", "orchard", "harbor", "ember", "meadow")
+GENRES = ("Fiction", "Mystery", "Fantasy", "History", "Science", "Poetry", "Biography", "Children")
+
+
+def stub_isbn(n: int) -> str:
+    return f"97800{n:08d}"
+
+
+# --- seeding -------------------------------------------------------------------------------
+
+def seed(database_url: str, books: int, users: int, libraries_per_user: int) -> None:
+    """Create the synthetic data unless a previous run already did. Same arguments, same data."""
+    from sqlalchemy import create_engine, insert
+    from sqlalchemy.orm import sessionmaker
+
+    from auth.utils import auth_utils
+    from book.models.book import Book
+    from core.config_loader import settings
+    from core.database import Base
+    from library.models.library import Library
+    from user.models.user import User
+
+    engine = create_engine(database_url)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    try:
+        if db.query(User.id).filter(User.email == EMAIL.format(0)).first() is not None:
+            return
+        rng = random.Random(SEED)
+        password = auth_utils._hash(PASSWORD, settings.BCRYPT_ROUNDS)  # one bcrypt, shared by every user
+        owners = [User(username=f"load-test-{n}", email=EMAIL.format(n), password=password) for n in range(users)]
+        db.add_all(owners)
+        db.flush()
+        libraries = {owner.id: [Library(name=f"Shelf {n}", user_id=owner.id) for n in range(libraries_per_user)]
+                     for owner in owners}
+        db.add_all(itertools.chain.from_iterable(libraries.values()))
+        db.commit()
+
+        # SQLite has no revision sequence and its fallback default scans the table per row,
+        # so hand out revisions here; Postgres uses the sequence as usual
+        revisions = itertools.count(1) if engine.dialect.name == "sqlite" else None
+        per_user = books // users
+        for index, owner in enumerate(owners):
+            # Each owner's books get contiguous ids, so scenarios can pick ids by range
+            count = per_user if index < users - 1 else books - per_user * (users - 1)
+            for start in range(0, count, BATCH_SIZE):
+                rows = []
+                for n in range(start, min(count, start + BATCH_SIZE)):
+                    row = {
+                        "isbn": f"979{index:04d}{n:06d}",
+                        "title": f"The {rng.choice(WORDS).title()} {rng.choice(WORDS).title()} {n}",
+                        "author": f"Author {rng.randrange(5000)}",
+                        "genre": rng.choice(GENRES),
+                        "description": " ".join(rng.choice(WORDS) for _ in range(30)),
+                        "library_id": rng.choice(libraries[owner.id]).id,
+                        "owner_id": owner.id,
+                    }
+                    if revisions is not None:
+                        row["revision"] = next(revisions)
+                    rows.append(row)
+                db.execute(insert(Book), rows)
+                db.commit()
+    finally:
+        db.close()
+        engine.dispose()
+
+
+def book_id_ranges(database_url: str) -> Dict[str, tuple]:
+    """email -> (first, last) seeded book id of each load test user"""
+    from sqlalchemy import create_engine, func, select
+
+    from book.models.book import Book
+    from user.models.user import User
+
+    engine = create_engine(database_url)
+    try:
+        with engine.connect() as connection:
+            rows = connection.execute(
+                select(User.email, func.min(Book.id), func.max(Book.id))
+                .join_from(Book, User, Book.owner_id == User.id)
+                .where(User.email.like(EMAIL.format("%")))
+                .group_by(User.email)
+            ).all()
+        return {email: (first, last) for email, first, last in rows}
+    finally:
+        engine.dispose()
+
+
+# --- servers -------------------------------------------------------------------------------
+
+class OpenLibraryStub(ThreadingHTTPServer):
+    """Answers OpenLibrary's /api/books?bibkeys=ISBN:... for the isbn scenario's ISBNs"""
+
+    daemon_threads = True
+
+    def __init__(self, port: int = 0):
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                bibkeys = parse_qs(urlparse(self.path).query).get("bibkeys", [""])[0]
+                found = {key: {"title": f"Stub {key[5:]}", "authors": [{"name": "Stub Author"}]}
+                         for key in bibkeys.split(",") if key.startswith("ISBN:")}
+                body = json.dumps(found).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        super().__init__(("127.0.0.1", port), Handler)
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+def create_app():
+    """App factory for the server's workers: the app on LOAD_TEST_DATABASE_URL"""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    from core.database import get_db, get_read_db
+    from main import app
+
+    database_url = os.environ["LOAD_TEST_DATABASE_URL"]
+    connect_args = {"check_same_thread": False} if database_url.startswith("sqlite") else {}
+    SessionLocal = sessionmaker(bind=create_engine(database_url, connect_args=connect_args))
+
+    def override_get_db():
+        session = SessionLocal()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    return app
+
+
+def _serve(database_url: str, port: int, openlibrary_url: str, workers: int) -> None:
+    # Runs in the server process; settings are read at import, so set them first.
+    # The workers inherit the environment.
+    os.environ["OPENLIBRARY_BASE_URL"] = openlibrary_url
+    os.environ["DATABASE_MODE"] = "sync"
+    os.environ["LOAD_TEST_DATABASE_URL"] = database_url
+    from core.server import build_config, serve
+
+    # The production server setup, so --workers measures how it scales
+    serve(build_config("benchmarks.load_test:create_app", factory=True, host="127.0.0.1", port=port,
+                       workers=workers, reload=False, limit_max_requests=None, log_level="warning"))
+
+
+def start_server(database_url: str, openlibrary_url: str, workers: int = 1):
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    # A separate process, so the load generator doesn't compete with the server for the GIL
+    process = multiprocessing.get_context("spawn").Process(target=_serve, args=(database_url, port, openlibrary_url, workers))
+    process.start()
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/health").status_code == 200:
+                return process, base_url
+        except httpx.TransportError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("The server did not start")
+
+
+# --- load ----------------------------------------------------------------------------------
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of already sorted samples"""
+    if not ordered:
+        return 0.0
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+
+def summarize(latencies: List[float], errors: int, seconds: float) -> dict:
+    ordered = sorted(latencies)
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "throughput_rps": round(len(ordered) / seconds, 2) if seconds else 0.0,
+        "latency_ms": {
+            "p50": _ms(percentile(ordered, 0.50)),
+            "p95": _ms(percentile(ordered, 0.95)),
+            "p99": _ms(percentile(ordered, 0.99)),
+            "mean": _ms(statistics.fmean(ordered)) if ordered else 0.0,
+            "max": _ms(ordered[-1]) if ordered else 0.0,
+        },
+    }
+
+
+class Workload:
+    """The requests each scenario makes, for one worker acting as one seeded user"""
+
+    def __init__(self, user: dict, rng: random.Random, created: List[int]):
+        self.user = user
+        self.rng = rng
+        self.created = created  # ids made by the create scenario, consumed by delete
+
+    def list(self, client: httpx.AsyncClient):
+        return client.get("/api/books", params={"limit": 100}, headers=self.user["headers"])
+
+    def search(self, client: httpx.AsyncClient):
+        query = f"{self.rng.choice(WORDS)} {self.rng.choice(WORDS)}"
+        return client.get("/api/books", params={"search": query, "limit": 20}, headers=self.user["headers"])
+
+    def get(self, client: httpx.AsyncClient):
+        return client.get(f"/api/books/{self.rng.randint(*self.user['book_ids'])}", headers=self.user["headers"])
+
+    async def create(self, client: httpx.AsyncClient):
+        response = await client.post("/api/books", headers=self.user["headers"], json={
+            "isbn": f"978{self.rng.randrange(10 ** 10):010d}", "title": f"New {self.rng.choice(WORDS)}",
+            "author": "Load Test", "genre": self.rng.choice(GENRES), "library_id": self.user["library_id"],
+        })
+        if response.status_code == 201:
+            self.created.append(response.json()["id"])
+        return response
+
+    def update(self, client: httpx.AsyncClient):
+        book_id = self.rng.randint(*self.user["book_ids"])
+        return client.put(f"/api/books/{book_id}", headers=self.user["headers"],
+                          json={"description": " ".join(self.rng.choice(WORDS) for _ in range(30))})
+
+    def delete(self, client: httpx.AsyncClient):
+        if not self.created:
+            return None
+        return client.delete(f"/api/books/{self.created.pop()}", headers=self.user["headers"])
+
+    def login(self, client: httpx.AsyncClient):
+        return client.post("/api/login/access-token", json={"email": self.user["email"], "password": PASSWORD})
+
+    def isbn(self, client: httpx.AsyncClient):
+        return client.get(f"/api/books/details/{stub_isbn(self.rng.randrange(STUB_ISBNS))}", headers=self.user["headers"])
+
+
+async def drive(client: httpx.AsyncClient, workloads: List[Workload], scenario: str, duration: float, warmup: float) -> dict:
+    """Closed loop: each worker sends its next request as soon as the previous one is answered"""
+    latencies: List[float] = []
+    errors = 0
+    recording = False
+
+    async def worker(workload: Workload, stop_at: float):
+        nonlocal errors
+        make: Callable = getattr(workload, scenario)
+        while time.perf_counter() < stop_at:
+            start = time.perf_counter()
+            request = make(client)
+            if request is None:
+                return  # nothing left to delete
+            try:
+                response = await request
+                failed = response.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+            if recording:
+                latencies.append(time.perf_counter() - start)
+                errors += failed
+
+    if warmup:
+        await asyncio.gather(*(worker(w, time.perf_counter() + warmup) for w in workloads))
+    recording = True
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(w, start + duration) for w in workloads))
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+
+async def load(base_url: str, ranges: Dict[str, tuple], scenarios: List[str], concurrency: int,
+               duration: float, warmup: float) -> Dict[str, dict]:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+        users = []
+        for email, book_ids in sorted(ranges.items()):
+            response = await client.post("/api/login/access-token", json={"email": email, "password": PASSWORD})
+            response.raise_for_status()
+            headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+            libraries = (await client.get("/api/libraries", headers=headers)).json()
+            users.append({"email": email, "headers": headers, "book_ids": book_ids, "library_id": libraries[0]["id"]})
+
+        workloads = []
+        for n in range(concurrency):
+            user = users[n % len(users)]
+            # Books created by a worker are deleted by the workers acting as the same user
+            created = user.setdefault("created", [])
+            workloads.append(Workload(user, random.Random(SEED + n), created))
+        results = {}
+        for scenario in scenarios:
+            # No warm-up for delete: it would use up the books the create scenario left
+            results[scenario] = await drive(client, workloads, scenario, duration, 0 if scenario == "delete" else warmup)
+        return results
+
+
+def git_commit() -> Optional[str]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True).stdout
+        return commit + ("-dirty" if dirty.strip() else "")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args: argparse.Namespace) -> dict:
+    scenarios = args.scenarios
+    if args.base_url and not args.stub_port and "isbn" in scenarios:
+        scenarios = [scenario for scenario in scenarios if scenario != "isbn"]
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = args.database_url or f"sqlite:///{os.path.join(tmp, 'load.db')}"
+        start = time.perf_counter()
+        seed(database_url, args.books, args.users, args.libraries_per_user)
+        seed_seconds = time.perf_counter() - start
+        ranges = book_id_ranges(database_url)
+
+        stub = OpenLibraryStub(args.stub_port or 0)
+        process = None
+        base_url = args.base_url
+        try:
+            if base_url is None:
+                process, base_url = start_server(database_url, stub.url, args.workers)
+            results = asyncio.run(load(base_url, ranges, scenarios, args.concurrency, args.duration, args.warmup))
+        finally:
+            if process is not None:
+                process.terminate()
+                process.join()
+            stub.shutdown()
+            stub.server_close()
+
+    return {
+        "meta": {
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "target": args.base_url or "local",
+            "database": database_url.split(":", 1)[0] if args.database_url else "sqlite (temporary)",
+            "books": args.books,
+            "users": args.users,
+            "server_workers": None if args.base_url else args.workers,
+            "concurrency": args.concurrency,
+            "duration_seconds": args.duration,
+            "warmup_seconds": args.warmup,
+            "seed_seconds": round(seed_seconds, 2),
+        },
+        "scenarios": results,
+    }
+
+
+# --- comparison ----------------------------------------------------------------------------
+
+def compare(baseline: dict, candidate: dict, threshold: float) -> dict:
+    """Relative change per scenario. Regressions: throughput down, or p95/p99 up, beyond threshold."""
+    report = {}
+    for scenario, before in baseline["scenarios"].items():
+        after = candidate["scenarios"].get(scenario)
+        if after is None:
+            continue
+        change = lambda old, new: round((new - old) / old, 4) if old else 0.0
+        changes = {"throughput_rps": change(before["throughput_rps"], after["throughput_rps"])}
+        for key in ("p50", "p95", "p99"):
+            changes[key] = change(before["latency_ms"][key], after["latency_ms"][key])
+        regressions = []
+        if changes["throughput_rps"] < -threshold:
+            regressions.append("throughput_rps")
+        regressions += [key for key in ("p95", "p99") if changes[key] > threshold]
+        if after["errors"] > before["errors"]:
+            regressions.append("errors")
+        report[scenario] = {"change": changes, "regressions": regressions}
+    return report
+
+
+def print_comparison(report: dict) -> None:
+    print(f"{'scenario':<10}{'rps':>10}{'p50':>10}{'p95':>10}{'p99':>10}  regressions")
+    for scenario, entry in report.items():
+        cells = "".join(f"{entry['change'][key]:>+10.1%}" for key in ("throughput_rps", "p50", "p95", "p99"))
+        print(f"{scenario:<10}{cells}  {', '.join(entry['regressions']) or '-'}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Load test the API and compare runs")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Seed, drive every scenario and report JSON")
+    run_parser.add_argument("--database-url", help="SQLAlchemy URL of a throwaway database (default: temporary SQLite file)")
+    run_parser.add_argument("--base-url", help="Drive an already running server (seeded through --database-url) instead of starting one")
+    run_parser.add_argument("--stub-port", type=int, help="Port for the OpenLibrary stub, for servers started outside this script")
+    run_parser.add_argument("--books", type=int, default=10_000, help="Books to seed, split over the users")
+    run_parser.add_argument("--users", type=int, default=10)
+    run_parser.add_argument("--libraries-per-user", type=int, default=3)
+    run_parser.add_argument("--workers", type=int, default=1, help="Server worker processes (core.server), to measure scaling")
+    run_parser.add_argument("--concurrency", type=int, default=16, help="Requests in flight at any time")
+    run_parser.add_argument("--duration", type=float, default=10.0, help="Measured seconds per scenario")
+    run_parser.add_argument("--warmup", type=float, default=1.0, help="Unmeasured seconds before each scenario")
+    run_parser.add_argument("--scenarios", type=lambda value: value.split(","), default=list(SCENARIOS),
+                            help=f"Comma separated subset of {','.join(SCENARIOS)}")
+    run_parser.add_argument("--output", help="Write the JSON report here as well as to stdout")
+
+    compare_parser = commands.add_parser("compare", help="Compare two reports from `run`")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("candidate")
+    compare_parser.add_argument("--threshold", type=float, default=0.10, help="Relative change counted as a regression")
+    compare_parser.add_argument("--json", action="store_true", help="Print the comparison as JSON")
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        unknown = set(args.scenarios) - set(SCENARIOS)
+        if unknown:
+            parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+        report = json.dumps(run(args), indent=2)
+        print(report)
+        if args.output:
+            with open(args.output, "w") as file:
+                file.write(report + "\n")
+        return 0
+
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    with open(args.candidate) as file:
+        candidate = json.load(file)
+    report = compare(baseline, candidate, args.threshold)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_comparison(report)
+    return 1 if any(entry["regressions"] for entry in report.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
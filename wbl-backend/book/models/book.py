@@ -1,22 +1,58 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey
+from datetime import datetime, timezone
+
+from sqlalchemy import BigInteger, Column, DateTime, Integer, String, Text, ForeignKey, Index, func
 from sqlalchemy.orm import relationship
 
+from book.utils.isbn_utils import normalize_isbn
 from core.database import Base
+from core.revision import next_revision
+
+
+def _normalized_isbn_default(context):
+    return normalize_isbn(context.get_current_parameters()["isbn"])
+
+
+def _utcnow():
+    return datetime.now(timezone.utc)
 
 
 class Book(Base):
     __tablename__ = "books"
+    __table_args__ = (
+        # Serves keyset pagination: owner filter, then (title, id) order
+        Index("ix_books_owner_id_title_id", "owner_id", "title", "id"),
+        # Upserting imports look up the owner's existing copies by ISBN
+        Index("ix_books_owner_id_isbn", "owner_id", "isbn"),
+        # Count and max(updated_at) per owner for the listing ETag, from the index alone
+        Index("ix_books_owner_id_updated_at", "owner_id", "updated_at"),
+        # Delta sync reads an owner's changes in revision order
+        Index("ix_books_owner_id_revision", "owner_id", "revision"),
+        # Library stats group by library and genre; also serves the "library has books" check
+        Index("ix_books_library_id_genre", "library_id", "genre"),
+        # Postgres also has a generated search_vector column with GIN and pg_trgm indexes,
+        # created by migration only (see book.services.book_search)
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     isbn = Column(String(20), index=True, nullable=False)
+    # Exact ISBN lookups go through this; the column is kept in sync from isbn on insert
+    isbn_normalized = Column(String(20), index=True, nullable=True, default=_normalized_isbn_default)
     title = Column(String(255), index=True, nullable=False)
     author = Column(String(255), index=True, nullable=False)
     genre = Column(String(100), nullable=True)
     description = Column(Text, nullable=True)
     cover_image = Column(String, nullable=True)
+    # SHA-256 of the locally cached cover (see cover.services.cover_store); None until it's downloaded
+    cover_hash = Column(String(64), nullable=True)
     old_location = Column(String, nullable=True)  # Will be removed after migration
     library_id = Column(Integer, ForeignKey("libraries.id"), nullable=False)
     owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    # Bumped on every ORM or bulk update; the server default covers rows loaded with COPY
+    updated_at = Column(DateTime(timezone=True), nullable=False, default=_utcnow, onupdate=_utcnow, server_default=func.now())
+    # From the shared change sequence on every insert and update; see sync.services.sync_service
+    revision = Column(BigInteger, nullable=False, default=next_revision(), onupdate=next_revision())
 
-    owner = relationship("User", back_populates="books")
-    library = relationship("Library", back_populates="books")
\ No newline at end of file
+    # Never loaded implicitly: an accidental lazy load per row is an N+1 query.
+    # `library` is only filled in when a query asks for it (joinedload, see BookService ?embed=library).
+    owner = relationship("User", back_populates="books", lazy="raise_on_sql")
+    library = relationship("Library", back_populates="books", lazy="noload")
\ No newline at end of file
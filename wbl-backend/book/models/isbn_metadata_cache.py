@@ -0,0 +1,15 @@
+from sqlalchemy import Boolean, Column, DateTime, String, Text
+
+from core.database import Base
+
+
+class IsbnMetadataCache(Base):
+    """OpenLibrary lookup results, including misses (found=False), keyed by normalized ISBN"""
+    __tablename__ = "isbn_metadata_cache"
+
+    isbn = Column(String(20), primary_key=True)
+    found = Column(Boolean, nullable=False)
+    title = Column(Text, nullable=True)
+    authors = Column(Text, nullable=True)
+    cover_url = Column(Text, nullable=True)
+    fetched_at = Column(DateTime(timezone=True), nullable=False)
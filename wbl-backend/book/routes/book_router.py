@@ -1,42 +1,118 @@
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import List, Literal, Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, File, HTTPException, Query, Request, Response, UploadFile, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from auth.services.auth_service import get_current_user
 # Ensure BookResponse includes the new id field
-from book.schemas.book import BookCreate, BookResponse, BookUpdate, BookResponseWithId 
-from book.services.book_service import BookService
-from core.database import get_db
+from book.schemas.book import (
+    BookCreate, BookResponse, BookUpdate, BookResponseWithId,
+    BookDetailsBatchRequest, BookDetailsBatchItem, BookDetailsBatchResponse, BookImportResult,
+)
+from book.services.book_export import BookExportService
+from book.services.book_import import BookImportService, iter_records
+from book.services.book_service import AsyncBookService, BookService
+from book.services.openlibrary_client import OpenLibraryClient, get_openlibrary_client
+from book.utils.isbn_utils import normalize_isbn
+from core.database import DbSession, get_db, get_read_session, get_session
+from core.conditional import collection_etag, is_not_modified, not_modified, set_validators
+from core.responses import FastJSONResponse
+from core.http_client import ResilientHttpClient, UpstreamUnavailableError, get_http_client
+from cover.services.cover_service import CoverService
+from core.pagination import InvalidCursorError
 from user.models.user import User
 
 router = APIRouter(prefix="/books", tags=["books"])
 
 
 @router.get("", response_model=List[BookResponseWithId]) # Changed to BookResponseWithId
-def get_books(
+async def get_books(
+    request: Request,
+    response: Response,
     skip: int = 0,
-    limit: int = 100,
+    limit: int = Query(100, ge=1, le=1000),
     search: Optional[str] = None,
+    cursor: Optional[str] = Query(None, description="Opaque token from the previous page's Link header"),
+    embed: Optional[Literal["library"]] = Query(None, description="Include each book's library, loaded in the same query"),
     # owner_id: Optional[int] = None, # Keep for potential admin use, but prioritize current_user
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_read_session),
     current_user: User = Depends(get_current_user)):
-    
+    """List the current user's books ordered by title.
+
+    Pages are keyset based: when there are more results the response carries a
+    `Link: <...>; rel="next"` header whose URL includes the `cursor` for the next page.
+    `skip` is still accepted for older clients but costs more the deeper it goes.
+    Responses carry an ETag; polling with If-None-Match gets a bodyless 304 while nothing changed.
+    """
     # If we implement admin/superuser later, they could override owner_id.
     # For now, all users only see their own books.
     user_owner_id = current_user.id
 
-    books = BookService.get_books(db=db, skip=skip, limit=limit, search=search, owner_id=user_owner_id)
-    if not books:
-        # It's better to return an empty list than a 404 if no books match the criteria for this user.
-        # A 404 might be more appropriate if the user themselves didn't exist, but here they do.
-        return []
+    # One small indexed query decides whether the listing changed, before any ORM work
+    embed_library = embed == "library"
+    count, last_modified = await AsyncBookService.get_collection_version(db, owner_id=user_owner_id)
+    version = (count, last_modified)
+    if embed_library:
+        # Embedded libraries change without the books changing (a rename), so they're part of the validators too
+        library_count, libraries_modified = await AsyncBookService.get_libraries_version(db, owner_id=user_owner_id)
+        if libraries_modified is not None and (last_modified is None or libraries_modified > last_modified):
+            last_modified = libraries_modified
+        version = (count, library_count, last_modified)
+    etag = collection_etag("books", user_owner_id, *version, request.url.query)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified(etag, last_modified)
+    set_validators(response, etag, last_modified)
+
+    # Without embedded libraries the page is read as plain column rows and sent as is: no ORM
+    # objects, no response_model validation of data that just came out of the database
+    as_rows = not embed_library
+    if skip and not cursor:
+        books = await AsyncBookService.get_books(
+            db=db, skip=skip, limit=limit, search=search, owner_id=user_owner_id, embed_library=embed_library, as_rows=as_rows)
+    else:
+        try:
+            books, next_cursor = await AsyncBookService.get_books_page(
+                db=db, limit=limit, cursor=cursor, search=search, owner_id=user_owner_id, embed_library=embed_library, as_rows=as_rows)
+        except InvalidCursorError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        if next_cursor:
+            next_url = request.url.remove_query_params("skip").include_query_params(cursor=next_cursor)
+            response.headers["Link"] = f'<{next_url}>; rel="next"'
+    if as_rows:
+        # A returned Response doesn't pick up headers set on `response`, so pass them along
+        return FastJSONResponse(books, headers=response.headers)
     return books
 
 
+@router.get("/export", response_class=StreamingResponse)
+def export_books(
+    format: Literal["csv", "ndjson"] = "csv",
+    compress: bool = Query(False, description="Send a .gz file compressed on the fly"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Download the current user's whole catalogue. Rows are streamed from a server-side
+       cursor, so memory use stays flat however large the library is.
+    """
+    # Stays on the sync engine: the rows are read from a worker thread while the response streams
+    batches = BookExportService.iter_book_rows(db.get_bind(), owner_id=current_user.id)
+    if format == "csv":
+        chunks, media_type, filename = BookExportService.encode_csv(batches), "text/csv", "books.csv"
+    else:
+        chunks, media_type, filename = BookExportService.encode_ndjson(batches), "application/x-ndjson", "books.ndjson"
+    if compress:
+        chunks, media_type, filename = BookExportService.gzip_chunks(chunks), "application/gzip", f"{filename}.gz"
+    return StreamingResponse(chunks, media_type=media_type, headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+
 @router.get("/{book_id}", response_model=BookResponseWithId) # Changed to book_id and BookResponseWithId
-def get_book(book_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def get_book(
+    book_id: int,
+    embed: Optional[Literal["library"]] = Query(None, description="Include the book's library"),
+    db: DbSession = Depends(get_session),
+    current_user: User = Depends(get_current_user)):
     """Get a book by its new ID"""
-    db_book = BookService.get_book_by_id(db, book_id) # Service needs to use ID
+    db_book = await AsyncBookService.get_book_by_id(db, book_id, embed_library=embed == "library") # Service needs to use ID
     if db_book is None:
         raise HTTPException(status_code=404, detail="Book not found")
     if db_book.owner_id != current_user.id and not current_user.is_superuser:
@@ -44,7 +120,10 @@ def get_book(book_id: int, db: Session = Depends(get_db), current_user: User = D
     return db_book
 
 @router.get("/details/{book_isbn}", response_model=BookResponse) # Stays BookResponse, as it's pre-creation
-def get_book_details(book_isbn: str, db: Session = Depends(get_db)):
+async def get_book_details(
+    book_isbn: str,
+    db: DbSession = Depends(get_session),
+    client: OpenLibraryClient = Depends(get_openlibrary_client)):
     """Get book details from OpenLibrary API. 
        This does NOT check for user ownership as it's for pre-populating the add book form.
        The check for existing book (204) should now consider ISBN + user if you want to prevent
@@ -58,7 +137,10 @@ def get_book_details(book_isbn: str, db: Session = Depends(get_db)):
     # if existing_book:
     #     raise HTTPException(status_code=status.HTTP_204_NO_CONTENT, detail="Book with this ISBN already exists in the library.")
 
-    book_details = BookService.get_book_details_from_external(book_isbn) # Renamed for clarity
+    try:
+        book_details = await BookService.get_book_details_from_external(book_isbn, client, db=db) # Cached, see isbn_cache
+    except UpstreamUnavailableError:
+        raise HTTPException(status_code=503, detail="Book details service is temporarily unavailable")
     if not book_details:
         raise HTTPException(status_code=404, detail="Book details not found from external API")
 
@@ -72,45 +154,106 @@ def get_book_details(book_isbn: str, db: Session = Depends(get_db)):
         library_id=None, # Will be set by user
     )
 
+@router.post("/details:batch", response_model=BookDetailsBatchResponse)
+async def get_book_details_batch(
+    batch: BookDetailsBatchRequest,
+    db: DbSession = Depends(get_session),
+    client: OpenLibraryClient = Depends(get_openlibrary_client)):
+    """Resolve up to 500 ISBNs in one call, e.g. after scanning a box of books.
+       Duplicates are collapsed; cached ISBNs never reach OpenLibrary and the rest are
+       looked up many ISBNs per request.
+    """
+    resolved = await BookService.get_book_details_batch(batch.isbns, client, db=db)
+    results = []
+    for isbn in dict.fromkeys(normalize_isbn(isbn) for isbn in batch.isbns):
+        if not isbn:
+            continue
+        if isbn not in resolved:
+            results.append(BookDetailsBatchItem(isbn=isbn, status="unavailable"))
+        elif resolved[isbn] is None:
+            results.append(BookDetailsBatchItem(isbn=isbn, status="not_found"))
+        else:
+            details = resolved[isbn]
+            results.append(BookDetailsBatchItem(isbn=isbn, status="found", details=BookResponse(
+                isbn=isbn,
+                title=details.get("title", "N/A"),
+                author=details.get("author", "N/A"),
+                cover_image=details.get("cover_image"),
+            )))
+    return BookDetailsBatchResponse(results=results)
+
 @router.post("", response_model=BookResponseWithId, status_code=status.HTTP_201_CREATED) # Changed to BookResponseWithId
-def create_book(
+async def create_book(
     book: BookCreate,
-    db: Session = Depends(get_db),
+    background_tasks: BackgroundTasks,
+    db: DbSession = Depends(get_session),
+    http_client: ResilientHttpClient = Depends(get_http_client),
     current_user: User = Depends(get_current_user)
 ):
-    """Create a new book. The book will be owned by the current_user."""
+    """Create a new book. The book will be owned by the current_user.
+       Its cover is downloaded to the local cover cache after the response is sent.
+    """
     # BookService.create_book should now assign current_user.id to book.owner_id
-    return BookService.create_book(db=db, book_data=book, owner_id=current_user.id)
+    db_book = await AsyncBookService.create_book(db=db, book_data=book, owner_id=current_user.id)
+    CoverService.schedule(background_tasks, db, db_book, http_client)
+    return db_book
+
+
+@router.post("/import", response_model=BookImportResult)
+def import_books(
+    file: UploadFile = File(..., description="CSV with a header row, or JSON Lines with one book per line"),
+    format: Optional[Literal["csv", "jsonl"]] = Query(None, description="Defaults from the file name"),
+    upsert: bool = Query(False, description="Update books whose ISBN you already own instead of adding copies"),
+    library_id: Optional[int] = Query(None, description="Library for rows that don't name one"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Bulk add books from a large upload. Rows are validated and written in batches;
+       invalid rows are reported by row number and don't stop the import.
+    """
+    # Stays a sync route on the sync engine: it reads the upload and may COPY through psycopg2
+    file_format = format or ("csv" if (file.filename or "").lower().endswith(".csv") else "jsonl")
+    return BookImportService.import_books(
+        db=db,
+        records=iter_records(file.file, file_format),
+        owner_id=current_user.id,
+        upsert=upsert,
+        default_library_id=library_id,
+    )
 
 
 @router.put("/{book_id}", response_model=BookResponseWithId) # Changed to book_id and BookResponseWithId
-def update_book(
+async def update_book(
     book_id: int,
     book: BookUpdate,
-    db: Session = Depends(get_db),
+    background_tasks: BackgroundTasks,
+    db: DbSession = Depends(get_session),
+    http_client: ResilientHttpClient = Depends(get_http_client),
     current_user: User = Depends(get_current_user)
 ):
     """Update an existing book by its new ID. Ensures user owns the book."""
-    db_book = BookService.get_book_by_id(db, book_id)
+    db_book = await AsyncBookService.get_book_by_id(db, book_id)
     if db_book is None:
         raise HTTPException(status_code=404, detail="Book not found")
     if db_book.owner_id != current_user.id and not current_user.is_superuser:
         raise HTTPException(status_code=403, detail="Not authorized to update this book")
-    return BookService.update_book(db=db, book_id=book_id, book_data=book)
+    db_book = await AsyncBookService.update_book(db=db, book_id=book_id, book_data=book)
+    CoverService.schedule(background_tasks, db, db_book, http_client)
+    return db_book
 
 
 @router.delete("/{book_id}", status_code=status.HTTP_204_NO_CONTENT) # Changed to book_id
-def delete_book(
+async def delete_book(
     book_id: int,
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
     """Delete a book by its new ID. Ensures user owns the book."""
-    db_book = BookService.get_book_by_id(db, book_id)
+    db_book = await AsyncBookService.get_book_by_id(db, book_id)
     if db_book is None:
         #raise HTTPException(status_code=404, detail="Book not found") # Deleting non-existent can be idempotent
         return # Or return 204 directly
     if db_book.owner_id != current_user.id and not current_user.is_superuser:
         raise HTTPException(status_code=403, detail="Not authorized to delete this book")
-    BookService.delete_book(db=db, book_id=book_id)
+    await AsyncBookService.delete_book(db=db, book_id=book_id)
     return
\ No newline at end of file
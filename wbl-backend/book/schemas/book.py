@@ -1,5 +1,7 @@
-from typing import Optional
-from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
+from pydantic import BaseModel, ConfigDict, Field, model_serializer
+
+from library.schemas.library import LibraryResponse
 
 
 # Schema for book details fetched from external API (e.g., OpenLibrary)
@@ -13,8 +15,7 @@ class BookResponse(BaseModel):
     description: Optional[str] = None  # Typically not from OpenLibrary, user adds
     library_id: Optional[int] = None  # The library ID
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # Schema for creating a book in the database
@@ -44,8 +45,46 @@ class BookUpdate(BaseModel):
 class BookResponseWithId(BookResponse):  # Inherits fields from BookResponse
     id: int
     owner_id: int
+    # Set once the cover is cached: serve it from /api/covers/{cover_hash}/{size} instead of cover_image
+    cover_hash: Optional[str] = None
     # Ensure all fields from Book model are here if they should be returned
     # BookResponse already has isbn, title, author, cover_image, genre, description, library_id
+    # Only present with ?embed=library; the relationship isn't loaded otherwise
+    library: Optional[LibraryResponse] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+    @model_serializer(mode="wrap")
+    def _omit_library_unless_embedded(self, handler):
+        data = handler(self)
+        if self.library is None:
+            data.pop("library", None)
+        return data
+
+
+# Schemas for resolving many ISBNs at once (barcode scanner bulk adds)
+class BookDetailsBatchRequest(BaseModel):
+    isbns: List[str] = Field(..., min_length=1, max_length=500)
+
+
+class BookDetailsBatchItem(BaseModel):
+    isbn: str  # Normalized, so duplicates in the request collapse to one item
+    status: Literal["found", "not_found", "unavailable"]
+    details: Optional[BookResponse] = None
+
+
+class BookDetailsBatchResponse(BaseModel):
+    results: List[BookDetailsBatchItem]
+
+
+# Schemas for bulk imports (CSV / JSONL uploads and the import_books.py CLI)
+class BookImportError(BaseModel):
+    row: int  # CSV data row (1 = first row after the header) or JSONL line number
+    errors: List[str]
+
 
-    class Config:
-        orm_mode = True
\ No newline at end of file
+class BookImportResult(BaseModel):
+    inserted: int = 0
+    updated: int = 0
+    failed: int = 0
+    errors: List[BookImportError] = []  # Capped; `failed` has the full count
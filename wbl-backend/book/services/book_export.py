@@ -0,0 +1,68 @@
+import csv
+import io
+import json
+import zlib
+from typing import Iterable, Iterator, Sequence
+
+from sqlalchemy import Engine, select
+from sqlalchemy.orm import Session
+
+from book.models.book import Book as BookModel
+
+EXPORT_COLUMNS = (
+    BookModel.id,
+    BookModel.isbn,
+    BookModel.title,
+    BookModel.author,
+    BookModel.genre,
+    BookModel.description,
+    BookModel.cover_image,
+    BookModel.library_id,
+)
+EXPORT_FIELDS = [column.key for column in EXPORT_COLUMNS]
+
+
+class BookExportService:
+    @staticmethod
+    def iter_book_rows(bind: Engine, owner_id: int, batch_size: int = 1000) -> Iterator[Sequence[tuple]]:
+        """Yield an owner's books as batches of plain tuples using a server-side cursor.
+
+        Opens its own session because streaming outlives the request's session, and only
+        ever holds one batch in memory.
+        """
+        with Session(bind=bind) as db:
+            result = db.execute(
+                select(*EXPORT_COLUMNS)
+                .where(BookModel.owner_id == owner_id)
+                .order_by(BookModel.id)
+                .execution_options(yield_per=batch_size)  # implies stream_results
+            )
+            for partition in result.partitions():
+                yield partition
+
+    @staticmethod
+    def encode_csv(batches: Iterable[Sequence[tuple]]) -> Iterator[bytes]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_FIELDS)
+        yield buffer.getvalue().encode("utf-8")
+        for batch in batches:
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(batch)
+            yield buffer.getvalue().encode("utf-8")
+
+    @staticmethod
+    def encode_ndjson(batches: Iterable[Sequence[tuple]]) -> Iterator[bytes]:
+        for batch in batches:
+            yield "".join(json.dumps(dict(zip(EXPORT_FIELDS, row))) + "\n" for row in batch).encode("utf-8")
+
+    @staticmethod
+    def gzip_chunks(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+        """Compress on the fly, flushing after every chunk so bytes keep flowing to the client"""
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits=31 writes a gzip header
+        for chunk in chunks:
+            compressed = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            if compressed:
+                yield compressed
+        yield compressor.flush()
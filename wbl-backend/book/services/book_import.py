@@ -0,0 +1,196 @@
+import csv
+import io
+import json
+from itertools import islice
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+from pydantic import ValidationError
+from sqlalchemy import insert, text, update
+from sqlalchemy.orm import Session
+
+from book.models.book import Book as BookModel
+from book.schemas.book import BookCreate, BookImportError, BookImportResult
+from book.utils.isbn_utils import normalize_isbn
+from core.events import ChangeEvent, event_broker
+from core.revision import REVISION_SEQUENCE
+from library.models.library import Library
+
+# (row number, parsed record) or (row number, parse error message)
+ImportRecord = Tuple[int, Union[dict, str]]
+
+MAX_REPORTED_ERRORS = 1000
+COPY_NULL = "\\N"  # keeps empty strings distinct from NULL
+COPY_COLUMNS = ("isbn", "isbn_normalized", "title", "author", "genre", "description", "cover_image", "library_id", "owner_id", "revision")
+
+
+def iter_csv_records(stream: BinaryIO) -> Iterator[ImportRecord]:
+    """Stream rows of a CSV upload with a header row naming BookCreate fields"""
+    reader = csv.DictReader(io.TextIOWrapper(stream, encoding="utf-8-sig", newline=""))
+    for row_number, row in enumerate(reader, start=1):
+        if None in row:
+            yield row_number, "Row has more values than the header"
+            continue
+        # Empty cells mean "not provided" rather than an empty string
+        yield row_number, {key.strip(): value for key, value in row.items() if key and value not in (None, "")}
+
+
+def iter_jsonl_records(stream: BinaryIO) -> Iterator[ImportRecord]:
+    """Stream objects of a JSON Lines / NDJSON upload, one book per line"""
+    for line_number, line in enumerate(io.TextIOWrapper(stream, encoding="utf-8-sig"), start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_number, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(record, dict):
+            yield line_number, "Each line must be a JSON object"
+            continue
+        yield line_number, record
+
+
+def iter_records(stream: BinaryIO, file_format: str) -> Iterator[ImportRecord]:
+    if file_format == "csv":
+        return iter_csv_records(stream)
+    return iter_jsonl_records(stream)
+
+
+class BookImportService:
+    @staticmethod
+    def import_books(
+        db: Session,
+        records: Iterable[ImportRecord],
+        owner_id: int,
+        upsert: bool = False,
+        default_library_id: Optional[int] = None,
+        batch_size: int = 1000,
+    ) -> BookImportResult:
+        """Validate and write books in batches, committing once per batch.
+
+        Memory use is bounded by batch_size whatever the input size. With upsert, a row whose
+        ISBN the owner already has updates that book instead of adding another copy, so
+        re-running an import is idempotent.
+        """
+        result = BookImportResult()
+        known_library_ids: Set[int] = set()
+        use_copy = not upsert and BookImportService._supports_copy(db)
+        records = iter(records)
+        while True:
+            batch = list(islice(records, batch_size))
+            if not batch:
+                break
+            rows = BookImportService._validate_batch(db, batch, owner_id, default_library_id, known_library_ids, result)
+            if rows:
+                if upsert:
+                    BookImportService._upsert_rows(db, rows, owner_id, result)
+                elif use_copy:
+                    BookImportService._copy_rows(db, rows)
+                    result.inserted += len(rows)
+                else:
+                    db.execute(insert(BookModel), rows)
+                    result.inserted += len(rows)
+            db.commit()
+            if rows:
+                # One event per batch rather than per book; clients pull the rows through /api/sync
+                event_broker.publish(ChangeEvent(entity="book", action="imported", owner_id=owner_id))
+        return result
+
+    @staticmethod
+    def _record_error(result: BookImportResult, row_number: int, errors: List[str]) -> None:
+        result.failed += 1
+        if len(result.errors) < MAX_REPORTED_ERRORS:
+            result.errors.append(BookImportError(row=row_number, errors=errors))
+
+    @staticmethod
+    def _validate_batch(
+        db: Session,
+        batch: List[ImportRecord],
+        owner_id: int,
+        default_library_id: Optional[int],
+        known_library_ids: Set[int],
+        result: BookImportResult,
+    ) -> List[dict]:
+        validated: List[Tuple[int, BookCreate]] = []
+        for row_number, record in batch:
+            if isinstance(record, str):
+                BookImportService._record_error(result, row_number, [record])
+                continue
+            if default_library_id is not None:
+                record.setdefault("library_id", default_library_id)
+            try:
+                validated.append((row_number, BookCreate.model_validate(record)))
+            except ValidationError as e:
+                messages = [f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors()]
+                BookImportService._record_error(result, row_number, messages)
+
+        # One query per batch for library ids we haven't seen yet, instead of a failed chunk on a bad FK
+        unknown = {book.library_id for _, book in validated} - known_library_ids
+        if unknown:
+            known_library_ids.update(library_id for (library_id,) in db.query(Library.id).filter(Library.id.in_(unknown)))
+
+        rows = []
+        for row_number, book in validated:
+            if book.library_id not in known_library_ids:
+                BookImportService._record_error(result, row_number, [f"library_id: Library {book.library_id} does not exist"])
+                continue
+            # Only the fields the row provided, so an upsert leaves the others as they are
+            rows.append({**book.model_dump(exclude_unset=True), "owner_id": owner_id})
+        return rows
+
+    @staticmethod
+    def _upsert_rows(db: Session, rows: List[dict], owner_id: int, result: BookImportResult) -> None:
+        # Within a batch the last row for an ISBN wins, as if the rows were applied one by one
+        by_isbn: Dict[str, dict] = {row["isbn"]: row for row in rows}
+        # isbn -> (id, cover_image) of the owner's oldest copy
+        existing: Dict[str, Tuple[int, Optional[str]]] = {}
+        for isbn, book_id, cover_image in (
+            db.query(BookModel.isbn, BookModel.id, BookModel.cover_image)
+            .filter(BookModel.owner_id == owner_id, BookModel.isbn.in_(list(by_isbn)))
+            .order_by(BookModel.id.desc())
+        ):
+            existing[isbn] = (book_id, cover_image)
+        updates = []
+        inserts = []
+        for isbn, row in by_isbn.items():
+            if isbn not in existing:
+                inserts.append(row)
+                continue
+            book_id, cover_image = existing[isbn]
+            row = {**row, "id": book_id}
+            if "cover_image" in row and row["cover_image"] != cover_image:
+                row["cover_hash"] = None  # the cached copy is of the old cover
+            updates.append(row)
+        if updates:
+            db.execute(update(BookModel), updates)
+        if inserts:
+            db.execute(insert(BookModel), inserts)
+        result.updated += len(updates)
+        result.inserted += len(inserts)
+
+    @staticmethod
+    def _supports_copy(db: Session) -> bool:
+        bind = db.get_bind()
+        return bind.dialect.name == "postgresql" and bind.dialect.driver == "psycopg2"
+
+    @staticmethod
+    def _copy_rows(db: Session, rows: List[dict]) -> None:
+        """Stream a batch through Postgres COPY, the fastest way to load many rows"""
+        # COPY can't evaluate column defaults in SQL, so reserve the batch's revisions in one round trip
+        revisions = db.execute(
+            text("SELECT nextval(:sequence) FROM generate_series(1, :count)"),
+            {"sequence": REVISION_SEQUENCE.name, "count": len(rows)},
+        ).scalars()
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row, revision in zip(rows, revisions):
+            row["isbn_normalized"] = normalize_isbn(row["isbn"])
+            row["revision"] = revision
+            writer.writerow([COPY_NULL if row.get(column) is None else row[column] for column in COPY_COLUMNS])
+        buffer.seek(0)
+        # Same transaction as the rest of the session's work
+        cursor = db.connection().connection.cursor()
+        try:
+            cursor.copy_expert(f"COPY books ({', '.join(COPY_COLUMNS)}) FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')", buffer)
+        finally:
+            cursor.close()
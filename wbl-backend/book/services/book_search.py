@@ -0,0 +1,67 @@
+from typing import NamedTuple, Optional
+
+from sqlalchemy import ColumnElement, Float, func, literal_column, or_
+from sqlalchemy.dialects.postgresql import TSVECTOR
+
+from book.models.book import Book as BookModel
+from book.utils.isbn_utils import looks_like_isbn, normalize_isbn
+
+# Generated column maintained by Postgres (see the add_books_search migration). It is not
+# mapped on the model because SQLite can't create it, so only the Postgres backend uses it.
+SEARCH_VECTOR = literal_column("books.search_vector", TSVECTOR)
+
+
+class BookSearch(NamedTuple):
+    condition: ColumnElement
+    rank: Optional[ColumnElement]  # Higher is better; None means "no relevance order"
+
+
+def build_book_search(dialect_name: str, term: str) -> BookSearch:
+    """Pick the search backend for the connected database"""
+    term = term.strip()
+    if dialect_name == "postgresql":
+        return _postgres_search(term)
+    return _fallback_search(term)
+
+
+def _isbn_condition(term: str) -> Optional[ColumnElement]:
+    if looks_like_isbn(term):
+        return BookModel.isbn_normalized == normalize_isbn(term)
+    return None
+
+
+def _postgres_search(term: str) -> BookSearch:
+    """Ranked full-text match, pg_trgm fuzzy/substring match and exact ISBN, all index backed"""
+    # Titles and descriptions are stemmed as English, authors are not; query both ways
+    query = func.websearch_to_tsquery("english", term).op("||")(func.websearch_to_tsquery("simple", term))
+    substring = f"%{term}%"
+    conditions = [
+        SEARCH_VECTOR.op("@@")(query),
+        BookModel.title.op("%")(term),  # trigram similarity, tolerates typos
+        BookModel.author.op("%")(term),
+        BookModel.title.ilike(substring),  # served by the trigram GIN indexes too
+        BookModel.author.ilike(substring),
+    ]
+    isbn_match = _isbn_condition(term)
+    if isbn_match is not None:
+        conditions.append(isbn_match)
+
+    rank = (
+        func.ts_rank(SEARCH_VECTOR, query)
+        + func.greatest(func.similarity(BookModel.title, term), func.similarity(BookModel.author, term))
+    ).cast(Float)
+    return BookSearch(condition=or_(*conditions), rank=rank)
+
+
+def _fallback_search(term: str) -> BookSearch:
+    """Portable substring match used on SQLite (tests) or any database without the extensions"""
+    substring = f"%{term.lower()}%"
+    conditions = [
+        BookModel.title.ilike(substring),
+        BookModel.author.ilike(substring),
+        BookModel.isbn.ilike(substring),
+    ]
+    isbn_match = _isbn_condition(term)
+    if isbn_match is not None:
+        conditions.append(isbn_match)
+    return BookSearch(condition=or_(*conditions), rank=None)
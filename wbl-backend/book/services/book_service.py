@@ -1,56 +1,179 @@
-from typing import List, Optional
-from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple, Union
+from sqlalchemy import ColumnElement, and_, func, or_, select, tuple_
+from sqlalchemy.orm import Query, Session, joinedload
 from fastapi import HTTPException
-import requests  # For OpenLibrary API
 
 from book.models.book import Book as BookModel
-from book.schemas.book import BookCreate, BookUpdate
+from book.schemas.book import BookCreate, BookResponseWithId, BookUpdate
+from book.services.book_search import build_book_search
+from book.services.isbn_cache import MISSING, isbn_cache
+from book.services.openlibrary_client import OpenLibraryClient
+from book.utils.isbn_utils import normalize_isbn
+from core.conditional import newest
+from core.database import DbSession, async_variant, run_db
+from core.events import ChangeEvent, event_broker
+from core.pagination import decode_cursor, encode_cursor
+from library.models.library import Library
+from sync.models.tombstone import Tombstone
+
+# BookResponseWithId's fields in its order, for listings that skip the ORM (as_rows=True)
+LISTING_COLUMNS = tuple(getattr(BookModel, name) for name in BookResponseWithId.model_fields if name != "library")
+LISTING_KEYS = tuple(column.key for column in LISTING_COLUMNS)
+
+
+def _as_dicts(rows) -> List[Dict[str, Any]]:
+    # zip stops at the listing columns, so a trailing rank column is dropped for free
+    return [dict(zip(LISTING_KEYS, row)) for row in rows]
 
 
 class BookService:
     @staticmethod
-    def get_books(db: Session, skip: int = 0, limit: int = 100, search: Optional[str] = None, owner_id: Optional[int] = None) -> List[BookModel]:
+    def _filtered_query(db: Session, search: Optional[str] = None, owner_id: Optional[int] = None, embed_library: bool = False) -> Tuple[Query, Optional[ColumnElement]]:
+        """Base listing query plus the relevance expression when the search backend ranks results"""
         query = db.query(BookModel)
+        if embed_library:
+            # Many-to-one, so a join adds no rows; the page stays one query
+            query = query.options(joinedload(BookModel.library))
         if owner_id is not None:
             query = query.filter(BookModel.owner_id == owner_id)
-        if search:
-            search_term = f"%{search.lower()}%"
-            query = query.filter(
-                BookModel.title.ilike(search_term) |
-                BookModel.author.ilike(search_term) |
-                BookModel.isbn.ilike(search_term)
-            )
-        return query.offset(skip).limit(limit).all()
+        rank = None
+        if search and search.strip():
+            book_search = build_book_search(db.get_bind().dialect.name, search)
+            query = query.filter(book_search.condition)
+            rank = book_search.rank
+        return query, rank
+
+    @staticmethod
+    def get_books(db: Session, skip: int = 0, limit: int = 100, search: Optional[str] = None, owner_id: Optional[int] = None,
+                  embed_library: bool = False, as_rows: bool = False) -> Union[List[BookModel], List[Dict[str, Any]]]:
+        """as_rows=True selects only the listing columns and returns plain dicts shaped like BookResponseWithId"""
+        query, rank = BookService._filtered_query(db, search=search, owner_id=owner_id, embed_library=embed_library)
+        if as_rows:
+            query = query.with_entities(*LISTING_COLUMNS)
+        # Same order as the cursor mode so both ways of paging agree
+        if rank is not None:
+            query = query.order_by(rank.desc(), BookModel.id)
+        else:
+            query = query.order_by(BookModel.title, BookModel.id)
+        books = query.offset(skip).limit(limit).all()
+        return _as_dicts(books) if as_rows else books
+
+    @staticmethod
+    def get_books_page(db: Session, limit: int = 100, cursor: Optional[str] = None, search: Optional[str] = None, owner_id: Optional[int] = None,
+                       embed_library: bool = False, as_rows: bool = False) -> Tuple[Union[List[BookModel], List[Dict[str, Any]]], Optional[str]]:
+        """Keyset pagination over (title, id). Returns the page and the cursor for the next one.
+
+        Seeks straight to the previous page's last key, so page N costs the same as page 1
+        and concurrent inserts don't shift rows between pages. Ranked searches page over
+        (relevance, id) instead. as_rows works as in get_books.
+        Raises core.pagination.InvalidCursorError for a token we didn't issue.
+        """
+        query, rank = BookService._filtered_query(db, search=search, owner_id=owner_id, embed_library=embed_library)
+        if as_rows:
+            query = query.with_entities(*LISTING_COLUMNS)
+        if rank is not None:
+            return BookService._get_ranked_page(query, rank, limit, cursor, as_rows)
+
+        if cursor:
+            last_title, last_id = decode_cursor(cursor, str, int)
+            query = query.filter(tuple_(BookModel.title, BookModel.id) > tuple_(last_title, last_id))
+        # Fetch one extra row to know whether there is a next page
+        books = query.order_by(BookModel.title, BookModel.id).limit(limit + 1).all()
+        next_cursor = None
+        if len(books) > limit:
+            books = books[:limit]
+            next_cursor = encode_cursor(books[-1].title, books[-1].id)
+        return (_as_dicts(books) if as_rows else books), next_cursor
 
     @staticmethod
-    def get_book_by_id(db: Session, book_id: int) -> Optional[BookModel]:
-        return db.query(BookModel).filter(BookModel.id == book_id).first()
+    def _get_ranked_page(query: Query, rank: ColumnElement, limit: int, cursor: Optional[str], as_rows: bool = False) -> Tuple[list, Optional[str]]:
+        if cursor:
+            last_rank, last_id = decode_cursor(cursor, float, int)
+            query = query.filter(or_(rank < last_rank, and_(rank == last_rank, BookModel.id > last_id)))
+        rows = query.add_columns(rank).order_by(rank.desc(), BookModel.id).limit(limit + 1).all()
+        page = rows[:limit]
+        books = _as_dicts(page) if as_rows else [row[0] for row in page]
+        if len(rows) <= limit:
+            return books, None
+        last = rows[limit - 1]
+        return books, encode_cursor(last[-1], last.id if as_rows else last[0].id)
+
+    @staticmethod
+    def get_collection_version(db: Session, owner_id: int) -> Tuple[int, Optional[datetime]]:
+        """(count, last change) of an owner's books: changes whenever a book is added, edited or removed.
+
+        Deletes leave no row behind to date them, so the newest book tombstone counts as a change too.
+        """
+        last_deleted = (
+            select(func.max(Tombstone.deleted_at))
+            .where(Tombstone.owner_id == owner_id, Tombstone.entity == "book")
+            .scalar_subquery()
+        )
+        count, last_updated, last_deleted = (
+            db.query(func.count(BookModel.id), func.max(BookModel.updated_at), last_deleted)
+            .filter(BookModel.owner_id == owner_id)
+            .one()
+        )
+        return count, newest(last_updated, last_deleted)
+
+    @staticmethod
+    def get_libraries_version(db: Session, owner_id: int) -> Tuple[int, Optional[datetime]]:
+        """(count, max(updated_at)) of the libraries an owner's books are in, for listings that embed them"""
+        library_ids = db.query(BookModel.library_id).filter(BookModel.owner_id == owner_id)
+        count, last_modified = (
+            db.query(func.count(Library.id), func.max(Library.updated_at))
+            .filter(Library.id.in_(library_ids.scalar_subquery()))
+            .one()
+        )
+        return count, last_modified
+
+    @staticmethod
+    def get_book_by_id(db: Session, book_id: int, embed_library: bool = False) -> Optional[BookModel]:
+        # Identity map first, so the route's lookup and the service's share one query
+        return db.get(BookModel, book_id, options=[joinedload(BookModel.library)] if embed_library else None)
 
     @staticmethod
     def get_book_by_isbn_and_owner(db: Session, isbn: str, owner_id: int) -> Optional[BookModel]:
         """Fetches a specific book instance by ISBN for a given owner."""
-        return db.query(BookModel).filter(BookModel.isbn == isbn, BookModel.owner_id == owner_id).first()    @staticmethod
-    def get_book_details_from_external(isbn: str) -> Optional[dict]:
-        """Fetches book details from OpenLibrary API."""
-        url = f"https://openlibrary.org/api/books?bibkeys=ISBN:{isbn}&format=json&jscmd=data"
-        try:
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()  # Raise an exception for HTTP errors
-            data = response.json()
-            if f"ISBN:{isbn}" in data:
-                book_data = data[f"ISBN:{isbn}"]
-                authors = ", ".join([author['name'] for author in book_data.get('authors', [])])
-                cover_url = book_data.get('cover', {}).get('medium')  # or large, small
-                return {
-                    "title": book_data.get('title', 'N/A'),
-                    "author": authors if authors else "N/A",
-                    "cover_image": cover_url,
-                    # No library_id from external API
-                }
-            return None
-        except requests.exceptions.RequestException as e:
-            print(f"Error fetching from OpenLibrary: {e}")
+        return db.query(BookModel).filter(BookModel.isbn == isbn, BookModel.owner_id == owner_id).first()
+
+    @staticmethod
+    async def get_book_details_from_external(isbn: str, client: OpenLibraryClient, db: Optional[DbSession] = None) -> Optional[dict]:
+        """Fetches book details from OpenLibrary API, served from the ISBN cache when possible.
+
+        Raises UpstreamUnavailableError when OpenLibrary can't be reached and nothing is cached.
+        """
+        cache_key = normalize_isbn(isbn)
+        if not cache_key:
+            # Not an ISBN: nothing to look up, and nothing worth caching
             return None
+        # The in-process tier is checked on the event loop; the database tier needs a thread
+        cached = isbn_cache.get_memory(cache_key)
+        if cached is MISSING:
+            cached = await run_db(db, isbn_cache.get, cache_key)
+        if cached is not MISSING:
+            return cached
+        # Outages raise instead of returning None, so they are never cached as "not found"
+        details = await client.fetch_book_details(cache_key)
+        await run_db(db, isbn_cache.put, cache_key, details)
+        return details
+
+    @staticmethod
+    async def get_book_details_batch(isbns: List[str], client: OpenLibraryClient, db: Optional[DbSession] = None) -> Dict[str, Optional[dict]]:
+        """Resolve many ISBNs: dedupe, serve what the cache has, fetch the rest in multi-ISBN requests.
+
+        Returns details (or None for "not found") keyed by normalized ISBN, in request order.
+        ISBNs that couldn't be resolved because OpenLibrary is unavailable are left out.
+        """
+        keys = list(dict.fromkeys(normalize_isbn(isbn) for isbn in isbns if normalize_isbn(isbn)))
+        results = await run_db(db, isbn_cache.get_many, keys)
+        misses = [key for key in keys if key not in results]
+        if misses:
+            fetched = await client.fetch_many(misses)
+            await run_db(db, isbn_cache.put_many, fetched)
+            results.update(fetched)
+        return {key: results[key] for key in keys if key in results}
 
     @staticmethod
     def create_book(db: Session, book_data: BookCreate, owner_id: int) -> BookModel:
@@ -58,6 +181,7 @@ class BookService:
         db.add(db_book)
         db.commit()
         db.refresh(db_book)
+        BookService._publish(db_book, "created")
         return db_book
 
     @staticmethod
@@ -65,17 +189,60 @@ class BookService:
         db_book = BookService.get_book_by_id(db, book_id)
         if db_book:
             update_data = book_data.model_dump(exclude_unset=True)
+            if "cover_image" in update_data and update_data["cover_image"] != db_book.cover_image:
+                db_book.cover_hash = None  # the cached copy is of the old cover
             for key, value in update_data.items():
                 setattr(db_book, key, value)
             db.commit()
             db.refresh(db_book)
+            BookService._publish(db_book, "updated")
+        return db_book
+
+    @staticmethod
+    def set_cover_hash(db: Session, book_id: int, cover_image: str, cover_hash: str) -> Optional[BookModel]:
+        """Record the cached copy of a book's cover, unless the cover changed while it was downloading"""
+        db_book = BookService.get_book_by_id(db, book_id)
+        if db_book is None or db_book.cover_image != cover_image:
+            return None
+        db_book.cover_hash = cover_hash
+        db.commit()
+        db.refresh(db_book)
+        BookService._publish(db_book, "updated")
         return db_book
 
     @staticmethod
     def delete_book(db: Session, book_id: int) -> bool:
         db_book = BookService.get_book_by_id(db, book_id)
         if db_book:
+            # Same transaction, so syncing clients see the delete exactly when it happens
+            tombstone = Tombstone(entity="book", entity_id=db_book.id, owner_id=db_book.owner_id)
+            db.add(tombstone)
             db.delete(db_book)
+            db.flush()  # the revision comes back from the INSERT, before commit expires it
+            event = ChangeEvent(entity="book", action="deleted", id=tombstone.entity_id, owner_id=tombstone.owner_id,
+                                library_id=db_book.library_id, revision=tombstone.revision)
             db.commit()
+            event_broker.publish(event)
             return True
-        return False
\ No newline at end of file
+        return False
+
+    @staticmethod
+    def _publish(db_book: BookModel, action: str) -> None:
+        event_broker.publish(ChangeEvent(
+            entity="book", action=action, id=db_book.id, owner_id=db_book.owner_id,
+            library_id=db_book.library_id, revision=db_book.revision,
+        ))
+
+
+class AsyncBookService:
+    """BookService for async routes: the same queries, awaited on whichever session get_session provides"""
+    get_books = staticmethod(async_variant(BookService.get_books))
+    get_books_page = staticmethod(async_variant(BookService.get_books_page))
+    get_collection_version = staticmethod(async_variant(BookService.get_collection_version))
+    get_libraries_version = staticmethod(async_variant(BookService.get_libraries_version))
+    get_book_by_id = staticmethod(async_variant(BookService.get_book_by_id))
+    get_book_by_isbn_and_owner = staticmethod(async_variant(BookService.get_book_by_isbn_and_owner))
+    create_book = staticmethod(async_variant(BookService.create_book))
+    update_book = staticmethod(async_variant(BookService.update_book))
+    set_cover_hash = staticmethod(async_variant(BookService.set_cover_hash))
+    delete_book = staticmethod(async_variant(BookService.delete_book))
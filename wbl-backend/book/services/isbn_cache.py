@@ -0,0 +1,189 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from book.models.isbn_metadata_cache import IsbnMetadataCache
+from core.config_loader import settings
+from core.metrics import registry
+
+# Returned by get() when neither tier has a fresh entry. A cached miss is returned as None.
+MISSING = object()
+
+
+class IsbnLookupCache:
+    """Two-tier cache of OpenLibrary lookups: an in-process LRU backed by the isbn_metadata_cache table.
+
+    Values are the details dicts handed out by BookService ({"title", "author", "cover_image"})
+    or None for ISBNs OpenLibrary doesn't know. Keys are normalized ISBNs.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int, negative_ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self._entries: "OrderedDict[str, tuple[float, Optional[dict]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"memory_hits": 0, "db_hits": 0, "negative_hits": 0, "misses": 0, "stores": 0}
+
+    def _ttl(self, value: Optional[dict]) -> int:
+        return self.ttl_seconds if value is not None else self.negative_ttl_seconds
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def _remember(self, isbn: str, value: Optional[dict], expires_at: float) -> None:
+        with self._lock:
+            self._entries[isbn] = (expires_at, value)
+            self._entries.move_to_end(isbn)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_memory(self, isbn: str):
+        """Look in the in-process tier only, so callers on the event loop can skip the database"""
+        with self._lock:
+            entry = self._entries.get(isbn)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.time():
+                    self._entries.move_to_end(isbn)
+                    self._counters["memory_hits"] += 1
+                    if value is None:
+                        self._counters["negative_hits"] += 1
+                    return value
+                del self._entries[isbn]
+        return MISSING
+
+    def get(self, db: Optional[Session], isbn: str):
+        """Fresh cached details for an ISBN, None for a cached miss, or MISSING"""
+        value = self.get_memory(isbn)
+        if value is not MISSING:
+            return value
+        if db is not None:
+            value = self._get_db(db, isbn)
+            if value is not MISSING:
+                return value
+        self._count("misses")
+        return MISSING
+
+    def get_many(self, db: Optional[Session], isbns: List[str]) -> Dict[str, Optional[dict]]:
+        """Batch version of get(): one database query for whatever the process cache lacks.
+
+        Returns only the ISBNs with a fresh entry.
+        """
+        found: Dict[str, Optional[dict]] = {}
+        for isbn in isbns:
+            value = self.get_memory(isbn)
+            if value is not MISSING:
+                found[isbn] = value
+        remaining = [isbn for isbn in isbns if isbn not in found]
+        if remaining and db is not None:
+            try:
+                rows = db.query(IsbnMetadataCache).filter(IsbnMetadataCache.isbn.in_(remaining)).all()
+            except SQLAlchemyError:
+                db.rollback()
+                rows = []
+            for row in rows:
+                value = self._fresh_row_value(row)
+                if value is not MISSING:
+                    found[row.isbn] = value
+        for isbn in remaining:
+            if isbn not in found:
+                self._count("misses")
+        return found
+
+    def _get_db(self, db: Session, isbn: str):
+        try:
+            row = db.get(IsbnMetadataCache, isbn)
+        except SQLAlchemyError:
+            # The durable tier is an optimisation; never fail a lookup because of it
+            db.rollback()
+            return MISSING
+        if row is None:
+            return MISSING
+        return self._fresh_row_value(row)
+
+    def _fresh_row_value(self, row: IsbnMetadataCache):
+        fetched_at = row.fetched_at
+        if fetched_at.tzinfo is None:  # SQLite hands back naive datetimes
+            fetched_at = fetched_at.replace(tzinfo=timezone.utc)
+        value = _row_to_details(row)
+        expires_at = fetched_at + timedelta(seconds=self._ttl(value))
+        if expires_at <= datetime.now(timezone.utc):
+            return MISSING
+        self._remember(row.isbn, value, expires_at.timestamp())
+        self._count("db_hits")
+        if value is None:
+            self._count("negative_hits")
+        return value
+
+    def put(self, db: Optional[Session], isbn: str, value: Optional[dict]) -> None:
+        """Store a fresh lookup result (None for "OpenLibrary has no such ISBN") in both tiers"""
+        self.put_many(db, {isbn: value})
+
+    def put_many(self, db: Optional[Session], results: Dict[str, Optional[dict]]) -> None:
+        """Store several lookup results in both tiers with a single commit"""
+        fetched_at = datetime.now(timezone.utc)
+        for isbn, value in results.items():
+            self._remember(isbn, value, fetched_at.timestamp() + self._ttl(value))
+            self._count("stores")
+        if db is None or not results:
+            return
+        try:
+            # Replace stale rows with one DELETE and one batched INSERT instead of a merge per ISBN
+            db.query(IsbnMetadataCache).filter(IsbnMetadataCache.isbn.in_(list(results))).delete()
+            db.add_all([
+                IsbnMetadataCache(
+                    isbn=isbn,
+                    found=value is not None,
+                    title=value["title"] if value else None,
+                    authors=value["author"] if value else None,
+                    cover_url=value["cover_image"] if value else None,
+                    fetched_at=fetched_at,
+                )
+                for isbn, value in results.items()
+            ])
+            db.commit()
+        except SQLAlchemyError:
+            # Most likely a concurrent request stored the same ISBN first
+            db.rollback()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._counters, "memory_entries": len(self._entries)}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            for name in self._counters:
+                self._counters[name] = 0
+
+
+def _row_to_details(row: IsbnMetadataCache) -> Optional[dict]:
+    if not row.found:
+        return None
+    return {"title": row.title, "author": row.authors, "cover_image": row.cover_url}
+
+
+isbn_cache = IsbnLookupCache(
+    max_entries=settings.ISBN_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.ISBN_CACHE_TTL_SECONDS,
+    negative_ttl_seconds=settings.ISBN_CACHE_NEGATIVE_TTL_SECONDS,
+)
+
+
+def _collect_isbn_cache():
+    stats = isbn_cache.stats()
+    entries = stats.pop("memory_entries")
+    yield "isbn_cache_lookups_total", "counter", "ISBN metadata lookups by where they were answered", [
+        ({"result": name}, value) for name, value in stats.items()
+    ]
+    yield "isbn_cache_memory_entries", "gauge", "ISBNs held in the in-process LRU", [({}, entries)]
+
+
+registry.add_collector(_collect_isbn_cache)
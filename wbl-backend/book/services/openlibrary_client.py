@@ -0,0 +1,71 @@
+import asyncio
+from typing import Dict, List, Optional
+
+from fastapi import Depends
+
+from core.config_loader import settings
+from core.http_client import ResilientHttpClient, UpstreamUnavailableError, get_http_client
+
+
+class OpenLibraryClient:
+    """Book metadata lookups against the OpenLibrary books API over the shared HTTP pool"""
+
+    # bibkeys per request when resolving many ISBNs; keeps URLs well under common length limits
+    BATCH_SIZE = 50
+
+    def __init__(self, http_client: ResilientHttpClient, base_url: str = settings.OPENLIBRARY_BASE_URL):
+        self.http_client = http_client
+        self.base_url = base_url.rstrip("/")
+
+    async def fetch_book_details(self, isbn: str) -> Optional[dict]:
+        """Details for one ISBN, or None when OpenLibrary doesn't know it.
+
+        Raises UpstreamUnavailableError when OpenLibrary can't be reached.
+        """
+        return (await self._fetch_bibkeys([isbn]))[isbn]
+
+    async def fetch_many(self, isbns: List[str]) -> Dict[str, Optional[dict]]:
+        """Details for many ISBNs using multi-bibkey requests, BATCH_SIZE ISBNs per round trip.
+
+        Chunks are fetched concurrently (within the per-host limit). ISBNs whose chunk failed
+        are left out of the result rather than failing the whole batch.
+        """
+        chunks = [isbns[i:i + self.BATCH_SIZE] for i in range(0, len(isbns), self.BATCH_SIZE)]
+        results = await asyncio.gather(*(self._fetch_bibkeys(chunk) for chunk in chunks), return_exceptions=True)
+        details: Dict[str, Optional[dict]] = {}
+        for result in results:
+            if isinstance(result, UpstreamUnavailableError):
+                continue
+            if isinstance(result, BaseException):
+                raise result
+            details.update(result)
+        return details
+
+    async def _fetch_bibkeys(self, isbns: List[str]) -> Dict[str, Optional[dict]]:
+        response = await self.http_client.get(
+            f"{self.base_url}/api/books",
+            params={"bibkeys": ",".join(f"ISBN:{isbn}" for isbn in isbns), "format": "json", "jscmd": "data"},
+        )
+        if response.status_code != 200:
+            raise UpstreamUnavailableError(f"OpenLibrary returned HTTP {response.status_code}")
+        data = response.json()
+        return {
+            isbn: parse_book_data(data[f"ISBN:{isbn}"]) if f"ISBN:{isbn}" in data else None
+            for isbn in isbns
+        }
+
+
+def parse_book_data(book_data: dict) -> dict:
+    """Reduce an OpenLibrary jscmd=data record to the fields we pre-fill a book with"""
+    authors = ", ".join([author['name'] for author in book_data.get('authors', [])])
+    cover_url = book_data.get('cover', {}).get('medium')  # or large, small
+    return {
+        "title": book_data.get('title', 'N/A'),
+        "author": authors if authors else "N/A",
+        "cover_image": cover_url,
+        # No library_id from external API
+    }
+
+
+def get_openlibrary_client(http_client: ResilientHttpClient = Depends(get_http_client)) -> OpenLibraryClient:
+    return OpenLibraryClient(http_client)
@@ -0,0 +1,16 @@
+import re
+
+_NON_ISBN_CHARS = re.compile(r"[^0-9X]")
+_ISBN_LIKE = re.compile(r"^[0-9Xx\- ]+$")
+
+
+def normalize_isbn(isbn: str) -> str:
+    """Strip hyphens/spaces so '978-0-14-103614-4' and '9780141036144' compare equal"""
+    return _NON_ISBN_CHARS.sub("", isbn.upper())
+
+
+def looks_like_isbn(value: str) -> bool:
+    """True for things a user types when searching by ISBN-10 or ISBN-13"""
+    if not _ISBN_LIKE.match(value.strip()):
+        return False
+    return len(normalize_isbn(value)) in (10, 13)
@@ -0,0 +1,194 @@
+import zlib
+from typing import Dict, Iterable, List, Optional
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # optional: "br" is only offered when it's installed
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional: "zstd" is only offered when it's installed
+    zstandard = None
+
+# A 1000-book page takes ~10ms at gzip level 6: bodies this big are compressed off the event loop
+THREADPOOL_MIN_SIZE = 64 * 1024
+
+
+class GzipEncoder:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31: gzip container
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class BrotliEncoder:
+    def __init__(self, level: int):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class ZstdEncoder:
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+def available_encoders() -> Dict[str, type]:
+    encoders = {"gzip": GzipEncoder}
+    if brotli is not None:
+        encoders["br"] = BrotliEncoder
+    if zstandard is not None:
+        encoders["zstd"] = ZstdEncoder
+    return encoders
+
+
+def parse_accept_encoding(value: str) -> Dict[str, float]:
+    """{coding: q} from an Accept-Encoding header; malformed q values count as 0"""
+    accepted = {}
+    for item in value.split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def negotiate(accept_encoding: str, preference: Iterable[str]) -> Optional[str]:
+    """Best coding the client accepts: highest q first, our preference order breaks ties"""
+    accepted = parse_accept_encoding(accept_encoding)
+    best, best_q = None, 0.0
+    for coding in preference:
+        q = accepted.get(coding, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+class CompressionMiddleware:
+    """Compresses responses with gzip, or brotli/zstd when installed and the client prefers them.
+
+    Only responses whose content type starts with one of `content_types` are touched; others
+    (images, already compressed downloads, Server-Sent Events) pass through as they are, as does
+    anything that already has a Content-Encoding. A single-body response smaller than
+    `minimum_size` isn't worth the CPU and goes out uncompressed. Streaming responses are
+    compressed chunk by chunk and flushed after each one, so clients still see data as it is produced.
+    """
+
+    def __init__(self, app: ASGIApp, encodings: List[str], minimum_size: int = 1024,
+                 content_types: Iterable[str] = ("application/json",), levels: Optional[Dict[str, int]] = None):
+        self.app = app
+        encoders = available_encoders()
+        self.encodings = [coding for coding in encodings if coding in encoders]
+        self.encoders = encoders
+        self.minimum_size = minimum_size
+        self.content_types = tuple(content_types)
+        self.levels = {"gzip": 6, "br": 4, "zstd": 3, **(levels or {})}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.encodings:
+            await self.app(scope, receive, send)
+            return
+        coding = negotiate(Headers(scope=scope).get("accept-encoding", ""), self.encodings)
+        responder = _CompressingResponder(self, coding)
+        await self.app(scope, receive, lambda message: responder.send(message, send))
+
+
+class _CompressingResponder:
+    def __init__(self, middleware: CompressionMiddleware, coding: Optional[str]):
+        self.middleware = middleware
+        self.coding = coding
+        self.start: Optional[Message] = None
+        self.encoder = None
+        self.passthrough = False
+
+    def _compress_all(self, body: bytes) -> bytes:
+        return self.encoder.compress(body) + self.encoder.finish()
+
+    def _compressible(self, headers: MutableHeaders) -> bool:
+        if "content-encoding" in headers:
+            return False
+        return headers.get("content-type", "").startswith(self.middleware.content_types)
+
+    async def send(self, message: Message, send: Send) -> None:
+        if message["type"] == "http.response.start":
+            # Held back until the first body chunk shows whether compressing is worth it
+            self.start = message
+            headers = MutableHeaders(raw=message["headers"])
+            if not self._compressible(headers):
+                self.passthrough = True
+            else:
+                # Caches must keep the variants apart even when this client got identity
+                headers.add_vary_header("Accept-Encoding")
+                self.passthrough = self.coding is None
+            if self.passthrough:
+                await send(message)
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.encoder is None:
+            if not more_body and len(body) < self.middleware.minimum_size:
+                self.passthrough = True
+                await send(self.start)
+                await send(message)
+                return
+            self.encoder = self.middleware.encoders[self.coding](self.middleware.levels[self.coding])
+            headers = MutableHeaders(raw=self.start["headers"])
+            headers["Content-Encoding"] = self.coding
+            if not more_body:
+                # The whole response in one message: compress it and send the real length
+                if len(body) >= THREADPOOL_MIN_SIZE:
+                    body = await run_in_threadpool(self._compress_all, body)
+                else:
+                    body = self._compress_all(body)
+                headers["Content-Length"] = str(len(body))
+                await send(self.start)
+                await send({"type": "http.response.body", "body": body, "more_body": False})
+                return
+            del headers["Content-Length"]
+            await send(self.start)
+
+        if more_body:
+            body = self.encoder.compress(body) + self.encoder.flush()
+        else:
+            body = self.encoder.compress(body) + self.encoder.finish()
+        await send({"type": "http.response.body", "body": body, "more_body": more_body})
@@ -0,0 +1,62 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Optional
+
+from fastapi import Request, Response
+
+# Clients may keep the listing but must check it with us before reusing it
+REVALIDATE = "private, no-cache"
+
+
+def collection_etag(*parts: Any) -> str:
+    """Weak validator for a collection, from whatever identifies its current version"""
+    digest = hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+
+def newest(*values: Optional[datetime]) -> Optional[datetime]:
+    """Latest of the given timestamps, ignoring Nones"""
+    present = [value for value in values if value is not None]
+    return max(present) if present else None
+
+
+def http_date(value: datetime) -> str:
+    if value.tzinfo is None:  # SQLite hands back naive datetimes
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    """RFC 9110 precedence: If-None-Match wins, If-Modified-Since is only used without it"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        # Weak comparison: W/"x" and "x" match
+        wanted = etag.removeprefix("W/")
+        return any(tag.strip().removeprefix("W/") == wanted for tag in if_none_match.split(","))
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if last_modified.tzinfo is None:
+            last_modified = last_modified.replace(tzinfo=timezone.utc)
+        # HTTP dates have one second resolution
+        return last_modified.replace(microsecond=0) <= since
+    return False
+
+
+def set_validators(response: Response, etag: str, last_modified: Optional[datetime]) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = REVALIDATE
+    if last_modified is not None:
+        response.headers["Last-Modified"] = http_date(last_modified)
+
+
+def not_modified(etag: str, last_modified: Optional[datetime]) -> Response:
+    response = Response(status_code=304)
+    set_validators(response, etag, last_modified)
+    return response
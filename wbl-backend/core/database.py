@@ -1,9 +1,199 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, DeclarativeBase
+import functools
+import os
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Union
+
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import URL, Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker, DeclarativeBase, Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from starlette.concurrency import run_in_threadpool
 from core.config_loader import settings
+from core.db_routing import ReadYourWrites, ReplicaSet, RoutingSession
+from core.metrics import registry
+
+# Upper bounds (seconds) of the checkout wait histogram
+POOL_WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+class PoolStats:
+    """Checkout wait, in-use and overflow numbers for one engine's pool, to size it from real data"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.wait_buckets = [0] * (len(POOL_WAIT_BUCKETS) + 1)  # last one is +Inf
+        self.in_use = 0
+        self.in_use_peak = 0
+        self.overflow_peak = 0
+        self.size = 0
+
+    def record_wait(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+                return
+            self.checkouts += 1
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+            index = next((i for i, bound in enumerate(POOL_WAIT_BUCKETS) if seconds <= bound), len(POOL_WAIT_BUCKETS))
+            self.wait_buckets[index] += 1
+
+    def record_usage(self, pool: QueuePool, returning: bool = False) -> None:
+        with self._lock:
+            self.size = pool.size()
+            # The checkin event fires before the connection is back in the queue
+            self.in_use = pool.checkedout() - (1 if returning else 0)
+            self.in_use_peak = max(self.in_use_peak, self.in_use)
+            self.overflow_peak = max(self.overflow_peak, max(pool.overflow(), 0))
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "pool_size": self.size,
+                "in_use": self.in_use,
+                "in_use_peak": self.in_use_peak,
+                "overflow_peak": self.overflow_peak,
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": self.wait_seconds_total,
+                "wait_seconds_max": self.wait_seconds_max,
+                "wait_buckets": dict(zip([*map(str, POOL_WAIT_BUCKETS), "+Inf"], self.wait_buckets)),
+            }
+
+
+class _TimedCheckoutMixin:
+    """Times every checkout, including waiting for a connection to be returned"""
+
+    stats: Optional[PoolStats] = None
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            if self.stats is not None:
+                self.stats.record_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        if self.stats is not None:
+            self.stats.record_wait(time.perf_counter() - start)
+        return connection
+
+    def recreate(self):
+        # engine.dispose() swaps in a fresh pool; keep counting into the same stats
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+class InstrumentedQueuePool(_TimedCheckoutMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+pool_stats: Dict[str, PoolStats] = {}
+
+
+def instrument_pool(sync_engine: Engine, name: str) -> PoolStats:
+    """Attach PoolStats to an engine built with one of the instrumented pool classes"""
+    stats = PoolStats(name)
+    sync_engine.pool.stats = stats
+
+    # Listeners live on the pool's dispatch, which survives recreate()
+    @event.listens_for(sync_engine.pool, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        stats.record_usage(sync_engine.pool)
+
+    @event.listens_for(sync_engine.pool, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        stats.record_usage(sync_engine.pool, returning=True)
+
+    pool_stats[name] = stats
+    return stats
+
+
+def _collect_pool_stats():
+    snapshots = {name: stats.snapshot() for name, stats in pool_stats.items()}
+
+    def samples(key):
+        return [({"pool": name}, snapshot[key]) for name, snapshot in snapshots.items()]
+
+    yield "db_pool_size", "gauge", "Configured connections per pool", samples("pool_size")
+    yield "db_pool_in_use", "gauge", "Connections checked out right now", samples("in_use")
+    yield "db_pool_in_use_peak", "gauge", "Most connections checked out at once", samples("in_use_peak")
+    yield "db_pool_overflow_peak", "gauge", "Most overflow connections open at once", samples("overflow_peak")
+    yield "db_pool_checkouts_total", "counter", "Connection checkouts", samples("checkouts")
+    yield "db_pool_timeouts_total", "counter", "Checkouts that gave up waiting for a connection", samples("timeouts")
+    yield "db_pool_checkout_wait_seconds_total", "counter", "Time spent waiting for a connection", samples("wait_seconds_total")
+    yield "db_pool_checkout_wait_seconds_max", "gauge", "Longest wait for a connection", samples("wait_seconds_max")
+
+
+registry.add_collector(_collect_pool_stats)
+
+
+def _engine_options() -> Dict[str, Any]:
+    options: Dict[str, Any] = dict(
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+        pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
+    if settings.DB_STATEMENT_TIMEOUT_MS:
+        # Enforced by the server, so a stuck query is cancelled instead of holding a connection forever.
+        # Both psycopg2 and psycopg 3 pass `options` through to libpq.
+        options["connect_args"] = {"options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"}
+    return options
+
+
+def _replica_url(dsn: str, drivername: str) -> URL:
+    return make_url(dsn).set(drivername=drivername)
+
+
+engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI), poolclass=InstrumentedQueuePool, **_engine_options())
+instrument_pool(engine, "sync")
+
+read_your_writes = ReadYourWrites(settings.DB_READ_YOUR_WRITES_SECONDS)
+replica_engines = [
+    create_engine(_replica_url(dsn, "postgresql+psycopg2"), poolclass=InstrumentedQueuePool, **_engine_options())
+    for dsn in settings.DATABASE_REPLICA_URLS
+]
+for index, replica_engine in enumerate(replica_engines):
+    instrument_pool(replica_engine, f"replica{index}")
+replicas = ReplicaSet(replica_engines, settings.DB_REPLICA_BALANCING) if replica_engines else None
+
+
+def _reset_pools_after_fork() -> None:
+    # Pooled connections are sockets: a child forked after the parent connected (a server that
+    # imports the app before forking workers) must open its own. close=False leaves the parent's alone.
+    for pool_engine in (engine, *replica_engines):
+        pool_engine.dispose(close=False)
+    if _async_engine is not None:
+        _async_engine.sync_engine.dispose(close=False)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_pools_after_fork)
+
+SessionLocal = sessionmaker(
+    class_=RoutingSession, autocommit=False, autoflush=False, bind=engine,
+    replicas=replicas, read_your_writes=read_your_writes,
+)
+
+_async_engine: Optional[AsyncEngine] = None
+_async_replicas: Optional[ReplicaSet] = None
+_async_session_factory: Optional[async_sessionmaker] = None
 
-engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI))
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 class Base(DeclarativeBase):
     pass
@@ -16,3 +206,103 @@ def get_db():
     finally:
         db.close()
 
+
+def get_read_db():
+    """get_db for read-only endpoints: queries may be served by a replica"""
+    db = SessionLocal(read_only=True)
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def get_async_engine() -> AsyncEngine:
+    """psycopg 3 async engine, created on first use so sync deployments never build it"""
+    global _async_engine, _async_replicas
+    if _async_engine is None:
+        _async_engine = create_async_engine(
+            str(settings.SQLALCHEMY_ASYNC_DATABASE_URI), poolclass=InstrumentedAsyncQueuePool, **_engine_options()
+        )
+        instrument_pool(_async_engine.sync_engine, "async")
+        async_replica_engines = []
+        for index, dsn in enumerate(settings.DATABASE_REPLICA_URLS):
+            replica = create_async_engine(
+                _replica_url(dsn, "postgresql+psycopg"), poolclass=InstrumentedAsyncQueuePool, **_engine_options()
+            )
+            instrument_pool(replica.sync_engine, f"async_replica{index}")
+            # RoutingSession picks among the sync facades, which AsyncSession drives through the async driver
+            async_replica_engines.append(replica.sync_engine)
+        if async_replica_engines:
+            _async_replicas = ReplicaSet(async_replica_engines, settings.DB_REPLICA_BALANCING)
+    return _async_engine
+
+
+def AsyncSessionLocal(**kwargs) -> AsyncSession:
+    global _async_session_factory
+    if _async_session_factory is None:
+        # Objects are serialized after commit, outside any greenlet, so they must not expire
+        _async_session_factory = async_sessionmaker(
+            get_async_engine(), autoflush=False, expire_on_commit=False,
+            sync_session_class=RoutingSession, replicas=_async_replicas, read_your_writes=read_your_writes,
+        )
+    return _async_session_factory(**kwargs)
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_async_read_db():
+    async with AsyncSessionLocal(read_only=True) as db:
+        yield db
+
+
+# The session dependency routes use: DATABASE_MODE picks the sync or async engine.
+# In sync mode this *is* get_db, so dependency overrides of get_db keep working.
+get_session = get_async_db if settings.DATABASE_MODE == "async" else get_db
+
+# For read-only endpoints. Without replicas it is simply get_session.
+if not settings.DATABASE_REPLICA_URLS:
+    get_read_session = get_session
+else:
+    get_read_session = get_async_read_db if settings.DATABASE_MODE == "async" else get_read_db
+
+DbSession = Union[Session, AsyncSession]
+
+
+async def run_db(db: DbSession, fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Await a sync `fn(session, ...)` without blocking the event loop.
+
+    With an AsyncSession it runs through run_sync, where every query is awaited on the async
+    driver; with a sync Session it runs in the threadpool, as sync routes always did.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(fn, db, *args, **kwargs)
+
+
+def async_variant(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """Async version of a service function taking the session as its first argument"""
+    @functools.wraps(fn)
+    async def wrapper(db: DbSession, *args, **kwargs):
+        return await run_db(db, fn, *args, **kwargs)
+    return wrapper
+
+
+@asynccontextmanager
+async def detached_session(db: DbSession) -> AsyncIterator[DbSession]:
+    """A new session on the same engine as a request's `db`, for background tasks.
+
+    The request's own session is closed by the time a background task runs. Going through
+    its engine (rather than SessionLocal) keeps tests' dependency overrides in effect.
+    """
+    if isinstance(db, AsyncSession):
+        async with AsyncSession(bind=db.bind, expire_on_commit=False) as session:
+            yield session
+        return
+    session = Session(bind=db.get_bind())
+    try:
+        yield session
+    finally:
+        await run_in_threadpool(session.close)
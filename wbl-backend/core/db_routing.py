@@ -0,0 +1,102 @@
+import itertools
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from sqlalchemy import Delete, Insert, Update, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+# Set by get_current_user, so sessions know whose writes they are committing
+current_user_id: ContextVar[Optional[int]] = ContextVar("current_user_id", default=None)
+
+
+class ReplicaSet:
+    """Read replicas plus the balancing policy used to pick one for a read-only session"""
+
+    def __init__(self, engines: List[Engine], balancing: str = "round_robin"):
+        if not engines:
+            raise ValueError("ReplicaSet needs at least one replica engine")
+        self.engines = engines
+        self.balancing = balancing
+        self._next = itertools.cycle(range(len(engines)))
+        self._lock = threading.Lock()
+
+    def pick(self) -> Engine:
+        if self.balancing == "least_connections":
+            # checkedout() counts connections this process currently has open on each replica
+            return min(self.engines, key=lambda engine: engine.pool.checkedout())
+        with self._lock:
+            return self.engines[next(self._next)]
+
+
+class ReadYourWrites:
+    """Remembers when each user last committed a write, so their reads can stay on the primary
+    until the replicas have caught up. Tracked per worker process."""
+
+    def __init__(self, window_seconds: float):
+        self.window_seconds = window_seconds
+        self._last_write: Dict[int, float] = {}
+        self._lock = threading.Lock()
+
+    def record_write(self, user_id: int) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._last_write[user_id] = now
+            if len(self._last_write) > 10_000:
+                # Drop users whose window has passed so the map doesn't grow forever
+                cutoff = now - self.window_seconds
+                self._last_write = {uid: at for uid, at in self._last_write.items() if at > cutoff}
+
+    def recently_wrote(self, user_id: Optional[int]) -> bool:
+        if user_id is None:
+            return False
+        with self._lock:
+            at = self._last_write.get(user_id)
+        return at is not None and time.monotonic() - at < self.window_seconds
+
+    def clear(self) -> None:
+        with self._lock:
+            self._last_write.clear()
+
+
+class RoutingSession(Session):
+    """Session that can send a read-only request's queries to a replica.
+
+    Only sessions opened with read_only=True (see get_read_session) ever use a replica; any
+    flush or INSERT/UPDATE/DELETE still goes to the primary. A user who committed a write in
+    the last few seconds reads from the primary so they always see their own changes.
+    Service code is unchanged: the choice happens in get_bind.
+    """
+
+    def __init__(self, *args, replicas: Optional[ReplicaSet] = None, read_your_writes: Optional[ReadYourWrites] = None,
+                 read_only: bool = False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.replicas = replicas
+        self.read_your_writes = read_your_writes
+        self.read_only = read_only
+        self._wrote = False
+        self._replica: Optional[Engine] = None
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        primary = super().get_bind(mapper=mapper, clause=clause, **kwargs)
+        if self._flushing or isinstance(clause, (Insert, Update, Delete)):
+            self._wrote = True
+            return primary
+        if not self.read_only or self.replicas is None or self._wrote:
+            return primary
+        if self.read_your_writes is not None and self.read_your_writes.recently_wrote(current_user_id.get()):
+            return primary
+        if self._replica is None:
+            # One replica per session, so a request sees a single consistent snapshot
+            self._replica = self.replicas.pick()
+        return self._replica
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _remember_user_write(session: RoutingSession) -> None:
+    if session._wrote and session.read_your_writes is not None:
+        user_id = current_user_id.get()
+        if user_id is not None:
+            session.read_your_writes.record_write(user_id)
@@ -0,0 +1,215 @@
+import asyncio
+import logging
+from typing import AsyncIterator, Callable, Literal, Optional, Set
+
+from pydantic import BaseModel
+
+from core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_CHANNEL = "wbl_changes"
+
+
+class ChangeEvent(BaseModel):
+    """A committed create/update/delete, small enough for a Postgres NOTIFY payload"""
+    entity: Literal["book", "library"]
+    action: Literal["created", "updated", "deleted", "imported"]
+    id: Optional[int] = None  # None for "imported", which covers a whole batch
+    owner_id: int
+    library_id: Optional[int] = None
+    # Own changes: fetch details with GET /api/sync?since=<revision - 1>. /api/sync only covers
+    # the caller's own libraries; for another user's library, re-fetch GET /api/libraries/all.
+    revision: Optional[int] = None
+
+
+class Subscription:
+    """One client's queue. If the client can't keep up the queue overflows and the
+    subscription is marked lagging; the client should resync and reconnect."""
+
+    def __init__(self, broker: "EventBroker", accepts: Callable[[ChangeEvent], bool], max_queued: int):
+        self._broker = broker
+        self.accepts = accepts
+        self.queue: "asyncio.Queue[ChangeEvent]" = asyncio.Queue(max_queued)
+        self.lagging = False
+
+    def offer(self, event: ChangeEvent) -> None:
+        if self.lagging or not self.accepts(event):
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.lagging = True
+
+    async def get(self, timeout: float) -> Optional[ChangeEvent]:
+        """Next event, or None after `timeout` seconds without one"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self) -> None:
+        self._broker.unsubscribe(self)
+
+
+class MemoryBackend:
+    """Delivers events within this process only; enough for a single worker"""
+
+    async def start(self, deliver: Callable[[ChangeEvent], None]) -> None:
+        self._deliver = deliver
+
+    async def publish(self, event: ChangeEvent) -> None:
+        self._deliver(event)
+
+    async def stop(self) -> None:
+        pass
+
+
+class PostgresNotifyBackend:
+    """Fans events out to every worker through LISTEN/NOTIFY.
+
+    Each worker keeps one listening connection; its own events also arrive that way, so
+    every subscriber sees the same stream whichever worker served the write.
+    """
+
+    def __init__(self, conninfo: str, reconnect_seconds: float = 2.0):
+        self.conninfo = conninfo
+        self.reconnect_seconds = reconnect_seconds
+        self._listener: Optional[asyncio.Task] = None
+        self._publisher = None
+        self._publish_lock = asyncio.Lock()
+
+    async def start(self, deliver: Callable[[ChangeEvent], None]) -> None:
+        self._deliver = deliver
+        self._listener = asyncio.create_task(self._listen())
+
+    async def _listen(self) -> None:
+        import psycopg
+
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(self.conninfo, autocommit=True) as connection:
+                    await connection.execute(f"LISTEN {NOTIFY_CHANNEL}")
+                    async for notify in connection.notifies():
+                        try:
+                            self._deliver(ChangeEvent.model_validate_json(notify.payload))
+                        except ValueError:
+                            logger.warning("Ignoring malformed change notification: %r", notify.payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Events sent while we reconnect are lost; clients catch up through /api/sync
+                logger.exception("Change feed listener lost its connection, reconnecting")
+                await asyncio.sleep(self.reconnect_seconds)
+
+    async def publish(self, event: ChangeEvent) -> None:
+        import psycopg
+
+        async with self._publish_lock:
+            try:
+                if self._publisher is None or self._publisher.closed:
+                    self._publisher = await psycopg.AsyncConnection.connect(self.conninfo, autocommit=True)
+                await self._publisher.execute("SELECT pg_notify(%s, %s)", (NOTIFY_CHANNEL, event.model_dump_json()))
+            except psycopg.Error:
+                logger.exception("Could not publish change event")
+                self._publisher = None
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+        if self._publisher is not None:
+            await self._publisher.close()
+
+
+class EventBroker:
+    """In-process pub/sub for change events with a pluggable transport.
+
+    publish() may be called from any thread (sync services run in the threadpool) and never
+    blocks: the event is handed to the event loop, which sends it through the backend.
+    Before start() and after stop(), publishing is a no-op, so scripts and the import CLI
+    can call services without a running app.
+    """
+
+    def __init__(self, max_queued: int = 1000):
+        self.max_queued = max_queued
+        self.backend = MemoryBackend()
+        self._subscriptions: Set[Subscription] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def start(self, backend=None) -> None:
+        if backend is not None:
+            self.backend = backend
+        self._loop = asyncio.get_running_loop()
+        await self.backend.start(self._deliver)
+
+    async def stop(self) -> None:
+        self._loop = None
+        await self.backend.stop()
+
+    def drain(self) -> None:
+        """End every open stream with a resync, so clients reconnect to another worker now
+        rather than holding up this one's shutdown. Safe to call from a signal handler."""
+        loop = self._loop
+        if loop is None:
+            return
+        try:
+            loop.call_soon_threadsafe(self._drain)
+        except RuntimeError:
+            pass  # the loop closed during shutdown
+
+    def _drain(self) -> None:
+        for subscription in list(self._subscriptions):
+            subscription.lagging = True
+            try:
+                subscription.queue.put_nowait(None)  # wakes a stream waiting for its next event
+            except asyncio.QueueFull:
+                pass
+
+    def publish(self, event: ChangeEvent) -> None:
+        loop = self._loop
+        if loop is None:
+            return
+        try:
+            loop.call_soon_threadsafe(lambda: loop.create_task(self.backend.publish(event)))
+        except RuntimeError:
+            pass  # the loop closed during shutdown
+
+    def subscribe(self, accepts: Callable[[ChangeEvent], bool]) -> Subscription:
+        subscription = Subscription(self, accepts, self.max_queued)
+        self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscriptions.discard(subscription)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscriptions)
+
+    def _deliver(self, event: ChangeEvent) -> None:
+        for subscription in list(self._subscriptions):
+            subscription.offer(event)
+
+    async def stream(self, accepts: Callable[[ChangeEvent], bool], keepalive_seconds: float) -> AsyncIterator[Optional[ChangeEvent]]:
+        """Yield events for one subscriber, or None every keepalive_seconds while idle.
+        Ends when the subscriber falls too far behind or the worker shuts down."""
+        subscription = self.subscribe(accepts)
+        try:
+            while not subscription.lagging or not subscription.queue.empty():
+                yield await subscription.get(keepalive_seconds)
+        finally:
+            subscription.close()
+
+
+event_broker = EventBroker()
+
+
+def _collect_subscribers():
+    yield "change_feed_subscribers", "gauge", "Open SSE/WebSocket change feed connections", [({}, event_broker.subscriber_count)]
+
+
+registry.add_collector(_collect_subscribers)
@@ -0,0 +1,176 @@
+import asyncio
+import random
+import time
+from typing import Dict, Optional
+
+import httpx
+from fastapi import Request
+
+from core.metrics import upstream_request_duration, upstream_requests
+
+# Statuses worth retrying: the upstream is overloaded or restarting
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class UpstreamUnavailableError(Exception):
+    """The upstream could not be reached, kept failing, or its circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """Stops calling a host after repeated failures, then lets a single trial call through after a cool-down"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self) -> Optional[str]:
+        """None when the call must not go out, otherwise the state it was let through in:
+        HALF_OPEN means this call is the trial, and only it may release the trial slot."""
+        state = self.state
+        if state == self.CLOSED:
+            return state
+        if state == self.HALF_OPEN and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return state
+        return None
+
+    def record_success(self, trial: bool = False) -> None:
+        self.failures = 0
+        self.opened_at = None
+        if trial:
+            self._trial_in_flight = False
+
+    def record_failure(self, trial: bool = False) -> None:
+        self.failures += 1
+        if trial:
+            self._trial_in_flight = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+    def release_trial(self) -> None:
+        """Let another trial through after one that ended without a verdict (cancelled, local error)"""
+        self._trial_in_flight = False
+
+
+class ResilientHttpClient:
+    """Shared keep-alive connection pool for outbound calls.
+
+    Each host gets its own concurrency limit and circuit breaker, so one slow upstream
+    can't use up the pool for the others. Failed calls are retried with jittered
+    exponential backoff.
+    """
+
+    def __init__(
+        self,
+        timeout_seconds: float,
+        max_connections: int,
+        max_concurrency_per_host: int,
+        max_retries: int,
+        retry_backoff_seconds: float,
+        breaker_failure_threshold: int,
+        breaker_reset_seconds: float,
+    ):
+        self.timeout_seconds = timeout_seconds
+        self.max_concurrency_per_host = max_concurrency_per_host
+        self.max_retries = max_retries
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self.breaker_failure_threshold = breaker_failure_threshold
+        self.breaker_reset_seconds = breaker_reset_seconds
+        self._client = httpx.AsyncClient(
+            timeout=httpx.Timeout(timeout_seconds, connect=min(timeout_seconds, 3.0)),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            follow_redirects=True,
+        )
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self.breakers: Dict[str, CircuitBreaker] = {}
+
+    def breaker_for(self, host: str) -> CircuitBreaker:
+        if host not in self.breakers:
+            self.breakers[host] = CircuitBreaker(self.breaker_failure_threshold, self.breaker_reset_seconds)
+        return self.breakers[host]
+
+    def _semaphore_for(self, host: str) -> asyncio.Semaphore:
+        if host not in self._semaphores:
+            self._semaphores[host] = asyncio.Semaphore(self.max_concurrency_per_host)
+        return self._semaphores[host]
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        """GET with retries. Returns any non-retryable response, raises UpstreamUnavailableError otherwise."""
+        host = httpx.URL(url).host
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            response = await self._get(host, url, **kwargs)
+            outcome = f"{response.status_code // 100}xx"
+            return response
+        finally:
+            upstream_requests.inc((host, outcome))
+            upstream_request_duration.observe((host,), time.perf_counter() - start)
+
+    async def _get(self, host: str, url: str, **kwargs) -> httpx.Response:
+        breaker = self.breaker_for(host)
+        admitted = breaker.allow()
+        if admitted is None:
+            raise UpstreamUnavailableError(f"Circuit open for {host}")
+        # Calls let through while closed may finish during a later trial; they must not touch its slot
+        trial = admitted == CircuitBreaker.HALF_OPEN
+
+        try:
+            semaphore = self._semaphore_for(host)
+            try:
+                await asyncio.wait_for(semaphore.acquire(), timeout=self.timeout_seconds)
+            except asyncio.TimeoutError:
+                # Our own queue is full; says nothing about the upstream's health
+                raise UpstreamUnavailableError(f"Too many requests in flight to {host}")
+            try:
+                response = await self._get_with_retries(url, **kwargs)
+            except UpstreamUnavailableError:
+                breaker.record_failure(trial)
+                raise
+            finally:
+                semaphore.release()
+            breaker.record_success(trial)
+            return response
+        finally:
+            if trial:
+                # Cancellation or an unexpected error must not leave a half-open breaker waiting forever
+                breaker.release_trial()
+
+    async def _get_with_retries(self, url: str, **kwargs) -> httpx.Response:
+        last_error: Optional[str] = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                # Full jitter keeps retries from many requests from arriving in lockstep
+                await asyncio.sleep(random.uniform(0, self.retry_backoff_seconds * 2 ** (attempt - 1)))
+            try:
+                response = await self._client.get(url, **kwargs)
+            except httpx.TransportError as e:
+                last_error = repr(e)
+                continue
+            if response.status_code not in RETRY_STATUSES:
+                return response
+            last_error = f"HTTP {response.status_code}"
+        raise UpstreamUnavailableError(f"GET {url} failed: {last_error}")
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+def get_http_client(request: Request) -> ResilientHttpClient:
+    """Dependency for the client created by the app lifespan in main.py"""
+    return request.app.state.http_client
@@ -0,0 +1,274 @@
+import bisect
+import math
+import threading
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+LabelValues = Tuple[str, ...]
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, labels: LabelValues = (), amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, labels: LabelValues = ()) -> float:
+        return self._values.get(labels, 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}" for labels, value in values]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, labels: LabelValues = (), amount: float = 1.0) -> None:
+        self.inc(labels, -amount)
+
+    def set(self, labels: LabelValues, value: float) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts (last is +Inf), sum]
+        self._values: Dict[LabelValues, list] = {}
+
+    def observe(self, labels: LabelValues, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def count(self, labels: LabelValues = ()) -> int:
+        entry = self._values.get(labels)
+        return sum(entry[0]) if entry else 0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = [(labels, list(counts), total) for labels, (counts, total) in self._values.items()]
+        lines = []
+        for labels, counts, total in values:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                bucket_labels = _format_labels((*self.labelnames, "le"), (*labels, _format_value(bound)))
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(total)}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+# A collector returns (name, type, help, [(labels dict, value), ...]) for numbers read at scrape time
+Collector = Callable[[], Iterable[Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]]]
+
+
+class MetricsRegistry:
+    """Metrics of this worker process, rendered in the Prometheus text format (0.0.4).
+
+    Updates are a dict lookup and an add under a per-metric lock, cheap enough to leave on.
+    With several workers, each exposes its own numbers; scrape every worker or aggregate.
+    """
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Collector] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Collector) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines += metric.header()
+            lines += metric.render()
+        for collector in self._collectors:
+            for name, kind, documentation, samples in collector():
+                lines += [f"# HELP {name} {documentation}", f"# TYPE {name} {kind}"]
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(list(labels), list(labels.values()))} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def clear(self) -> None:
+        for metric in self._metrics:
+            metric.clear()
+
+
+registry = MetricsRegistry()
+
+http_requests = registry.register(Counter(
+    "http_requests_total", "HTTP requests by route template and status", ("method", "route", "status")))
+http_request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "Time to the last response byte", ("method", "route")))
+http_requests_in_progress = registry.register(Gauge(
+    "http_requests_in_progress", "Requests being served right now", ("method",)))
+http_response_size = registry.register(Histogram(
+    "http_response_size_bytes", "Response body size as sent (after compression)", ("method", "route"), SIZE_BUCKETS))
+db_queries_per_request = registry.register(Histogram(
+    "db_queries_per_request", "SQL statements issued while serving one request", ("method", "route"), QUERY_COUNT_BUCKETS))
+db_time_per_request = registry.register(Histogram(
+    "db_query_seconds_per_request", "Time spent in SQL statements while serving one request", ("method", "route")))
+db_query_duration = registry.register(Histogram(
+    "db_query_duration_seconds", "Duration of each SQL statement"))
+upstream_requests = registry.register(Counter(
+    "upstream_requests_total", "Outbound HTTP calls (OpenLibrary, covers) by host and outcome", ("host", "outcome")))
+upstream_request_duration = registry.register(Histogram(
+    "upstream_request_duration_seconds", "Outbound HTTP call latency including retries", ("host",)))
+
+
+class RequestStats:
+    __slots__ = ("queries", "query_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.query_seconds = 0.0
+
+
+# The request being served, so SQL statements can be charged to it. Context variables follow the
+# request into the threadpool and into AsyncSession's greenlets.
+current_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("current_request_stats", default=None)
+
+
+def instrument_sql() -> None:
+    """Time every statement on every engine, including ones created later (replicas, tests)"""
+    if event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("query_start")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    db_query_duration.observe((), elapsed)
+    stats = current_request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.query_seconds += elapsed
+
+
+def _route_template(scope: Scope) -> str:
+    # The matched route's path template keeps label cardinality bounded: /api/books/{book_id}
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    return path if path is not None else "unmatched"
+
+
+class MetricsMiddleware:
+    """Records request count, latency, in-flight requests, response size and SQL per request"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        method = scope["method"]
+        stats = RequestStats()
+        token = current_request_stats.set(stats)
+        status = 500
+        size = 0
+
+        end = None
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status, size, end
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+                if not message.get("more_body", False):
+                    end = time.perf_counter()  # background tasks run after this and aren't counted
+            await send(message)
+
+        http_requests_in_progress.inc((method,))
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = (end or time.perf_counter()) - start
+            http_requests_in_progress.dec((method,))
+            current_request_stats.reset(token)
+            route = _route_template(scope)
+            labels = (method, route)
+            http_requests.inc((method, route, str(status)))
+            http_request_duration.observe(labels, elapsed)
+            http_response_size.observe(labels, size)
+            db_queries_per_request.observe(labels, stats.queries)
+            db_time_per_request.observe(labels, stats.query_seconds)
@@ -0,0 +1,29 @@
+import base64
+import json
+from typing import Any, Tuple
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+def encode_cursor(*key: Any) -> str:
+    """Pack a sort key into an opaque, URL-safe token"""
+    raw = json.dumps(list(key), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, *types: type) -> Tuple[Any, ...]:
+    """Unpack a token produced by encode_cursor, checking it holds one value of each of `types`"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError) as e:
+        raise InvalidCursorError("Malformed cursor") from e
+    if not isinstance(key, list) or len(key) != len(types):
+        raise InvalidCursorError("Malformed cursor")
+    for value, expected in zip(key, types):
+        # JSON has one number type: a float may come back as an int. bool is an int to Python, not to us.
+        if isinstance(value, bool) or not isinstance(value, (int, float) if expected is float else expected):
+            raise InvalidCursorError("Malformed cursor")
+    return tuple(key)
@@ -0,0 +1,258 @@
+import asyncio
+import contextvars
+import itertools
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime, timezone
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core.config_loader import settings
+
+PROFILE_HEADER = "x-profile"
+MAX_STACK_DEPTH = 64
+MAX_EXPLAINED_STATEMENTS = 10
+# Frames of a thread waiting for work rather than doing any (idle threadpool workers, selectors)
+IDLE_MODULES = ("threading.py", "queue.py", "selectors.py")
+
+
+class ProfileCapture:
+    """One profiled request: its SQL, the sampled stacks and, once finished, the summary"""
+
+    def __init__(self, capture_id: int, scope: Scope, reason: str):
+        self.id = capture_id
+        self.reason = reason
+        self.method = scope["method"]
+        self.path = scope["path"]
+        self.query = scope.get("query_string", b"").decode("latin-1")
+        self.started_at = datetime.now(timezone.utc)
+        self.status: Optional[int] = None
+        self.duration: float = 0.0
+        self.statements: List[Dict[str, Any]] = []
+        self.stacks: Counter = Counter()
+        self.samples = 0
+
+    def record_statement(self, engine: Engine, statement: str, parameters: Any, seconds: float) -> None:
+        self.statements.append({"engine": engine, "statement": statement, "parameters": parameters, "seconds": seconds})
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "reason": self.reason,
+            "method": self.method,
+            "path": self.path,
+            "query": self.query,
+            "status": self.status,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": round(self.duration * 1000, 3),
+            "sql_count": len(self.statements),
+            "sql_ms": round(sum(s["seconds"] for s in self.statements) * 1000, 3),
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        self_time: Counter = Counter()
+        for stack, count in self.stacks.items():
+            self_time[stack.rsplit(";", 1)[-1]] += count
+        return {
+            **self.summary(),
+            "sql": [{
+                "statement": s["statement"],
+                "parameters": repr(s["parameters"])[:500],
+                "duration_ms": round(s["seconds"] * 1000, 3),
+                "plan": s.get("plan"),
+            } for s in self.statements],
+            "profile": {
+                "samples": self.samples,
+                # Flame graph tools read this "folded" format: root;...;leaf -> samples
+                "folded": dict(self.stacks.most_common()),
+                "top_self": [{"frame": frame, "samples": count} for frame, count in self_time.most_common(20)],
+            },
+        }
+
+
+current_capture: contextvars.ContextVar[Optional[ProfileCapture]] = contextvars.ContextVar("current_capture", default=None)
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_filename.rsplit('/', 1)[-1]}:{code.co_name}:{frame.f_lineno}"
+
+
+def _fold(frame) -> Optional[str]:
+    names = []
+    while frame is not None and len(names) < MAX_STACK_DEPTH:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    if not names or names[0].split(":", 1)[0] in IDLE_MODULES:
+        return None
+    return ";".join(reversed(names))
+
+
+class StackSampler(threading.Thread):
+    """Samples stacks every `interval` seconds while a profiled request runs.
+
+    On the event loop thread only samples taken while the request's own task is running count;
+    other threads are sampled when busy (threadpool work for this or, under load, other requests).
+    """
+
+    def __init__(self, capture: ProfileCapture, loop_thread: int, loop: asyncio.AbstractEventLoop, task: Optional[asyncio.Task], interval: float):
+        super().__init__(name=f"profile-sampler-{capture.id}", daemon=True)
+        self.capture = capture
+        self.loop_thread = loop_thread
+        self.loop = loop
+        self.task = task
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        me = threading.get_ident()
+        while not self._stop_event.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == me:
+                    continue
+                if thread_id == self.loop_thread and asyncio.current_task(self.loop) is not self.task:
+                    continue
+                folded = _fold(frame)
+                if folded is not None:
+                    self.capture.stacks[folded] += 1
+                    self.capture.samples += 1
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_capture.get() is not None:
+        conn.info.setdefault("profile_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    capture = current_capture.get()
+    starts = conn.info.get("profile_start")
+    if capture is None or not starts:
+        return
+    capture.record_statement(conn.engine, statement, parameters, time.perf_counter() - starts.pop())
+
+
+def _explain(engine: Engine, statement: str, parameters: Any) -> List[str]:
+    prefix = "EXPLAIN QUERY PLAN " if engine.dialect.name == "sqlite" else "EXPLAIN "
+    with engine.connect() as connection:
+        rows = connection.exec_driver_sql(prefix + statement, parameters).all()
+    return [" | ".join(str(value) for value in row) for row in rows]
+
+
+def explain_statements(capture: ProfileCapture) -> None:
+    """Attach plans to the slowest SELECTs. EXPLAIN without ANALYZE: nothing is run again."""
+    slowest = sorted(capture.statements, key=lambda s: s["seconds"], reverse=True)
+    explained = 0
+    for statement in slowest:
+        if explained >= MAX_EXPLAINED_STATEMENTS:
+            break
+        if not statement["statement"].lstrip().upper().startswith(("SELECT", "WITH")):
+            continue
+        engine = statement["engine"]
+        if engine.dialect.is_async:
+            statement["plan"] = ["not available for the async engine"]
+            continue
+        try:
+            statement["plan"] = _explain(engine, statement["statement"], statement["parameters"])
+        except Exception as e:
+            statement["plan"] = [f"EXPLAIN failed: {e.__class__.__name__}"]
+        explained += 1
+
+
+class ProfileStore:
+    """Most recent captures, oldest dropped first"""
+
+    def __init__(self, max_captures: int):
+        self._captures: Deque[ProfileCapture] = deque(maxlen=max_captures)
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def next_id(self) -> int:
+        return next(self._ids)
+
+    def add(self, capture: ProfileCapture) -> None:
+        with self._lock:
+            self._captures.append(capture)
+
+    def list(self) -> List[ProfileCapture]:
+        with self._lock:
+            return list(reversed(self._captures))
+
+    def get(self, capture_id: int) -> Optional[ProfileCapture]:
+        with self._lock:
+            return next((capture for capture in self._captures if capture.id == capture_id), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._captures.clear()
+
+
+profile_store = ProfileStore(max_captures=settings.PROFILING_MAX_CAPTURES)
+
+
+class ProfilingMiddleware:
+    """Profiles a request when an admin asks for it (X-Profile header) or a sampled fraction of traffic.
+
+    Header requests are kept when the authenticated user turns out to be a superuser; their
+    response carries X-Profile-Id. Sampled requests are kept only when slower than
+    `slow_seconds`, with EXPLAIN plans for their slowest queries. Only installed when
+    PROFILING_ENABLED, so it costs nothing otherwise.
+    """
+
+    def __init__(self, app: ASGIApp, is_admin: Callable[[], bool], sample_rate: float = 0.0,
+                 slow_seconds: float = 1.0, interval_seconds: float = 0.005, store: ProfileStore = profile_store):
+        self.app = app
+        self.is_admin = is_admin
+        self.sample_rate = sample_rate
+        self.slow_seconds = slow_seconds
+        self.interval_seconds = interval_seconds
+        self.store = store
+        if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+            event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+            event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        requested = PROFILE_HEADER in Headers(scope=scope)
+        sampled = not requested and self.sample_rate > 0 and random.random() < self.sample_rate
+        if not (requested or sampled):
+            await self.app(scope, receive, send)
+            return
+
+        capture = ProfileCapture(self.store.next_id(), scope, "requested" if requested else "sampled")
+        sampler = StackSampler(capture, threading.get_ident(), asyncio.get_running_loop(), asyncio.current_task(), self.interval_seconds)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                capture.status = message["status"]
+                if requested and self.is_admin():
+                    MutableHeaders(scope=message)["X-Profile-Id"] = str(capture.id)
+            await send(message)
+
+        token = current_capture.set(capture)
+        sampler.start()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            capture.duration = time.perf_counter() - start
+            sampler.stop()
+            current_capture.reset(token)
+            keep = self.is_admin() if requested else capture.duration >= self.slow_seconds
+            if keep:
+                # After the response went out; a fresh context keeps EXPLAIN out of this request's metrics
+                await run_in_threadpool(contextvars.Context().run, explain_statements, capture)
+                self.store.add(capture)
@@ -0,0 +1,22 @@
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # optional: without it responses use the stdlib encoder
+    orjson = None
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse encoded with orjson when it's installed.
+
+    The app's default response class. Output matches JSONResponse (compact, UTF-8), it's just
+    several times faster on large lists. Routes can also return one directly with plain
+    dicts/rows to skip response_model validation for data that came straight from the database.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if orjson is None:
+            return super().render(content)
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
@@ -0,0 +1,31 @@
+from sqlalchemy import BigInteger, Sequence
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+from core.database import Base
+
+# One sequence shared by every synced table, so a single number orders all changes
+REVISION_SEQUENCE = Sequence("change_revision_seq", metadata=Base.metadata)
+
+
+class next_revision(FunctionElement):
+    """SQL for the next change revision, evaluated inside the INSERT/UPDATE itself"""
+    type = BigInteger()
+    inherit_cache = True
+
+
+@compiles(next_revision, "postgresql")
+def _next_revision_postgresql(element, compiler, **kw):
+    return f"nextval('{REVISION_SEQUENCE.name}')"
+
+
+@compiles(next_revision)
+def _next_revision_fallback(element, compiler, **kw):
+    # Databases without sequences (SQLite in tests and local runs) have a single writer,
+    # so one past the highest revision in use is monotonic there
+    return (
+        "(SELECT coalesce(max(revision), 0) + 1 FROM ("
+        "SELECT max(revision) AS revision FROM books "
+        "UNION ALL SELECT max(revision) FROM libraries "
+        "UNION ALL SELECT max(revision) FROM sync_tombstones))"
+    )
@@ -0,0 +1,88 @@
+import logging
+import os
+import random
+from typing import Any, Dict, Optional
+
+import uvicorn
+from uvicorn.supervisors import ChangeReload, Multiprocess
+
+from core.config_loader import settings
+
+logger = logging.getLogger("uvicorn.error")
+
+
+class WorkerServer(uvicorn.Server):
+    """uvicorn's server with per-worker max-requests jitter and change feed draining.
+
+    Each worker recycles after SERVER_MAX_REQUESTS plus a random share of the jitter, so the
+    workers don't all restart at once. On SIGTERM/SIGINT open change feed streams are told to
+    reconnect straight away; otherwise they would hold the graceful drain until its timeout.
+    """
+
+    def __init__(self, config: uvicorn.Config, max_requests_jitter: int = 0):
+        super().__init__(config)
+        self.max_requests_jitter = max_requests_jitter
+
+    def run(self, sockets=None) -> None:
+        # Runs in the worker process: the jitter is drawn per worker
+        if self.config.limit_max_requests and self.max_requests_jitter:
+            self.config.limit_max_requests += random.randint(0, self.max_requests_jitter)
+        super().run(sockets=sockets)
+
+    def handle_exit(self, sig, frame) -> None:
+        from core.events import event_broker
+
+        event_broker.drain()
+        super().handle_exit(sig, frame)
+
+
+def server_profile() -> str:
+    if settings.SERVER_PROFILE is not None:
+        return settings.SERVER_PROFILE
+    return "development" if settings.ENVIRONMENT == "local" else "production"
+
+
+def build_config(app: str = "main:app", **overrides: Any) -> uvicorn.Config:
+    options: Dict[str, Any] = dict(
+        host=settings.SERVER_HOST,
+        port=settings.SERVER_PORT,
+        # uvloop and httptools when installed, asyncio and h11 otherwise
+        loop="auto",
+        http="auto",
+        timeout_graceful_shutdown=settings.SERVER_GRACEFUL_TIMEOUT_SECONDS,
+        timeout_keep_alive=settings.SERVER_KEEPALIVE_SECONDS,
+        proxy_headers=True,
+        forwarded_allow_ips=settings.SERVER_FORWARDED_ALLOW_IPS,
+    )
+    if server_profile() == "development":
+        options.update(reload=True, workers=1)
+    else:
+        options.update(
+            workers=settings.WEB_CONCURRENCY or os.cpu_count() or 1,
+            limit_max_requests=settings.SERVER_MAX_REQUESTS or None,
+        )
+    options.update(overrides)
+    return uvicorn.Config(app, **options)
+
+
+def serve(config: Optional[uvicorn.Config] = None) -> None:
+    """Run the app like `uvicorn` does: a reloader, a supervisor with N workers, or one process.
+
+    Workers are spawned, not forked, so each builds its own engines, connection pools and HTTP
+    client on start-up. The supervisor restarts workers that exit (after max requests or a
+    crash), SIGTERM drains every worker, SIGHUP restarts them one by one and SIGTTIN/SIGTTOU
+    add or remove one.
+    """
+    config = config or build_config()
+    server = WorkerServer(config, max_requests_jitter=settings.SERVER_MAX_REQUESTS_JITTER)
+    if config.workers > 1 and settings.EVENTS_BACKEND == "memory" and not config.should_reload:
+        logger.warning("EVENTS_BACKEND=memory with %d workers: change feed clients only see changes "
+                       "made through their own worker. Use EVENTS_BACKEND=postgres.", config.workers)
+    if config.should_reload:
+        sock = config.bind_socket()
+        ChangeReload(config, target=server.run, sockets=[sock]).run()
+    elif config.workers > 1:
+        sock = config.bind_socket()
+        Multiprocess(config, target=server.run, sockets=[sock]).run()
+    else:
+        server.run()
@@ -0,0 +1 @@
+# Cover package init
@@ -0,0 +1,28 @@
+from typing import Literal
+
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import FileResponse
+
+from core.conditional import is_not_modified
+from cover.services.cover_store import cover_store
+
+router = APIRouter(prefix="/covers", tags=["covers"])
+
+# The URL names the exact bytes, so browsers and CDNs may keep it forever without revalidating
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+@router.get("/{cover_hash}/{size}", response_class=FileResponse)
+def get_cover(cover_hash: str, size: Literal["small", "medium", "large", "original"], request: Request):
+    """A cached book cover (see `cover_hash` on books). Thumbnails are JPEGs; without the imaging
+       library installed every size is the original image. Public, so it works in <img> tags.
+       Supports Range requests; the file is sent with sendfile where the server supports it.
+    """
+    stored = cover_store.open(cover_hash, size)
+    if stored is None:
+        raise HTTPException(status_code=404, detail="Cover not found")
+    path, media_type = stored
+    headers = {"Cache-Control": IMMUTABLE, "ETag": f'"{cover_hash}-{size}"'}
+    if is_not_modified(request, headers["ETag"], None):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type=media_type, headers=headers)
@@ -0,0 +1,59 @@
+import logging
+from typing import Optional
+
+import httpx
+from fastapi import BackgroundTasks
+from starlette.concurrency import run_in_threadpool
+
+from book.models.book import Book
+from book.services.book_service import AsyncBookService
+from core.config_loader import settings
+from core.database import DbSession, detached_session
+from core.http_client import ResilientHttpClient, UpstreamUnavailableError
+from cover.services.cover_store import CoverStore, cover_store
+
+logger = logging.getLogger(__name__)
+
+
+class CoverService:
+    @staticmethod
+    def can_fetch(url: Optional[str]) -> bool:
+        if not url:
+            return False
+        try:
+            parsed = httpx.URL(url)
+        except httpx.InvalidURL:
+            return False
+        return parsed.scheme in ("http", "https") and parsed.host in settings.COVER_FETCH_HOSTS
+
+    @staticmethod
+    async def fetch_cover(url: str, http_client: ResilientHttpClient, store: CoverStore = cover_store) -> Optional[str]:
+        """Download a cover into the store. Its hash, or None when it couldn't be fetched or isn't an image."""
+        try:
+            response = await http_client.get(url)
+        except UpstreamUnavailableError:
+            logger.warning("Could not download cover %s", url)
+            return None
+        if response.status_code != 200 or len(response.content) > settings.COVER_MAX_BYTES:
+            return None
+        try:
+            # Hashing and thumbnailing are CPU work, keep them off the event loop
+            return await run_in_threadpool(store.put, response.content)
+        except ValueError:
+            logger.warning("Cover %s is not a supported image", url)
+            return None
+
+    @staticmethod
+    async def cache_book_cover(db: DbSession, book_id: int, url: str, http_client: ResilientHttpClient) -> None:
+        """Background task: fetch a book's cover and point the book at the cached copy"""
+        cover_hash = await CoverService.fetch_cover(url, http_client)
+        if cover_hash is None:
+            return
+        async with detached_session(db) as session:
+            await AsyncBookService.set_cover_hash(session, book_id, url, cover_hash)
+
+    @staticmethod
+    def schedule(background_tasks: BackgroundTasks, db: DbSession, book: Book, http_client: ResilientHttpClient) -> None:
+        """Queue a download after the response when the book's cover isn't cached yet"""
+        if book.cover_hash is None and CoverService.can_fetch(book.cover_image):
+            background_tasks.add_task(CoverService.cache_book_cover, db, book.id, book.cover_image, http_client)
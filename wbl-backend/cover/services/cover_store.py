@@ -0,0 +1,109 @@
+import hashlib
+import io
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Dict, Optional
+
+from core.config_loader import settings
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # optional: without Pillow every size is served from the original
+    Image = None
+
+# Thumbnail name -> bounding box width in pixels; heights allow the usual 2:3 cover ratio
+THUMBNAIL_WIDTHS: Dict[str, int] = {"small": 96, "medium": 240, "large": 480}
+SIZES = (*THUMBNAIL_WIDTHS, "original")
+
+HASH_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+# Magic bytes of the formats browsers can show as a cover
+IMAGE_SIGNATURES = {
+    b"\xff\xd8\xff": "image/jpeg",
+    b"\x89PNG\r\n\x1a\n": "image/png",
+    b"GIF87a": "image/gif",
+    b"GIF89a": "image/gif",
+}
+
+
+def sniff_image_type(data: bytes) -> Optional[str]:
+    for signature, media_type in IMAGE_SIGNATURES.items():
+        if data.startswith(signature):
+            return media_type
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+class CoverStore:
+    """Content-addressed cover images on local disk.
+
+    Each image lives under <root>/<hash[:2]>/<hash>/ as `original` plus one JPEG per thumbnail
+    size. The hash is the SHA-256 of the original bytes, so a file never changes once written
+    and can be cached forever; the same cover shared by many books is stored once.
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def _dir(self, cover_hash: str) -> Path:
+        return self.root / cover_hash[:2] / cover_hash
+
+    def put(self, data: bytes) -> str:
+        """Store an image and its thumbnails, returning its hash. Raises ValueError for non-images."""
+        media_type = sniff_image_type(data)
+        if media_type is None:
+            raise ValueError("Not a supported image")
+        cover_hash = hashlib.sha256(data).hexdigest()
+        directory = self._dir(cover_hash)
+        if (directory / "original").exists():
+            return cover_hash
+        directory.mkdir(parents=True, exist_ok=True)
+        if Image is not None:
+            for size, width in THUMBNAIL_WIDTHS.items():
+                self._write(directory / f"{size}.jpg", self._thumbnail(data, width))
+        # Written last: its presence marks the entry complete
+        self._write(directory / "original", data)
+        return cover_hash
+
+    @staticmethod
+    def _thumbnail(data: bytes, width: int) -> bytes:
+        with Image.open(io.BytesIO(data)) as image:
+            image = ImageOps.exif_transpose(image).convert("RGB")
+            image.thumbnail((width, width * 3 // 2))
+            output = io.BytesIO()
+            image.save(output, "JPEG", quality=85, optimize=True, progressive=True)
+            return output.getvalue()
+
+    @staticmethod
+    def _write(path: Path, data: bytes) -> None:
+        # Write then rename, so readers never see a partial file
+        fd, temporary = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                file.write(data)
+            os.replace(temporary, path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+    def open(self, cover_hash: str, size: str) -> Optional[tuple]:
+        """(path, media type) of a stored size, or None. Without a thumbnail the original is used."""
+        if not HASH_PATTERN.match(cover_hash) or size not in SIZES:
+            return None
+        directory = self._dir(cover_hash)
+        if size != "original":
+            thumbnail = directory / f"{size}.jpg"
+            if thumbnail.exists():
+                return thumbnail, "image/jpeg"
+        original = directory / "original"
+        if not original.exists():
+            return None
+        with original.open("rb") as file:
+            media_type = sniff_image_type(file.read(16)) or "application/octet-stream"
+        return original, media_type
+
+
+cover_store = CoverStore(settings.COVER_STORAGE_DIR)
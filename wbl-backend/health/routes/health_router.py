@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends, Response
+
+from core.database import DbSession, get_session
+from core.http_client import ResilientHttpClient, get_http_client
+from health.services.health_service import FAIL, readiness_probe
+
+router = APIRouter(prefix="/health", tags=["health"])
+
+
+@router.get("/live")
+def liveness():
+    """The worker is up and answering. Checks nothing else: a database outage shouldn't get
+       every worker restarted."""
+    return {"status": "ok"}
+
+
+@router.get("/ready")
+async def readiness(
+    response: Response,
+    db: DbSession = Depends(get_session),
+    http_client: ResilientHttpClient = Depends(get_http_client),
+):
+    """Whether this worker should get traffic: database reachable, connection pool not exhausted,
+       schema at the migration head, upstream circuit breakers. 503 when any check fails;
+       "degraded" checks still answer 200. Results are cached for HEALTH_CACHE_SECONDS.
+    """
+    report = await readiness_probe.check(db, http_client)
+    response.headers["Cache-Control"] = "no-store"
+    if report["status"] == FAIL:
+        response.status_code = 503
+    return report
@@ -0,0 +1,158 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence
+
+from alembic.script import ScriptDirectory
+from alembic.util.exc import CommandError
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from core.config_loader import settings
+from core.database import DbSession, pool_stats, run_db
+from core.http_client import CircuitBreaker, ResilientHttpClient
+
+OK = "ok"
+DEGRADED = "degraded"  # worth a look, but the worker can still serve traffic
+FAIL = "fail"  # take the worker out of rotation
+UNKNOWN = "unknown"
+
+ALEMBIC_DIR = Path(__file__).resolve().parents[2] / "alembic"
+
+
+def _elapsed_ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 3)
+
+
+def _ping(db: Session) -> None:
+    db.execute(text("SELECT 1"))
+
+
+def _schema_revision(db: Session) -> Optional[str]:
+    try:
+        return db.execute(text("SELECT version_num FROM alembic_version")).scalar()
+    except DBAPIError:
+        # No alembic_version table: a database made with create_all (tests, local SQLite)
+        db.rollback()
+        return None
+
+
+class ReadinessProbe:
+    """Checks whether this worker can serve requests, caching the result for `cache_seconds`.
+
+    Load balancers probe every worker every few seconds; with the cache, and one check at a time
+    per worker, the database sees at most two tiny queries per worker per `cache_seconds`.
+    """
+
+    def __init__(self, cache_seconds: float, db_timeout_seconds: float, pool_saturation_threshold: float):
+        self.cache_seconds = cache_seconds
+        self.db_timeout_seconds = db_timeout_seconds
+        self.pool_saturation_threshold = pool_saturation_threshold
+        self._report: Optional[Dict[str, Any]] = None
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+        self._scripts: Optional[ScriptDirectory] = None
+        self._heads: Sequence[str] = ()
+
+    def clear(self) -> None:
+        self._report = None
+
+    def _cached(self) -> Optional[Dict[str, Any]]:
+        if self._report is not None and time.monotonic() - self._checked_at < self.cache_seconds:
+            return {**self._report, "cached": True}
+        return None
+
+    async def check(self, db: DbSession, http_client: ResilientHttpClient) -> Dict[str, Any]:
+        cached = self._cached()
+        if cached is not None:
+            return cached
+        async with self._lock:
+            # Probes that queued behind a running check get its result
+            cached = self._cached()
+            if cached is not None:
+                return cached
+            checks = {"pool": self.check_pool()}
+            checks["database"], checks["migrations"] = await self.check_database(db, skip=checks["pool"]["status"] == FAIL)
+            checks["upstreams"] = self.check_upstreams(http_client)
+            statuses = {check["status"] for check in checks.values()}
+            status = FAIL if FAIL in statuses else DEGRADED if DEGRADED in statuses else OK
+            self._report = {"status": status, "checked_at": datetime.now(timezone.utc).isoformat(), "checks": checks}
+            self._checked_at = time.monotonic()
+            return {**self._report, "cached": False}
+
+    def check_pool(self) -> Dict[str, Any]:
+        """In-use connections against what the pool may open (pool size + overflow)"""
+        start = time.perf_counter()
+        stats = pool_stats.get("async" if settings.DATABASE_MODE == "async" else "sync")
+        if stats is None:
+            return {"status": UNKNOWN, "latency_ms": _elapsed_ms(start)}
+        snapshot = stats.snapshot()
+        capacity = (snapshot["pool_size"] or settings.DB_POOL_SIZE) + settings.DB_MAX_OVERFLOW
+        saturation = snapshot["in_use"] / capacity
+        if snapshot["in_use"] >= capacity:
+            status = FAIL  # new requests would queue for a connection
+        elif saturation >= self.pool_saturation_threshold:
+            status = DEGRADED
+        else:
+            status = OK
+        return {"status": status, "latency_ms": _elapsed_ms(start), "in_use": snapshot["in_use"],
+                "capacity": capacity, "saturation": round(saturation, 3), "timeouts": snapshot["timeouts"]}
+
+    async def check_database(self, db: DbSession, skip: bool = False) -> tuple:
+        """Connectivity with SELECT 1, then the schema revision against the migration heads"""
+        if skip:
+            # Asking an exhausted pool for a connection would only wait for pool_timeout
+            reason = {"status": FAIL, "latency_ms": None, "error": "connection pool exhausted"}
+            return reason, {"status": UNKNOWN, "latency_ms": None}
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(run_db(db, _ping), self.db_timeout_seconds)
+        except asyncio.TimeoutError:
+            return {"status": FAIL, "latency_ms": _elapsed_ms(start), "error": "timed out"}, {"status": UNKNOWN, "latency_ms": None}
+        except Exception as e:
+            return {"status": FAIL, "latency_ms": _elapsed_ms(start), "error": e.__class__.__name__}, {"status": UNKNOWN, "latency_ms": None}
+        database = {"status": OK, "latency_ms": _elapsed_ms(start)}
+
+        start = time.perf_counter()
+        try:
+            current = await asyncio.wait_for(run_db(db, _schema_revision), self.db_timeout_seconds)
+        except Exception as e:
+            return database, {"status": UNKNOWN, "latency_ms": _elapsed_ms(start), "error": e.__class__.__name__}
+        return database, {**self._compare_revision(current), "latency_ms": _elapsed_ms(start)}
+
+    def _compare_revision(self, current: Optional[str]) -> Dict[str, Any]:
+        if self._scripts is None:
+            # Parsed once: the migrations can't change under a running worker
+            self._scripts = ScriptDirectory(str(ALEMBIC_DIR))
+            self._heads = tuple(self._scripts.get_heads())
+        result = {"current": current, "head": self._heads[0] if len(self._heads) == 1 else list(self._heads)}
+        if current is None:
+            return {"status": UNKNOWN, **result}
+        if current in self._heads:
+            return {"status": OK, **result}
+        try:
+            self._scripts.get_revision(current)
+        except CommandError:
+            # Newer than this code: another deploy already migrated. Old workers keep serving meanwhile.
+            return {"status": DEGRADED, **result}
+        # Migrations this code expects haven't run; its queries may hit missing columns
+        return {"status": FAIL, **result}
+
+    @staticmethod
+    def check_upstreams(http_client: ResilientHttpClient) -> Dict[str, Any]:
+        """Circuit breaker per upstream host. An open breaker only degrades: ISBN lookups fail
+        fast but everything else works, and every worker sees the same upstream outage."""
+        start = time.perf_counter()
+        hosts = {host: {"state": breaker.state, "failures": breaker.failures}
+                 for host, breaker in http_client.breakers.items()}
+        closed = all(host["state"] == CircuitBreaker.CLOSED for host in hosts.values())
+        return {"status": OK if closed else DEGRADED, "latency_ms": _elapsed_ms(start), "hosts": hosts}
+
+
+readiness_probe = ReadinessProbe(
+    cache_seconds=settings.HEALTH_CACHE_SECONDS,
+    db_timeout_seconds=settings.HEALTH_DB_TIMEOUT_SECONDS,
+    pool_saturation_threshold=settings.HEALTH_POOL_SATURATION_THRESHOLD,
+)
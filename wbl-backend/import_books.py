@@ -0,0 +1,44 @@
+import argparse
+import json
+
+from book.services.book_import import BookImportService, iter_records
+from core.database import SessionLocal
+from user.models.user import User
+
+
+def import_books(path, owner_email, file_format=None, upsert=False, library_id=None, batch_size=1000):
+    """Import a CSV or JSON Lines file of books for an existing user"""
+    db = SessionLocal()
+    try:
+        owner = db.query(User).filter(User.email == owner_email).first()
+        if owner is None:
+            print(f"No user with email {owner_email}.")
+            return None
+        file_format = file_format or ("csv" if path.lower().endswith(".csv") else "jsonl")
+        with open(path, "rb") as stream:
+            return BookImportService.import_books(
+                db=db,
+                records=iter_records(stream, file_format),
+                owner_id=owner.id,
+                upsert=upsert,
+                default_library_id=library_id,
+                batch_size=batch_size,
+            )
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import books into the Wild Branch Library")
+    parser.add_argument("file", help="CSV (with header row) or JSON Lines file")
+    parser.add_argument("--owner-email", required=True, help="Email of the user who will own the books")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="Defaults from the file extension")
+    parser.add_argument("--upsert", action="store_true", help="Update books whose ISBN the owner already has")
+    parser.add_argument("--library-id", type=int, help="Library for rows that don't name one")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Rows per transaction")
+
+    args = parser.parse_args()
+
+    result = import_books(args.file, args.owner_email, args.format, args.upsert, args.library_id, args.batch_size)
+    if result is not None:
+        print(json.dumps(result.model_dump(), indent=2))
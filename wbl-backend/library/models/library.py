@@ -1,16 +1,33 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
+from datetime import datetime, timezone
+
+from sqlalchemy import BigInteger, Column, DateTime, Integer, String, ForeignKey, Index, func
 from sqlalchemy.orm import relationship
 
 from core.database import Base
+from core.revision import next_revision
+
+
+def _utcnow():
+    return datetime.now(timezone.utc)
 
 
 class Library(Base):
     __tablename__ = "libraries"
+    __table_args__ = (
+        # Count and max(updated_at) per user for the listing ETag
+        Index("ix_libraries_user_id_updated_at", "user_id", "updated_at"),
+        Index("ix_libraries_user_id_revision", "user_id", "revision"),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     name = Column(String(255), nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    updated_at = Column(DateTime(timezone=True), nullable=False, default=_utcnow, onupdate=_utcnow, server_default=func.now())
+    revision = Column(BigInteger, nullable=False, default=next_revision(), onupdate=next_revision())
 
     # Relationships
-    owner = relationship("User", back_populates="libraries")
-    books = relationship("Book", back_populates="library")
+    # Use queries (EXISTS, counts) instead of loading these. passive_deletes: the ORM doesn't
+    # load the books to null out library_id; that foreign key has no ON DELETE, so the database
+    # rejects deleting a library that still has books (delete_library checks first for a clean 400)
+    owner = relationship("User", back_populates="libraries", lazy="raise_on_sql")
+    books = relationship("Book", back_populates="library", lazy="raise_on_sql", passive_deletes=True)
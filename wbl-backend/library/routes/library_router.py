@@ -1,85 +1,123 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from typing import List, Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 
 from auth.services.auth_service import get_current_user
 from library.schemas.library import LibraryCreate, LibraryResponse, LibraryUpdate
-from library.services.library_service import LibraryService
-from core.database import get_db
+from library.services.library_service import AsyncLibraryService
+from core.conditional import collection_etag, is_not_modified, not_modified, set_validators
+from core.database import DbSession, get_read_session, get_session
 from user.models.user import User
 
 router = APIRouter(prefix="/libraries", tags=["libraries"])
 
+IncludeStats = Query(None, description="Add book count, distinct authors, genre histogram and last change per library")
+
+
+async def _listing_version(db: DbSession, user_id: Optional[int], include: Optional[str]):
+    count, last_modified = await AsyncLibraryService.get_collection_version(db, user_id=user_id)
+    if include != "stats":
+        return (count, last_modified), last_modified
+    # Stats change with the books, so they're part of the validators too
+    book_count, books_modified = await AsyncLibraryService.get_books_version(db, user_id=user_id)
+    if books_modified is not None and (last_modified is None or books_modified > last_modified):
+        last_modified = books_modified
+    return (count, book_count, last_modified), last_modified
+
 
 @router.get("", response_model=List[LibraryResponse])
-def get_libraries(
-    db: Session = Depends(get_db),
+async def get_libraries(
+    request: Request,
+    response: Response,
+    include: Optional[Literal["stats"]] = IncludeStats,
+    db: DbSession = Depends(get_read_session),
     current_user: User = Depends(get_current_user)
 ):
-    """Get all libraries for the current user"""
-    return LibraryService.get_libraries(db, user_id=current_user.id)
+    """Get all libraries for the current user. Supports If-None-Match / If-Modified-Since."""
+    version, last_modified = await _listing_version(db, current_user.id, include)
+    etag = collection_etag("libraries", current_user.id, include, *version)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified(etag, last_modified)
+    set_validators(response, etag, last_modified)
+    libraries = await AsyncLibraryService.get_libraries(db, user_id=current_user.id)
+    if include == "stats":
+        return await AsyncLibraryService.with_stats(db, libraries, user_id=current_user.id)
+    return libraries
 
 
 @router.get("/all", response_model=List[LibraryResponse])
-def get_all_libraries(
-    db: Session = Depends(get_db),
+async def get_all_libraries(
+    request: Request,
+    response: Response,
+    include: Optional[Literal["stats"]] = IncludeStats,
+    db: DbSession = Depends(get_read_session),
     current_user: User = Depends(get_current_user)
 ):
-    """Get all libraries across all users"""
-    return LibraryService.get_all_libraries(db)
+    """Get all libraries across all users. Supports If-None-Match / If-Modified-Since."""
+    version, last_modified = await _listing_version(db, None, include)
+    etag = collection_etag("all-libraries", include, *version)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified(etag, last_modified)
+    set_validators(response, etag, last_modified)
+    libraries = await AsyncLibraryService.get_all_libraries(db)
+    if include == "stats":
+        return await AsyncLibraryService.with_stats(db, libraries)
+    return libraries
 
 
 @router.get("/{library_id}", response_model=LibraryResponse)
-def get_library(
+async def get_library(
     library_id: int,
-    db: Session = Depends(get_db),
+    include: Optional[Literal["stats"]] = IncludeStats,
+    db: DbSession = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
     """Get a specific library"""
-    db_library = LibraryService.get_library_by_id(db, library_id)
+    db_library = await AsyncLibraryService.get_library_by_id(db, library_id)
     if db_library is None:
         raise HTTPException(status_code=404, detail="Library not found")
     # Allow any user to view any library (since books can be assigned to any library)
+    if include == "stats":
+        return (await AsyncLibraryService.with_stats(db, [db_library], library_id=library_id))[0]
     return db_library
 
 
 @router.post("", response_model=LibraryResponse, status_code=status.HTTP_201_CREATED)
-def create_library(
+async def create_library(
     library: LibraryCreate,
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
     """Create a new library for the current user"""
-    return LibraryService.create_library(db=db, library_data=library, user_id=current_user.id)
+    return await AsyncLibraryService.create_library(db=db, library_data=library, user_id=current_user.id)
 
 
 @router.put("/{library_id}", response_model=LibraryResponse)
-def update_library(
+async def update_library(
     library_id: int,
     library: LibraryUpdate,
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
     """Update an existing library"""
-    db_library = LibraryService.get_library_by_id(db, library_id)
+    db_library = await AsyncLibraryService.get_library_by_id(db, library_id)
     if db_library is None:
         raise HTTPException(status_code=404, detail="Library not found")
     if db_library.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to update this library")
-    return LibraryService.update_library(db=db, library_id=library_id, library_data=library)
+    return await AsyncLibraryService.update_library(db=db, library_id=library_id, library_data=library)
 
 
 @router.delete("/{library_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_library(
+async def delete_library(
     library_id: int,
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
     """Delete a library if it has no books"""
-    db_library = LibraryService.get_library_by_id(db, library_id)
+    db_library = await AsyncLibraryService.get_library_by_id(db, library_id)
     if db_library is None:
         return  # Deleting non-existent can be idempotent
     if db_library.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to delete this library")
-    LibraryService.delete_library(db=db, library_id=library_id)
+    await AsyncLibraryService.delete_library(db=db, library_id=library_id)
     return
@@ -1,5 +1,6 @@
-from typing import Optional, List
-from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import Dict, Optional, List
+from pydantic import BaseModel, ConfigDict, Field, model_serializer
 
 
 class LibraryBase(BaseModel):
@@ -14,9 +15,26 @@ class LibraryUpdate(LibraryBase):
     pass
 
 
+class LibraryStats(BaseModel):
+    book_count: int = 0
+    distinct_authors: int = 0
+    # Books without a genre count towards book_count but aren't listed here
+    genres: Dict[str, int] = Field(default_factory=dict)
+    # Latest change to the library or to a book in it
+    last_modified: Optional[datetime] = None
+
+
 class LibraryResponse(LibraryBase):
     id: int
     user_id: int
+    # Only present with ?include=stats
+    stats: Optional[LibraryStats] = None
+
+    model_config = ConfigDict(from_attributes=True)
 
-    class Config:
-        orm_mode = True
+    @model_serializer(mode="wrap")
+    def _omit_stats_unless_included(self, handler):
+        data = handler(self)
+        if self.stats is None:
+            data.pop("stats", None)
+        return data
@@ -1,9 +1,16 @@
-from typing import List, Optional
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import DateTime, String, distinct, exists, func, literal, null, select, union_all
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
 
+from book.models.book import Book
+from core.conditional import newest
+from core.database import async_variant
+from core.events import ChangeEvent, event_broker
 from library.models.library import Library
-from library.schemas.library import LibraryCreate, LibraryUpdate
+from library.schemas.library import LibraryCreate, LibraryResponse, LibraryStats, LibraryUpdate
+from sync.models.tombstone import Tombstone
 
 
 class LibraryService:
@@ -17,10 +24,88 @@ class LibraryService:
         """Get all libraries across all users"""
         return db.query(Library).all()
 
+    @staticmethod
+    def get_collection_version(db: Session, user_id: Optional[int] = None) -> Tuple[int, Optional[datetime]]:
+        """(count, last change) of a user's libraries, or of all libraries without a user_id.
+        Library tombstones date the deletes."""
+        last_deleted = select(func.max(Tombstone.deleted_at)).where(Tombstone.entity == "library")
+        query = db.query(func.count(Library.id), func.max(Library.updated_at))
+        if user_id is not None:
+            last_deleted = last_deleted.where(Tombstone.owner_id == user_id)
+            query = query.filter(Library.user_id == user_id)
+        count, last_updated, last_deleted = query.add_columns(last_deleted.scalar_subquery()).one()
+        return count, newest(last_updated, last_deleted)
+
+    @staticmethod
+    def get_books_version(db: Session, user_id: Optional[int] = None) -> Tuple[int, Optional[datetime]]:
+        """(count, max(updated_at)) of the books in a user's libraries, or in all libraries.
+        Part of the listing ETag when stats are included."""
+        query = db.query(func.count(Book.id), func.max(Book.updated_at))
+        if user_id is not None:
+            query = query.join(Library, Library.id == Book.library_id).filter(Library.user_id == user_id)
+        count, last_modified = query.one()
+        return count, last_modified
+
+    @staticmethod
+    def get_library_stats(db: Session, user_id: Optional[int] = None, library_id: Optional[int] = None) -> Dict[int, LibraryStats]:
+        """Per-library book count, distinct authors, genre histogram and latest book change.
+
+        One statement for any number of libraries: a (library, genre) grouping for the histogram,
+        UNION ALL a per-library grouping for the distinct author count, which can't be summed
+        from the genre groups. Libraries without books are left out.
+        """
+        def scoped(query):
+            if library_id is not None:
+                return query.where(Book.library_id == library_id)
+            if user_id is not None:
+                return query.join(Library, Library.id == Book.library_id).where(Library.user_id == user_id)
+            return query
+
+        per_genre = scoped(
+            select(literal("genre").label("kind"), Book.library_id, Book.genre.label("genre"),
+                   func.count(Book.id).label("value"), func.max(Book.updated_at).label("last_modified"))
+            .group_by(Book.library_id, Book.genre)
+        )
+        per_library = scoped(
+            select(literal("authors"), Book.library_id, null().cast(String),
+                   func.count(distinct(Book.author)), null().cast(DateTime(timezone=True)))
+            .group_by(Book.library_id)
+        )
+
+        stats: Dict[int, LibraryStats] = {}
+        for kind, lib_id, genre, value, last_modified in db.execute(union_all(per_genre, per_library)):
+            entry = stats.setdefault(lib_id, LibraryStats())
+            if kind == "authors":
+                entry.distinct_authors = value
+                continue
+            entry.book_count += value
+            if genre is not None:
+                entry.genres[genre] = value
+            if last_modified is not None and (entry.last_modified is None or last_modified > entry.last_modified):
+                entry.last_modified = last_modified
+        return stats
+
+    @staticmethod
+    def with_stats(db: Session, libraries: List[Library], user_id: Optional[int] = None,
+                   library_id: Optional[int] = None) -> List[LibraryResponse]:
+        """Responses for `libraries` with their stats filled in; user_id/library_id scope the stats query like the listing"""
+        stats = LibraryService.get_library_stats(db, user_id=user_id, library_id=library_id)
+        responses = []
+        for db_library in libraries:
+            entry = stats.get(db_library.id, LibraryStats())
+            # Renaming the library counts as a change too
+            if entry.last_modified is None or db_library.updated_at > entry.last_modified:
+                entry.last_modified = db_library.updated_at
+            response = LibraryResponse.model_validate(db_library, from_attributes=True)
+            response.stats = entry
+            responses.append(response)
+        return responses
+
     @staticmethod
     def get_library_by_id(db: Session, library_id: int) -> Optional[Library]:
         """Get a specific library by ID"""
-        return db.query(Library).filter(Library.id == library_id).first()
+        # Identity map first, so the route's lookup and the service's share one query
+        return db.get(Library, library_id)
 
     @staticmethod
     def create_library(db: Session, library_data: LibraryCreate, user_id: int) -> Library:
@@ -29,6 +114,7 @@ class LibraryService:
         db.add(db_library)
         db.commit()
         db.refresh(db_library)
+        LibraryService._publish(db_library, "created")
         return db_library
 
     @staticmethod
@@ -41,6 +127,7 @@ class LibraryService:
                 setattr(db_library, key, value)
             db.commit()
             db.refresh(db_library)
+            LibraryService._publish(db_library, "updated")
         return db_library
 
     @staticmethod
@@ -48,13 +135,40 @@ class LibraryService:
         """Delete a library if it has no books associated with it"""
         db_library = LibraryService.get_library_by_id(db, library_id)
         if db_library:
-            # Check if library has books
-            if db_library.books and len(db_library.books) > 0:
+            # EXISTS stops at the first book instead of loading them all
+            if db.query(exists().where(Book.library_id == library_id)).scalar():
                 raise HTTPException(
                     status_code=400, 
                     detail="Cannot delete library that contains books. Move or remove the books first."
                 )
+            tombstone = Tombstone(entity="library", entity_id=db_library.id, owner_id=db_library.user_id)
+            db.add(tombstone)
             db.delete(db_library)
+            db.flush()  # the revision comes back from the INSERT, before commit expires it
+            event = ChangeEvent(entity="library", action="deleted", id=tombstone.entity_id, owner_id=tombstone.owner_id,
+                                revision=tombstone.revision)
             db.commit()
+            event_broker.publish(event)
             return True
         return False
+
+    @staticmethod
+    def _publish(db_library: Library, action: str) -> None:
+        event_broker.publish(ChangeEvent(
+            entity="library", action=action, id=db_library.id, owner_id=db_library.user_id,
+            revision=db_library.revision,
+        ))
+
+
+class AsyncLibraryService:
+    """LibraryService for async routes: the same queries, awaited on whichever session get_session provides"""
+    get_libraries = staticmethod(async_variant(LibraryService.get_libraries))
+    get_all_libraries = staticmethod(async_variant(LibraryService.get_all_libraries))
+    get_collection_version = staticmethod(async_variant(LibraryService.get_collection_version))
+    get_books_version = staticmethod(async_variant(LibraryService.get_books_version))
+    get_library_stats = staticmethod(async_variant(LibraryService.get_library_stats))
+    with_stats = staticmethod(async_variant(LibraryService.with_stats))
+    get_library_by_id = staticmethod(async_variant(LibraryService.get_library_by_id))
+    create_library = staticmethod(async_variant(LibraryService.create_library))
+    update_library = staticmethod(async_variant(LibraryService.update_library))
+    delete_library = staticmethod(async_variant(LibraryService.delete_library))
@@ -1,11 +1,26 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from starlette.middleware.cors import CORSMiddleware
+from core.compression import CompressionMiddleware
 from core.config_loader import settings
+from core.events import PostgresNotifyBackend, event_broker
+from core.http_client import ResilientHttpClient
+from core.metrics import MetricsMiddleware, instrument_sql, registry
+from core.profiling import ProfilingMiddleware
+from core.responses import FastJSONResponse
 
+from admin.routes.profiling_router import router as profiling_router
 from auth.routes.auth_router import auth_router
+from auth.services.auth_service import current_principal
 from user.routes.user_router import user_router
 from book.routes.book_router import router as book_router
 from library.routes.library_router import router as library_router
+from cover.routes.cover_router import router as cover_router
+from health.routes.health_router import router as health_router
+from sync.routes.events_router import router as events_router
+from sync.routes.sync_router import router as sync_router
 
 openapi_tags = [
     {
@@ -19,13 +34,61 @@ openapi_tags = [
         "name": "Libraries",
         "description": "Library management operations",
     },
+    {
+        "name": "Covers",
+        "description": "Locally cached book cover images",
+    },
+    {
+        "name": "Sync",
+        "description": "Delta sync for offline clients",
+    },
+    {
+        "name": "Admin",
+        "description": "Captured request profiles (superusers only)",
+    },
     {
         "name": "Health Checks",
-        "description": "Application health checks",
+        "description": "Application health checks: /health/live for liveness, /health/ready for readiness",
     }
 ]
 
-app = FastAPI(openapi_tags=openapi_tags)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One outbound connection pool per worker, shared by every request
+    app.state.http_client = ResilientHttpClient(
+        timeout_seconds=settings.HTTP_CLIENT_TIMEOUT_SECONDS,
+        max_connections=settings.HTTP_CLIENT_MAX_CONNECTIONS,
+        max_concurrency_per_host=settings.HTTP_CLIENT_MAX_CONCURRENCY_PER_HOST,
+        max_retries=settings.HTTP_CLIENT_MAX_RETRIES,
+        retry_backoff_seconds=settings.HTTP_CLIENT_RETRY_BACKOFF_SECONDS,
+        breaker_failure_threshold=settings.HTTP_CLIENT_BREAKER_FAILURE_THRESHOLD,
+        breaker_reset_seconds=settings.HTTP_CLIENT_BREAKER_RESET_SECONDS,
+    )
+    event_broker.max_queued = settings.EVENTS_MAX_QUEUED_PER_CLIENT
+    if settings.EVENTS_BACKEND == "postgres":
+        # libpq doesn't know SQLAlchemy's driver suffix
+        await event_broker.start(PostgresNotifyBackend(str(settings.SQLALCHEMY_DATABASE_URI).replace("+psycopg2", "")))
+    else:
+        await event_broker.start()
+    yield
+    await event_broker.stop()
+    await app.state.http_client.aclose()
+
+
+app = FastAPI(openapi_tags=openapi_tags, lifespan=lifespan, default_response_class=FastJSONResponse)
+
+app.add_middleware(
+    CompressionMiddleware,
+    encodings=settings.COMPRESSION_ENCODINGS if settings.COMPRESSION_ENABLED else [],
+    minimum_size=settings.COMPRESSION_MIN_SIZE,
+    content_types=settings.COMPRESSION_CONTENT_TYPES,
+    levels={
+        "gzip": settings.COMPRESSION_GZIP_LEVEL,
+        "br": settings.COMPRESSION_BROTLI_QUALITY,
+        "zstd": settings.COMPRESSION_ZSTD_LEVEL,
+    },
+)
 
 if settings.BACKEND_CORS_ORIGINS:
     app.add_middleware(
@@ -36,12 +99,38 @@ if settings.BACKEND_CORS_ORIGINS:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["Link", "ETag", "Last-Modified"],
     )
 
+if settings.PROFILING_ENABLED:
+    app.add_middleware(
+        ProfilingMiddleware,
+        is_admin=lambda: getattr(current_principal.get(), "is_superuser", False),
+        sample_rate=settings.PROFILING_SAMPLE_RATE,
+        slow_seconds=settings.PROFILING_SLOW_SECONDS,
+        interval_seconds=settings.PROFILING_INTERVAL_SECONDS,
+    )
+
+if settings.METRICS_ENABLED:
+    # Added last so it is outermost: latency covers the whole stack and sizes are as sent
+    app.add_middleware(MetricsMiddleware)
+    instrument_sql()
+
+    @app.get("/metrics", include_in_schema=False, response_class=PlainTextResponse)
+    def metrics():
+        """Prometheus scrape endpoint for this worker"""
+        return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 app.include_router(auth_router, prefix='/api')
 app.include_router(user_router, prefix='/api', tags=['Users'])
 app.include_router(book_router, prefix='/api', tags=['Books'])
 app.include_router(library_router, prefix='/api', tags=['Libraries'])
+app.include_router(cover_router, prefix='/api', tags=['Covers'])
+app.include_router(sync_router, prefix='/api', tags=['Sync'])
+app.include_router(events_router, prefix='/api', tags=['Sync'])
+app.include_router(profiling_router, prefix='/api', tags=['Admin'])
+
+app.include_router(health_router, tags=['Health Checks'])
 
 @app.get("/health", tags=['Health Checks'])
 def read_root():
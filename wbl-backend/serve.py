@@ -0,0 +1,10 @@
+"""Production entry point: python serve.py
+
+Runs the app under uvicorn with the SERVER_* and WEB_CONCURRENCY settings in core.config.
+SERVER_PROFILE=development is a single process that reloads on code changes; production runs
+one worker per core, recycled after SERVER_MAX_REQUESTS and drained on SIGTERM.
+"""
+from core.server import serve
+
+if __name__ == "__main__":
+    serve()
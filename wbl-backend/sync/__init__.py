@@ -0,0 +1 @@
+# Sync package init
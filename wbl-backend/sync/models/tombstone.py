@@ -0,0 +1,27 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import BigInteger, Column, DateTime, ForeignKey, Index, Integer, String
+
+from core.database import Base
+from core.revision import next_revision
+
+
+def _utcnow():
+    return datetime.now(timezone.utc)
+
+
+class Tombstone(Base):
+    """Record of a deleted book or library, so syncing clients learn about the delete"""
+    __tablename__ = "sync_tombstones"
+    __table_args__ = (
+        Index("ix_sync_tombstones_owner_id_revision", "owner_id", "revision"),
+    )
+    # Fetch the sequence-assigned revision with the INSERT (RETURNING) instead of a second query
+    __mapper_args__ = {"eager_defaults": True}
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    entity = Column(String(20), nullable=False)  # "book" or "library"
+    entity_id = Column(Integer, nullable=False)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    revision = Column(BigInteger, nullable=False, default=next_revision())
+    deleted_at = Column(DateTime(timezone=True), nullable=False, default=_utcnow)
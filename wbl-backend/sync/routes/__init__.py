@@ -0,0 +1 @@
+# Routes package init
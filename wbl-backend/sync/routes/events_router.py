@@ -0,0 +1,65 @@
+from typing import AsyncIterator
+
+from fastapi import APIRouter, Depends, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+
+from auth.models.principal import AuthenticatedUser
+from auth.services.auth_service import get_current_user_for_stream
+from core.config_loader import settings
+from core.events import ChangeEvent, event_broker
+
+router = APIRouter(prefix="/events", tags=["sync"])
+
+
+def _visible_to(user: AuthenticatedUser):
+    # Libraries are shared by the whole family (see /api/libraries/all), so everyone hears about
+    # them; books only reach their owner
+    def accepts(event: ChangeEvent) -> bool:
+        return event.entity == "library" or event.owner_id == user.id
+    return accepts
+
+
+async def sse_stream(user: AuthenticatedUser) -> AsyncIterator[str]:
+    yield "retry: 3000\n\n"
+    async for event in event_broker.stream(_visible_to(user), settings.EVENTS_KEEPALIVE_SECONDS):
+        if event is None:
+            # Comment lines keep proxies from closing an idle stream and let us notice a gone client
+            yield ": keepalive\n\n"
+            continue
+        event_id = f"id: {event.revision}\n" if event.revision is not None else ""
+        yield f"{event_id}event: {event.entity}.{event.action}\ndata: {event.model_dump_json()}\n\n"
+    # The client fell behind and events were dropped: tell it to catch up through /api/sync
+    yield "event: resync\ndata: {}\n\n"
+
+
+@router.get("", response_class=StreamingResponse)
+async def change_feed(current_user: AuthenticatedUser = Depends(get_current_user_for_stream)):
+    """Server-Sent Events stream of book and library changes the current user can see.
+
+    Events name what changed (`book.updated`, `library.deleted`, ...) and its revision;
+    on `resync` or after reconnecting, fetch what was missed with GET /api/sync.
+    /api/sync only returns the caller's own libraries: on a `library.*` event for someone
+    else's library (owner_id isn't you), or after a resync, re-fetch GET /api/libraries/all.
+    """
+    return StreamingResponse(
+        sse_stream(current_user),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/ws")
+async def change_feed_ws(websocket: WebSocket, current_user: AuthenticatedUser = Depends(get_current_user_for_stream)):
+    """The same change feed over a WebSocket, one JSON event per message"""
+    await websocket.accept()
+    try:
+        async for event in event_broker.stream(_visible_to(current_user), settings.EVENTS_KEEPALIVE_SECONDS):
+            if event is None:
+                # Sending is how we find out the client went away
+                await websocket.send_json({"type": "keepalive"})
+                continue
+            await websocket.send_json({"type": f"{event.entity}.{event.action}", **event.model_dump()})
+        await websocket.send_json({"type": "resync"})
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
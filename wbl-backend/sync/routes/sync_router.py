@@ -0,0 +1,24 @@
+from fastapi import APIRouter, Depends, Query
+
+from auth.services.auth_service import get_current_user
+from core.database import DbSession, get_read_session
+from sync.schemas.sync import SyncResponse
+from sync.services.sync_service import AsyncSyncService
+from user.models.user import User
+
+router = APIRouter(prefix="/sync", tags=["sync"])
+
+
+@router.get("", response_model=SyncResponse)
+async def get_changes(
+    since: int = Query(0, ge=0, description="next_since from the previous sync; 0 for a full sync"),
+    limit: int = Query(500, ge=1, le=5000),
+    db: DbSession = Depends(get_read_session),
+    current_user: User = Depends(get_current_user)
+):
+    """Books and libraries added, changed or deleted since the given revision.
+
+    Call again with `since=next_since` while `has_more` is true, then keep the final
+    next_since for the next sync. Deleted items only carry their id.
+    """
+    return await AsyncSyncService.get_changes(db, owner_id=current_user.id, since=since, limit=limit)
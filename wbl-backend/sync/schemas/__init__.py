@@ -0,0 +1 @@
+# Schemas package init
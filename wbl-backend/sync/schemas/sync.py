@@ -0,0 +1,22 @@
+from typing import List, Literal
+
+from pydantic import BaseModel
+
+from book.schemas.book import BookResponseWithId
+from library.schemas.library import LibraryResponse
+
+
+class SyncDeletion(BaseModel):
+    entity: Literal["book", "library"]
+    id: int
+    revision: int
+
+
+class SyncResponse(BaseModel):
+    books: List[BookResponseWithId]  # added or changed since `since`
+    libraries: List[LibraryResponse]
+    deleted: List[SyncDeletion]
+    # Pass back as `since`. While has_more is true it continues paging; once it is false,
+    # store it for the next sync.
+    next_since: int
+    has_more: bool
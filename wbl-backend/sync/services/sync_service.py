@@ -0,0 +1,88 @@
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from book.models.book import Book
+from book.schemas.book import BookResponseWithId
+from core.config_loader import settings
+from core.database import async_variant
+from library.models.library import Library
+from library.schemas.library import LibraryResponse
+from sync.models.tombstone import Tombstone
+from sync.schemas.sync import SyncDeletion, SyncResponse
+
+
+class SyncService:
+    @staticmethod
+    def get_changes(db: Session, owner_id: int, since: int, limit: int) -> SyncResponse:
+        """The owner's books, libraries and deletions with a revision above `since`, oldest first.
+
+        Each page holds at most `limit` changes. On the last page next_since is held back to the
+        highest revision that is older than SYNC_SETTLE_SECONDS: revisions are handed out when a
+        row is written but become visible at commit, so a slow transaction can still commit a
+        revision below ones the client has already seen. Re-sending the last few seconds of
+        changes is cheap; missing one is not.
+        """
+        books = (
+            db.query(Book).filter(Book.owner_id == owner_id, Book.revision > since)
+            .order_by(Book.revision).limit(limit + 1).all()
+        )
+        libraries = (
+            db.query(Library).filter(Library.user_id == owner_id, Library.revision > since)
+            .order_by(Library.revision).limit(limit + 1).all()
+        )
+        # A client syncing from scratch has nothing to delete
+        tombstones = [] if since == 0 else (
+            db.query(Tombstone).filter(Tombstone.owner_id == owner_id, Tombstone.revision > since)
+            .order_by(Tombstone.revision).limit(limit + 1).all()
+        )
+
+        # Merge the three revision-ordered streams and keep the first `limit` changes
+        changes = sorted(
+            [(book.revision, book) for book in books]
+            + [(library.revision, library) for library in libraries]
+            + [(tombstone.revision, tombstone) for tombstone in tombstones],
+            key=lambda change: change[0],
+        )
+        has_more = len(changes) > limit
+        changes = changes[:limit]
+        page_max = changes[-1][0] if changes else since
+
+        if has_more:
+            next_since = page_max
+        else:
+            settled = SyncService._settled_revision(db, owner_id, page_max)
+            next_since = max(since, min(page_max, settled)) if settled is not None else since
+
+        return SyncResponse(
+            books=[BookResponseWithId.model_validate(change, from_attributes=True) for _, change in changes if isinstance(change, Book)],
+            libraries=[LibraryResponse.model_validate(change, from_attributes=True) for _, change in changes if isinstance(change, Library)],
+            deleted=[
+                SyncDeletion(entity=change.entity, id=change.entity_id, revision=change.revision)
+                for _, change in changes if isinstance(change, Tombstone)
+            ],
+            next_since=next_since,
+            has_more=has_more,
+        )
+
+    @staticmethod
+    def _settled_revision(db: Session, owner_id: int, up_to: int) -> Optional[int]:
+        """Highest revision up to `up_to` written before the settle window"""
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=settings.SYNC_SETTLE_SECONDS)
+        candidates: List[Tuple[Optional[int]]] = [
+            db.query(func.max(Book.revision)).filter(
+                Book.owner_id == owner_id, Book.revision <= up_to, Book.updated_at < cutoff).one(),
+            db.query(func.max(Library.revision)).filter(
+                Library.user_id == owner_id, Library.revision <= up_to, Library.updated_at < cutoff).one(),
+            db.query(func.max(Tombstone.revision)).filter(
+                Tombstone.owner_id == owner_id, Tombstone.revision <= up_to, Tombstone.deleted_at < cutoff).one(),
+        ]
+        revisions = [revision for (revision,) in candidates if revision is not None]
+        return max(revisions) if revisions else None
+
+
+class AsyncSyncService:
+    """SyncService for async routes"""
+    get_changes = staticmethod(async_variant(SyncService.get_changes))
@@ -0,0 +1,200 @@
+import os
+
+# Settings are read from the environment, so make sure the required ones exist
+# before anything imports core.config_loader
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret-key")
+os.environ.setdefault("POSTGRESQL_USERNAME", "test")
+os.environ.setdefault("POSTGRESQL_PASSWORD", "test")
+os.environ.setdefault("POSTGRESQL_SERVER", "localhost")
+os.environ.setdefault("POSTGRESQL_PORT", "5432")
+os.environ.setdefault("POSTGRESQL_DATABASE", "test")
+
+import json
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from fastapi import Request
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from auth.services.auth_service import create_access_token
+from auth.services.principal_cache import principal_cache
+from book.services.isbn_cache import isbn_cache
+from book.services.openlibrary_client import OpenLibraryClient, get_openlibrary_client
+from core.database import Base, get_db
+from library.models.library import Library
+from main import app
+from user.models.user import User
+
+
+@pytest.fixture
+def engine():
+    # A single shared in-memory connection keeps every session on the same database
+    test_engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=test_engine)
+    yield test_engine
+    Base.metadata.drop_all(bind=test_engine)
+    test_engine.dispose()
+
+
+@pytest.fixture
+def query_budget(engine):
+    """Fail a block that runs more SQL statements than its budget.
+
+        with query_budget(2) as statements:
+            client.get("/api/books", headers=auth_headers)
+
+    The statements run are listed in the failure message and yielded for extra checks.
+    """
+    @contextmanager
+    def budget(max_queries):
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+        assert len(statements) <= max_queries, (
+            f"{len(statements)} queries over a budget of {max_queries}:\n" + "\n\n".join(statements)
+        )
+
+    return budget
+
+
+@pytest.fixture
+def session_factory(engine):
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture
+def db(session_factory):
+    session = session_factory()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def client(session_factory):
+    def override_get_db():
+        session = session_factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    previous = app.dependency_overrides.get(get_db)
+    app.dependency_overrides[get_db] = override_get_db
+    principal_cache.clear()
+    with TestClient(app) as test_client:
+        yield test_client
+    if previous is None:
+        app.dependency_overrides.pop(get_db, None)
+    else:
+        app.dependency_overrides[get_db] = previous
+
+
+@pytest.fixture
+def user(db):
+    # The hash is never checked by these fixtures, so skip the bcrypt cost
+    test_user = User(username="reader", email="reader@example.com", password="not-a-real-hash")
+    db.add(test_user)
+    db.commit()
+    db.refresh(test_user)
+    return test_user
+
+
+@pytest.fixture
+def library(db, user):
+    test_library = Library(name="Living Room", user_id=user.id)
+    db.add(test_library)
+    db.commit()
+    db.refresh(test_library)
+    return test_library
+
+
+@pytest.fixture
+def auth_headers(user):
+    token = create_access_token(data={"sub": user.email})
+    return {"Authorization": f"Bearer {token}"}
+
+
+class OpenLibraryStub:
+    """Local stand-in for openlibrary.org's /api/books endpoint"""
+
+    def __init__(self):
+        self.books = {}  # ISBN -> jscmd=data record
+        self.files = {}  # path -> (content type, body), e.g. cover images
+        self.requests = []  # bibkeys of every request received
+        self.failures_left = 0  # answer this many requests with HTTP 503 first
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path in stub.files:
+                    content_type, body = stub.files[self.path]
+                    self.send_response(200)
+                    self.send_header("Content-Type", content_type)
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                    return
+                query = parse_qs(urlparse(self.path).query)
+                bibkeys = query.get("bibkeys", [""])[0]
+                stub.requests.append(bibkeys)
+                if stub.failures_left:
+                    stub.failures_left -= 1
+                    self.send_response(503)
+                    self.end_headers()
+                    return
+                found = {key: stub.books[key[5:]] for key in bibkeys.split(",") if key[5:] in stub.books}
+                body = json.dumps(found).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def add_book(self, isbn, title, authors=(), cover=None):
+        record = {"title": title, "authors": [{"name": name} for name in authors]}
+        if cover:
+            record["cover"] = {"medium": cover}
+        self.books[isbn] = record
+
+
+@pytest.fixture
+def openlibrary_stub():
+    stub = OpenLibraryStub()
+    thread = threading.Thread(target=stub.server.serve_forever, daemon=True)
+    thread.start()
+
+    def override_client(request: Request):
+        return OpenLibraryClient(request.app.state.http_client, base_url=stub.url)
+
+    app.dependency_overrides[get_openlibrary_client] = override_client
+    isbn_cache.clear()
+    yield stub
+    isbn_cache.clear()
+    app.dependency_overrides.pop(get_openlibrary_client, None)
+    stub.server.shutdown()
+    stub.server.server_close()
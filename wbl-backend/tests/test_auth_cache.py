@@ -0,0 +1,70 @@
+import asyncio
+
+from sqlalchemy import event
+
+from auth.services.auth_service import authenticate_user_async, create_access_token
+from auth.services.principal_cache import principal_cache
+from auth.utils.auth_utils import _hash
+from core.config_loader import settings
+from user.models.user import User
+
+
+def count_queries(engine):
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, statement, *args: statements.append(statement))
+    return statements
+
+
+def test_user_lookup_is_cached_between_requests(client, engine, auth_headers):
+    assert client.get("/api/users/me", headers=auth_headers).status_code == 200
+    statements = count_queries(engine)
+    for _ in range(3):
+        assert client.get("/api/users/me", headers=auth_headers).json()["email"] == "reader@example.com"
+    assert statements == []
+    assert principal_cache.hits == 3
+
+
+def test_uid_claim_uses_primary_key_lookup(client, engine, user):
+    token = create_access_token(data={"sub": user.email, "uid": user.id})
+    statements = count_queries(engine)
+    assert client.get("/api/users/me", headers={"Authorization": f"Bearer {token}"}).status_code == 200
+    assert len(statements) == 1
+    assert "users.id =" in statements[0]
+
+
+def test_uid_claim_must_match_subject(client, user):
+    token = create_access_token(data={"sub": "someone-else@example.com", "uid": user.id})
+    assert client.get("/api/users/me", headers={"Authorization": f"Bearer {token}"}).status_code == 401
+
+
+def test_deleting_a_user_invalidates_the_cache(client, user, auth_headers):
+    assert client.get("/api/users/me", headers=auth_headers).status_code == 200
+    assert client.delete(f"/api/users/{user.id}").status_code == 200
+    assert client.get("/api/users/me", headers=auth_headers).status_code == 401
+
+
+def test_cache_hit_still_checks_the_uid_claim(client, db, user, auth_headers):
+    assert client.get("/api/users/me", headers=auth_headers).status_code == 200  # cached by email
+    other = User(email="other@example.com", username="other", password="x")
+    db.add(other)
+    db.commit()
+    token = create_access_token(data={"sub": user.email, "uid": other.id})
+    assert client.get("/api/users/me", headers={"Authorization": f"Bearer {token}"}).status_code == 401
+
+
+def test_user_changes_invalidate_the_cache(client, db, user, auth_headers):
+    assert client.get("/api/users/me", headers=auth_headers).status_code == 200
+    user.is_superuser = True
+    db.commit()
+    assert principal_cache.get(user.email) is None
+    assert client.get("/api/admin/profiles", headers=auth_headers).status_code == 200
+
+
+def test_password_rehash_on_login_invalidates_the_cache(client, db, user, auth_headers):
+    # A hash made with another cost gets upgraded on the next login
+    user.password = _hash("secret", 5 if settings.BCRYPT_ROUNDS == 4 else 4)
+    db.commit()
+    assert client.get("/api/users/me", headers=auth_headers).status_code == 200
+    assert principal_cache.get(user.email) is not None
+    assert asyncio.run(authenticate_user_async(user.email, "secret", db))
+    assert principal_cache.get(user.email) is None
@@ -0,0 +1,46 @@
+import pytest
+
+from auth.utils import auth_utils
+from auth.utils.auth_utils import get_password_hash, password_needs_rehash, verify_password
+from core.config_loader import settings
+from user.models.user import User
+
+
+@pytest.fixture
+def fast_bcrypt(monkeypatch):
+    monkeypatch.setattr(settings, "BCRYPT_ROUNDS", 4)
+
+
+def login(client, password):
+    return client.post("/api/login/access-token", json={"email": "login@example.com", "password": password})
+
+
+def add_user(db, password_hash):
+    user = User(username="login", email="login@example.com", password=password_hash)
+    db.add(user)
+    db.commit()
+    return user
+
+
+def test_login_checks_password_in_the_hash_pool(client, db, fast_bcrypt):
+    add_user(db, get_password_hash("correct horse"))
+    assert login(client, "correct horse").status_code == 200
+    assert login(client, "wrong").status_code == 401
+    assert auth_utils._get_executor() is not None
+
+
+def test_login_rehashes_when_the_cost_changes(client, db, fast_bcrypt, monkeypatch):
+    user = add_user(db, auth_utils._hash("correct horse", 5))
+    assert password_needs_rehash(user.password)
+
+    assert login(client, "correct horse").status_code == 200
+    db.refresh(user)
+    assert user.password.startswith("$2b$04$")
+    assert not password_needs_rehash(user.password)
+    assert verify_password("correct horse", user.password)
+
+
+def test_inline_hashing_when_pool_disabled(monkeypatch, fast_bcrypt):
+    monkeypatch.setattr(settings, "PASSWORD_HASH_WORKERS", 0)
+    monkeypatch.setattr(auth_utils, "_executor", None)
+    assert verify_password("pw", get_password_hash("pw"))
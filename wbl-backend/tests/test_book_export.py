@@ -0,0 +1,41 @@
+import csv
+import gzip
+import io
+import json
+
+from book.models.book import Book
+
+
+def add_books(db, user, library, count):
+    for n in range(count):
+        db.add(Book(isbn=f"978{n:010d}", title=f"Book, {n}", author="Author", library_id=library.id, owner_id=user.id))
+    db.commit()
+
+
+def test_csv_export_streams_every_book(client, db, user, library, auth_headers):
+    add_books(db, user, library, 2500)
+    response = client.get("/api/books/export", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert 'filename="books.csv"' in response.headers["content-disposition"]
+
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 2500
+    assert rows[0]["title"] == "Book, 0"
+    assert rows[-1]["library_id"] == str(library.id)
+
+
+def test_gzipped_ndjson_export(client, db, user, library, auth_headers):
+    add_books(db, user, library, 3)
+    response = client.get("/api/books/export?format=ndjson&compress=true", headers=auth_headers)
+    assert response.headers["content-type"] == "application/gzip"
+
+    lines = gzip.decompress(response.content).decode().splitlines()
+    assert [json.loads(line)["isbn"] for line in lines] == ["9780000000000", "9780000000001", "9780000000002"]
+
+
+def test_export_only_includes_own_books(client, db, library, auth_headers):
+    db.add(Book(isbn="1", title="Not mine", author="Someone", library_id=library.id, owner_id=library.user_id + 1))
+    db.commit()
+    response = client.get("/api/books/export", headers=auth_headers)
+    assert response.text.strip() == "id,isbn,title,author,genre,description,cover_image,library_id"
@@ -0,0 +1,85 @@
+import json
+
+from book.models.book import Book
+
+
+def test_csv_import_reports_bad_rows_and_keeps_the_rest(client, db, library, auth_headers):
+    csv_data = (
+        "isbn,title,author,genre,library_id\n"
+        "978-0-441-17271-9,Dune,Frank Herbert,Sci-Fi,\n"
+        ",Missing ISBN,Someone,,\n"
+        "9780141036144,1984,George Orwell,,999\n"
+        "9780553283686,Hyperion,Dan Simmons,,\n"
+    )
+    response = client.post(
+        f"/api/books/import?library_id={library.id}",
+        files={"file": ("books.csv", csv_data, "text/csv")},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    result = response.json()
+    assert (result["inserted"], result["updated"], result["failed"]) == (2, 0, 2)
+    assert [error["row"] for error in result["errors"]] == [2, 3]
+    assert "library_id" in result["errors"][1]["errors"][0]
+
+    dune = db.query(Book).filter(Book.title == "Dune").one()
+    assert (dune.genre, dune.isbn_normalized, dune.library_id) == ("Sci-Fi", "9780441172719", library.id)
+
+
+def test_jsonl_upsert_is_idempotent(client, db, library, auth_headers):
+    lines = [
+        {"isbn": "9780441172719", "title": "Dune", "author": "Frank Herbert", "library_id": library.id},
+        {"isbn": "9780553283686", "title": "Hyperion", "author": "Dan Simmons", "library_id": library.id},
+    ]
+    upload = "\n".join(json.dumps(line) for line in lines) + "\nnot json\n"
+
+    def run():
+        return client.post(
+            "/api/books/import?upsert=true",
+            files={"file": ("books.jsonl", upload, "application/x-ndjson")},
+            headers=auth_headers,
+        ).json()
+
+    first = run()
+    assert (first["inserted"], first["updated"], first["failed"]) == (2, 0, 1)
+    assert first["errors"][0]["row"] == 3
+
+    lines[0]["title"] = "Dune (Deluxe Edition)"
+    upload = "\n".join(json.dumps(line) for line in lines)
+    second = run()
+    assert (second["inserted"], second["updated"], second["failed"]) == (0, 2, 0)
+    assert db.query(Book).count() == 2
+    assert db.query(Book).filter(Book.isbn == "9780441172719").one().title == "Dune (Deluxe Edition)"
+
+
+def test_partial_upsert_keeps_fields_it_does_not_provide(client, db, user, library, auth_headers):
+    book = Book(
+        isbn="9780441172719", title="Dune", author="Frank Herbert", genre="Sci-Fi", description="Spice",
+        cover_image="https://covers.example/dune.jpg", cover_hash="abc123", library_id=library.id, owner_id=user.id,
+    )
+    db.add(book)
+    db.commit()
+
+    def upsert(line):
+        return client.post(
+            "/api/books/import?upsert=true",
+            files={"file": ("books.jsonl", json.dumps(line), "application/x-ndjson")},
+            headers=auth_headers,
+        ).json()
+
+    line = {"isbn": "9780441172719", "title": "Dune (Deluxe Edition)", "author": "Frank Herbert", "library_id": library.id}
+    assert upsert(line)["updated"] == 1
+    db.refresh(book)
+    assert book.title == "Dune (Deluxe Edition)"
+    assert (book.genre, book.description, book.cover_image, book.cover_hash) == (
+        "Sci-Fi", "Spice", "https://covers.example/dune.jpg", "abc123")
+
+    assert upsert({**line, "cover_image": "https://covers.example/dune-deluxe.jpg"})["updated"] == 1
+    db.refresh(book)
+    assert book.cover_image == "https://covers.example/dune-deluxe.jpg"
+    assert book.cover_hash is None
+
+
+def test_import_requires_login(client):
+    response = client.post("/api/books/import", files={"file": ("books.csv", "isbn\n", "text/csv")})
+    assert response.status_code == 401
@@ -0,0 +1,61 @@
+import pytest
+
+from book.models.book import Book
+from core.pagination import encode_cursor
+
+
+def add_books(db, user, library, titles):
+    for n, title in enumerate(titles):
+        db.add(Book(isbn=f"97800000000{n:02d}", title=title, author="Author", library_id=library.id, owner_id=user.id))
+    db.commit()
+
+
+def next_link(response):
+    link = response.headers.get("Link")
+    if link is None:
+        return None
+    return link[link.index("<") + 1:link.index(">")]
+
+
+def test_cursor_pages_cover_every_book_once(client, db, user, library, auth_headers):
+    titles = ["Dune", "Emma", "Beloved", "Atonement", "Carrie", "Dune"]
+    add_books(db, user, library, titles)
+
+    seen = []
+    url = "/api/books?limit=2"
+    while url:
+        response = client.get(url, headers=auth_headers)
+        assert response.status_code == 200
+        seen.extend((book["title"], book["id"]) for book in response.json())
+        url = next_link(response)
+
+    assert [title for title, _ in seen] == sorted(titles)
+    assert len({book_id for _, book_id in seen}) == len(titles)
+
+
+def test_cursor_page_is_stable_when_earlier_rows_are_inserted(client, db, user, library, auth_headers):
+    add_books(db, user, library, ["B", "C", "D", "E"])
+    first = client.get("/api/books?limit=2", headers=auth_headers)
+    assert [book["title"] for book in first.json()] == ["B", "C"]
+
+    add_books(db, user, library, ["A"])
+    second = client.get(next_link(first), headers=auth_headers)
+    assert [book["title"] for book in second.json()] == ["D", "E"]
+    assert "Link" not in second.headers
+
+
+def test_invalid_cursor_is_rejected(client, auth_headers):
+    response = client.get("/api/books?cursor=not-a-cursor", headers=auth_headers)
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("key", [(None, "x"), ("A", "1"), ("A", True), ("A", 1.5), (["A"], 1)])
+def test_forged_cursor_is_rejected(client, auth_headers, key):
+    response = client.get("/api/books", params={"cursor": encode_cursor(*key)}, headers=auth_headers)
+    assert response.status_code == 400
+
+
+def test_skip_still_supported(client, db, user, library, auth_headers):
+    add_books(db, user, library, ["A", "B", "C"])
+    response = client.get("/api/books?skip=1&limit=1", headers=auth_headers)
+    assert [book["title"] for book in response.json()] == ["B"]
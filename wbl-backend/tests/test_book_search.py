@@ -0,0 +1,44 @@
+from sqlalchemy.dialects import postgresql
+
+from book.models.book import Book
+from book.services.book_search import build_book_search
+from book.utils.isbn_utils import looks_like_isbn, normalize_isbn
+
+
+def add_book(db, user, library, isbn, title, author):
+    db.add(Book(isbn=isbn, title=title, author=author, library_id=library.id, owner_id=user.id))
+    db.commit()
+
+
+def test_normalize_isbn():
+    assert normalize_isbn("978-0-14-103614-4") == "9780141036144"
+    assert normalize_isbn("0 306 40615 x") == "030640615X"
+    assert looks_like_isbn("978-0-14-103614-4")
+    assert not looks_like_isbn("Dune")
+
+
+def test_isbn_normalized_is_filled_on_insert(db, user, library):
+    add_book(db, user, library, "978-0-14-103614-4", "1984", "George Orwell")
+    assert db.query(Book).one().isbn_normalized == "9780141036144"
+
+
+def test_search_matches_title_author_and_formatted_isbn(client, db, user, library, auth_headers):
+    add_book(db, user, library, "9780141036144", "Nineteen Eighty-Four", "George Orwell")
+    add_book(db, user, library, "9780441172719", "Dune", "Frank Herbert")
+
+    def titles(term):
+        response = client.get("/api/books", params={"search": term}, headers=auth_headers)
+        assert response.status_code == 200
+        return [book["title"] for book in response.json()]
+
+    assert titles("eighty") == ["Nineteen Eighty-Four"]
+    assert titles("herbert") == ["Dune"]
+    assert titles("978-0-441-17271-9") == ["Dune"]
+
+
+def test_postgres_search_uses_full_text_and_trigram_operators():
+    search = build_book_search("postgresql", "dune")
+    sql = str(search.condition.compile(dialect=postgresql.dialect()))
+    assert "books.search_vector @@" in sql
+    assert "books.title %" in sql
+    assert search.rank is not None
@@ -0,0 +1,44 @@
+import json
+
+from fastapi.responses import JSONResponse
+from sqlalchemy import insert
+
+from book.models.book import Book
+from book.schemas.book import BookResponseWithId
+from core.responses import FastJSONResponse
+
+
+def add_books(db, user, library, count):
+    db.execute(insert(Book), [
+        {"isbn": f"978{n:010d}", "title": f"Bøok {n}", "author": "Author", "genre": "Genre" if n % 2 else None,
+         "description": None, "library_id": library.id, "owner_id": user.id}
+        for n in range(count)
+    ])
+    db.commit()
+
+
+def test_row_listing_matches_the_validated_schema(client, db, user, library, auth_headers):
+    add_books(db, user, library, 30)
+    expected = [BookResponseWithId.model_validate(book).model_dump(mode="json")
+                for book in db.query(Book).order_by(Book.title, Book.id).limit(20)]
+
+    response = client.get("/api/books", params={"limit": 10}, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json() == expected[:10]
+    assert list(response.json()[0]) == list(BookResponseWithId.model_fields)[:-1]  # same key order, no library
+    assert "ETag" in response.headers and 'rel="next"' in response.headers["Link"]
+
+    offset = client.get("/api/books", params={"limit": 10, "skip": 10}, headers=auth_headers)
+    assert offset.json() == expected[10:20]
+
+
+def test_embedded_listing_still_goes_through_the_schema(client, db, user, library, auth_headers):
+    add_books(db, user, library, 3)
+    books = client.get("/api/books", params={"embed": "library"}, headers=auth_headers).json()
+    assert books[0]["library"] == {"name": library.name, "id": library.id, "user_id": user.id}
+
+
+def test_fast_json_response_renders_like_json_response():
+    content = [{"title": "Bøok", "genre": None, "id": 1, "nested": {"ok": True}}]
+    assert json.loads(FastJSONResponse(content).body) == json.loads(JSONResponse(content).body)
+    assert FastJSONResponse(content).headers["content-type"] == "application/json"
@@ -0,0 +1,82 @@
+import asyncio
+import threading
+
+import pytest
+from starlette.websockets import WebSocketDisconnect
+
+import sync.routes.events_router as events_router
+from auth.models.principal import AuthenticatedUser
+from core.events import ChangeEvent, EventBroker
+
+
+def test_broker_delivers_events_published_from_other_threads():
+    async def scenario():
+        broker = EventBroker()
+        await broker.start()
+        mine = broker.subscribe(lambda event: event.owner_id == 1)
+        everyone = broker.subscribe(lambda event: True)
+
+        # Sync services publish from threadpool threads
+        event = ChangeEvent(entity="book", action="created", id=7, owner_id=2)
+        thread = threading.Thread(target=broker.publish, args=(event,))
+        thread.start()
+        thread.join()
+        broker.publish(ChangeEvent(entity="book", action="updated", id=8, owner_id=1))
+
+        assert (await everyone.get(1)).id == 7
+        assert (await everyone.get(1)).id == 8
+        assert (await mine.get(1)).id == 8
+        assert await mine.get(0.01) is None
+        await broker.stop()
+
+    asyncio.run(scenario())
+
+
+def test_sse_stream_formats_events_and_asks_slow_clients_to_resync(monkeypatch):
+    broker = EventBroker(max_queued=2)
+    monkeypatch.setattr(events_router, "event_broker", broker)
+
+    async def scenario():
+        await broker.start()
+        stream = events_router.sse_stream(AuthenticatedUser(id=1, username="reader", email="reader@example.com"))
+        assert await stream.__anext__() == "retry: 3000\n\n"
+        first = asyncio.ensure_future(stream.__anext__())
+        await asyncio.sleep(0)  # let the stream subscribe
+
+        for n in range(5):
+            broker.publish(ChangeEvent(entity="book", action="updated", id=n, owner_id=1, revision=10 + n))
+        await asyncio.sleep(0.01)
+
+        assert (await first).startswith("id: 10\nevent: book.updated\ndata: {")
+        assert (await stream.__anext__()).startswith("id: 11\n")
+        assert await stream.__anext__() == "event: resync\ndata: {}\n\n"
+        await broker.stop()
+
+    asyncio.run(scenario())
+
+
+def test_websocket_feed_pushes_changes_the_user_can_see(client, user, library, auth_headers):
+    token = auth_headers["Authorization"].split()[1]
+    with client.websocket_connect(f"/api/events/ws?access_token={token}") as websocket:
+        created = client.post("/api/books", json={
+            "isbn": "9780441172719", "title": "Dune", "author": "Frank Herbert", "library_id": library.id,
+        }, headers=auth_headers).json()
+        event = websocket.receive_json()
+        assert event["type"] == "book.created"
+        assert event["id"] == created["id"]
+        assert event["library_id"] == library.id
+        assert event["revision"] > 0
+
+        client.put(f"/api/libraries/{library.id}", json={"name": "Den"}, headers=auth_headers)
+        assert websocket.receive_json()["type"] == "library.updated"
+
+        client.delete(f"/api/books/{created['id']}", headers=auth_headers)
+        event = websocket.receive_json()
+        assert (event["type"], event["id"]) == ("book.deleted", created["id"])
+
+
+def test_feed_requires_a_token(client):
+    with pytest.raises(WebSocketDisconnect):
+        with client.websocket_connect("/api/events/ws") as websocket:
+            websocket.receive_json()
+    assert client.get("/api/events").status_code == 401
@@ -0,0 +1,97 @@
+import gzip
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from book.models.book import Book
+from core.compression import CompressionMiddleware, negotiate
+
+BIG = {"books": [{"title": f"Title {n}", "author": "Author"} for n in range(200)]}
+
+
+def chunks():
+    for n in range(5):
+        yield f"{n},row\n" * 100
+
+
+@pytest.fixture
+def app_client():
+    app = Starlette(routes=[
+        Route("/big", lambda request: JSONResponse(BIG)),
+        Route("/small", lambda request: JSONResponse({"ok": True})),
+        Route("/stream", lambda request: StreamingResponse(chunks(), media_type="text/csv")),
+        Route("/events", lambda request: StreamingResponse(iter(["data: x\n\n" * 500]), media_type="text/event-stream")),
+        Route("/encoded", lambda request: Response(gzip.compress(b"x" * 5000), media_type="application/json",
+                                                   headers={"Content-Encoding": "gzip"})),
+        Route("/image", lambda request: Response(b"\x89PNG" * 1000, media_type="image/png")),
+    ])
+    app.add_middleware(CompressionMiddleware, encodings=["zstd", "br", "gzip"], minimum_size=500,
+                       content_types=["application/json", "text/csv"])
+    return TestClient(app)
+
+
+def raw_get(client, url, accept_encoding="gzip"):
+    # Read the body undecoded so we see what went over the wire
+    with client.stream("GET", url, headers={"Accept-Encoding": accept_encoding}) as response:
+        return response, b"".join(response.iter_raw())
+
+
+def test_large_json_is_gzipped(app_client):
+    response, body = raw_get(app_client, "/big")
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["content-length"] == str(len(body))
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert json.loads(gzip.decompress(body)) == BIG
+
+
+def test_small_and_unwanted_responses_pass_through(app_client):
+    response, body = raw_get(app_client, "/small")
+    assert "content-encoding" not in response.headers and json.loads(body) == {"ok": True}
+
+    response, body = raw_get(app_client, "/big", accept_encoding="identity")
+    assert "content-encoding" not in response.headers and json.loads(body) == BIG
+    assert "Accept-Encoding" in response.headers["vary"]
+
+    response, body = raw_get(app_client, "/big", accept_encoding="gzip;q=0")
+    assert "content-encoding" not in response.headers
+
+
+def test_other_content_types_and_encoded_bodies_are_left_alone(app_client):
+    for url in ("/events", "/image"):
+        response, _ = raw_get(app_client, url)
+        assert "content-encoding" not in response.headers, url
+    response, body = raw_get(app_client, "/encoded")
+    assert response.headers["content-encoding"] == "gzip"
+    assert gzip.decompress(body) == b"x" * 5000  # compressed once, not twice
+
+
+def test_streaming_responses_are_compressed_chunk_by_chunk(app_client):
+    response, body = raw_get(app_client, "/stream")
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert gzip.decompress(body).decode() == "".join(chunks())
+
+
+def test_negotiation():
+    assert negotiate("gzip, deflate, br", ["zstd", "br", "gzip"]) == "br"
+    assert negotiate("gzip;q=1.0, br;q=0.5", ["br", "gzip"]) == "gzip"
+    assert negotiate("*", ["br", "gzip"]) == "br"
+    assert negotiate("identity", ["gzip"]) is None
+    assert negotiate("", ["gzip"]) is None
+
+
+def test_book_listing_is_compressed(client, db, user, library, auth_headers):
+    db.execute(insert(Book), [
+        {"isbn": f"978{n:010d}", "title": f"Book {n}", "author": "Author", "library_id": library.id, "owner_id": user.id}
+        for n in range(100)
+    ])
+    db.commit()
+    response = client.get("/api/books", headers={**auth_headers, "Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert len(response.json()) == 100  # httpx decodes it
+    assert "ETag" in response.headers
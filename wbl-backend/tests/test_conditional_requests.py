@@ -0,0 +1,109 @@
+from datetime import datetime, timedelta, timezone
+
+from book.models.book import Book
+from library.models.library import Library
+
+
+def add_book(db, user, library, title, isbn="9780000000001"):
+    book = Book(isbn=isbn, title=title, author="Author", library_id=library.id, owner_id=user.id)
+    db.add(book)
+    db.commit()
+    return book
+
+
+def test_unchanged_book_listing_is_a_304_after_one_query(client, query_budget, db, user, library, auth_headers):
+    add_book(db, user, library, "Dune")
+    first = client.get("/api/books", headers=auth_headers)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert first.headers["Last-Modified"]
+    assert first.headers["Cache-Control"] == "private, no-cache"
+
+    # The user is cached after the first request; only the version query remains
+    with query_budget(1) as statements:
+        second = client.get("/api/books", headers={**auth_headers, "If-None-Match": etag})
+    assert second.status_code == 304
+    assert second.content == b""
+    assert second.headers["ETag"] == etag
+    assert "count" in statements[0].lower()
+
+
+def test_book_listing_etag_changes_on_add_edit_and_delete(client, db, user, library, auth_headers):
+    book = add_book(db, user, library, "Dune")
+    etags = [client.get("/api/books", headers=auth_headers).headers["ETag"]]
+
+    add_book(db, user, library, "Emma", isbn="9780000000002")
+    etags.append(client.get("/api/books", headers=auth_headers).headers["ETag"])
+
+    client.put(f"/api/books/{book.id}", json={"title": "Dune Messiah"}, headers=auth_headers)
+    etags.append(client.get("/api/books", headers=auth_headers).headers["ETag"])
+
+    client.delete(f"/api/books/{book.id}", headers=auth_headers)
+    response = client.get("/api/books", headers={**auth_headers, "If-None-Match": etags[-1]})
+    assert response.status_code == 200
+    etags.append(response.headers["ETag"])
+
+    assert len(set(etags)) == 4
+    # Different pages of the same collection are different representations
+    assert client.get("/api/books?limit=1", headers=auth_headers).headers["ETag"] not in etags
+
+
+def test_book_listing_with_embedded_libraries_changes_when_a_library_is_renamed(client, db, user, library, auth_headers):
+    add_book(db, user, library, "Dune")
+    first = client.get("/api/books?embed=library", headers=auth_headers)
+    assert first.json()[0]["library"]["name"] == library.name
+    assert client.get("/api/books?embed=library", headers={**auth_headers, "If-None-Match": first.headers["ETag"]}).status_code == 304
+
+    client.put(f"/api/libraries/{library.id}", json={"name": "Den"}, headers=auth_headers)
+    response = client.get("/api/books?embed=library", headers={**auth_headers, "If-None-Match": first.headers["ETag"]})
+    assert response.status_code == 200
+    assert response.json()[0]["library"]["name"] == "Den"
+
+
+def test_library_listing_supports_if_modified_since(client, library, auth_headers):
+    first = client.get("/api/libraries", headers=auth_headers)
+    assert first.status_code == 200
+    last_modified = first.headers["Last-Modified"]
+
+    assert client.get("/api/libraries", headers={**auth_headers, "If-Modified-Since": last_modified}).status_code == 304
+    assert client.get("/api/libraries", headers={**auth_headers, "If-None-Match": first.headers["ETag"]}).status_code == 304
+    # If-None-Match wins over If-Modified-Since
+    stale = {**auth_headers, "If-None-Match": 'W/"stale"', "If-Modified-Since": last_modified}
+    assert client.get("/api/libraries", headers=stale).status_code == 200
+
+    client.put(f"/api/libraries/{library.id}", json={"name": "Den"}, headers=auth_headers)
+    response = client.get("/api/libraries", headers={**auth_headers, "If-None-Match": first.headers["ETag"]})
+    assert response.status_code == 200
+    assert response.json()[0]["name"] == "Den"
+
+
+def an_hour_ago(db, *rows):
+    # HTTP dates have one second resolution; keep the delete clearly newer than the listing
+    for row in rows:
+        row.updated_at = datetime.now(timezone.utc) - timedelta(hours=1)
+    db.commit()
+
+
+def test_deleting_a_book_moves_last_modified_forward(client, db, user, library, auth_headers):
+    dune = add_book(db, user, library, "Dune")
+    emma = add_book(db, user, library, "Emma", isbn="9780000000002")
+    an_hour_ago(db, dune, emma)
+    last_modified = client.get("/api/books", headers=auth_headers).headers["Last-Modified"]
+
+    assert client.delete(f"/api/books/{dune.id}", headers=auth_headers).status_code == 204
+    response = client.get("/api/books", headers={**auth_headers, "If-Modified-Since": last_modified})
+    assert response.status_code == 200
+    assert [book["title"] for book in response.json()] == ["Emma"]
+
+
+def test_deleting_a_library_moves_last_modified_forward(client, db, user, library, auth_headers):
+    spare = Library(name="Spare", user_id=user.id)
+    db.add(spare)
+    db.commit()
+    an_hour_ago(db, library, spare)
+    last_modified = client.get("/api/libraries", headers=auth_headers).headers["Last-Modified"]
+
+    assert client.delete(f"/api/libraries/{spare.id}", headers=auth_headers).status_code == 204
+    response = client.get("/api/libraries", headers={**auth_headers, "If-Modified-Since": last_modified})
+    assert response.status_code == 200
+    assert [item["id"] for item in response.json()] == [library.id]
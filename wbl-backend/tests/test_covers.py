@@ -0,0 +1,74 @@
+import hashlib
+
+import pytest
+
+from core.config_loader import settings
+from cover.services import cover_store as cover_store_module
+from cover.services.cover_store import cover_store
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 200
+OTHER_PNG = b"\x89PNG\r\n\x1a\n" + b"\x01" * 200
+
+
+@pytest.fixture
+def covers(openlibrary_stub, tmp_path, monkeypatch):
+    monkeypatch.setattr(cover_store, "root", tmp_path)
+    monkeypatch.setattr(settings, "COVER_FETCH_HOSTS", ["127.0.0.1"])
+    openlibrary_stub.files["/covers/1.png"] = ("image/png", PNG)
+    openlibrary_stub.files["/covers/2.png"] = ("image/png", OTHER_PNG)
+    openlibrary_stub.files["/covers/not-an-image"] = ("text/html", b"<html>nope</html>")
+    return openlibrary_stub
+
+
+def create_book(client, auth_headers, library, cover_image):
+    response = client.post("/api/books", headers=auth_headers, json={
+        "isbn": "9780000000001", "title": "Covered", "author": "Author", "library_id": library.id, "cover_image": cover_image,
+    })
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+def test_cover_is_cached_after_create_and_served_immutable(client, covers, library, auth_headers):
+    book_id = create_book(client, auth_headers, library, f"{covers.url}/covers/1.png")
+    # The download runs as a background task, done by the time the test client returns
+    cover_hash = client.get(f"/api/books/{book_id}", headers=auth_headers).json()["cover_hash"]
+    assert cover_hash == hashlib.sha256(PNG).hexdigest()
+
+    response = client.get(f"/api/covers/{cover_hash}/original")
+    assert response.status_code == 200
+    assert response.content == PNG
+    assert response.headers["content-type"] == "image/png"
+    assert response.headers["cache-control"] == "public, max-age=31536000, immutable"
+
+    partial = client.get(f"/api/covers/{cover_hash}/original", headers={"Range": "bytes=0-7"})
+    assert partial.status_code == 206 and partial.content == PNG[:8]
+
+    etag = response.headers["etag"]
+    assert client.get(f"/api/covers/{cover_hash}/original", headers={"If-None-Match": etag}).status_code == 304
+
+    thumbnail = client.get(f"/api/covers/{cover_hash}/medium")
+    assert thumbnail.status_code == 200
+    if cover_store_module.Image is None:
+        assert thumbnail.content == PNG  # no thumbnails without Pillow
+
+
+def test_changing_the_cover_replaces_the_cached_copy(client, covers, library, auth_headers):
+    book_id = create_book(client, auth_headers, library, f"{covers.url}/covers/1.png")
+    response = client.put(f"/api/books/{book_id}", headers=auth_headers, json={"cover_image": f"{covers.url}/covers/2.png"})
+    assert response.status_code == 200
+    assert client.get(f"/api/books/{book_id}", headers=auth_headers).json()["cover_hash"] == hashlib.sha256(OTHER_PNG).hexdigest()
+
+
+def test_covers_that_cant_be_cached_keep_the_link(client, covers, library, auth_headers, monkeypatch):
+    book_id = create_book(client, auth_headers, library, f"{covers.url}/covers/not-an-image")
+    assert client.get(f"/api/books/{book_id}", headers=auth_headers).json()["cover_hash"] is None
+
+    monkeypatch.setattr(settings, "COVER_FETCH_HOSTS", ["covers.openlibrary.org"])
+    book_id = create_book(client, auth_headers, library, f"{covers.url}/covers/1.png")
+    assert client.get(f"/api/books/{book_id}", headers=auth_headers).json()["cover_hash"] is None
+
+
+def test_unknown_covers_are_404(client, covers):
+    assert client.get(f"/api/covers/{'0' * 64}/small").status_code == 404
+    assert client.get("/api/covers/../../etc/passwd/original").status_code == 404
+    assert client.get(f"/api/covers/{'0' * 64}/huge").status_code == 422
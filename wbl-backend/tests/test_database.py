@@ -0,0 +1,30 @@
+import asyncio
+import threading
+
+from core.database import async_variant, get_db, get_session, run_db
+from library.services.library_service import AsyncLibraryService
+
+
+def test_sync_mode_session_dependency_is_get_db():
+    # Overrides of get_db in tests and scripts must keep applying to every route
+    assert get_session is get_db
+
+
+def test_run_db_runs_sync_session_work_off_the_event_loop(db):
+    loop_thread = threading.get_ident()
+
+    def work(session, value):
+        assert session is db
+        return threading.get_ident(), value
+
+    thread_id, value = asyncio.run(run_db(db, work, 42))
+    assert value == 42
+    assert thread_id != loop_thread
+
+
+def test_async_variant_matches_sync_service(db, library):
+    libraries = asyncio.run(AsyncLibraryService.get_libraries(db, user_id=library.user_id))
+    assert [lib.id for lib in libraries] == [library.id]
+
+    double = async_variant(lambda session, x: x * 2)
+    assert asyncio.run(double(db, 21)) == 42
@@ -0,0 +1,61 @@
+import threading
+
+import pytest
+from sqlalchemy import create_engine, exc, text
+
+from core.database import InstrumentedQueuePool, _engine_options, instrument_pool
+
+
+@pytest.fixture
+def pooled_engine(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=1,
+        pool_timeout=0.2,
+    )
+    yield engine
+    engine.dispose()
+
+
+def test_pool_stats_track_usage_overflow_and_timeouts(pooled_engine):
+    stats = instrument_pool(pooled_engine, "test")
+
+    first = pooled_engine.connect()
+    second = pooled_engine.connect()  # overflow connection
+    with pytest.raises(exc.TimeoutError):
+        pooled_engine.connect()
+    snapshot = stats.snapshot()
+    assert snapshot["in_use"] == 2
+    assert snapshot["in_use_peak"] == 2
+    assert snapshot["overflow_peak"] == 1
+    assert snapshot["timeouts"] == 1
+    assert snapshot["checkouts"] == 2
+
+    # A checkout that has to wait for a connection to come back shows up as wait time
+    threading.Timer(0.05, second.close).start()
+    third = pooled_engine.connect()
+    assert stats.wait_seconds_max >= 0.04
+    third.close()
+    first.close()
+    assert stats.snapshot()["in_use"] == 0
+    assert sum(stats.snapshot()["wait_buckets"].values()) == 3
+
+
+def test_pool_stats_survive_dispose(pooled_engine):
+    stats = instrument_pool(pooled_engine, "test")
+    pooled_engine.dispose()
+    with pooled_engine.connect() as connection:
+        connection.execute(text("select 1"))
+    assert stats.checkouts == 1
+    assert stats.in_use_peak == 1
+
+
+def test_statement_timeout_is_sent_as_a_connect_option(monkeypatch):
+    from core.config_loader import settings
+
+    monkeypatch.setattr(settings, "DB_STATEMENT_TIMEOUT_MS", 5000)
+    assert _engine_options()["connect_args"] == {"options": "-c statement_timeout=5000"}
+    monkeypatch.setattr(settings, "DB_STATEMENT_TIMEOUT_MS", 0)
+    assert "connect_args" not in _engine_options()
@@ -0,0 +1,93 @@
+import pytest
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.orm import sessionmaker
+
+from core.database import Base, get_db
+from core.db_routing import ReadYourWrites, ReplicaSet, RoutingSession, current_user_id
+from library.models.library import Library
+from main import app
+
+
+def _sqlite_engine(path, name):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        connection.execute(insert(Library), {"name": name, "user_id": 1})
+    return engine
+
+
+@pytest.fixture
+def databases(tmp_path):
+    """A primary and two replicas, told apart by the one library each holds"""
+    engines = [_sqlite_engine(tmp_path / f"{name}.db", name) for name in ("primary", "replica-a", "replica-b")]
+    yield engines
+    for engine in engines:
+        engine.dispose()
+
+
+def _library_names(session):
+    return [library.name for library in session.query(Library).order_by(Library.id)]
+
+
+def test_only_read_only_sessions_use_replicas(databases):
+    primary, *replica_engines = databases
+    factory = sessionmaker(class_=RoutingSession, bind=primary, replicas=ReplicaSet(replica_engines))
+
+    with factory() as session:
+        assert _library_names(session) == ["primary"]
+    with factory(read_only=True) as session:
+        assert _library_names(session) in (["replica-a"], ["replica-b"])
+
+
+def test_round_robin_and_least_connections(databases):
+    _, replica_a, replica_b = databases
+    round_robin = ReplicaSet([replica_a, replica_b])
+    assert [round_robin.pick() for _ in range(4)] == [replica_a, replica_b, replica_a, replica_b]
+
+    least_connections = ReplicaSet([replica_a, replica_b], balancing="least_connections")
+    with replica_a.connect():
+        assert least_connections.pick() is replica_b
+
+
+def test_writes_go_to_primary_and_stick_the_users_reads_there(databases):
+    primary, *replica_engines = databases
+    tracker = ReadYourWrites(window_seconds=60)
+    factory = sessionmaker(class_=RoutingSession, bind=primary, replicas=ReplicaSet(replica_engines), read_your_writes=tracker)
+
+    token = current_user_id.set(1)
+    try:
+        # Even a read-only session never sends a flush to a replica
+        with factory(read_only=True) as session:
+            session.add(Library(name="Study", user_id=1))
+            session.commit()
+        with primary.connect() as connection:
+            assert connection.execute(text("SELECT count(*) FROM libraries WHERE name = 'Study'")).scalar() == 1
+
+        # The writer reads their own write from the primary...
+        with factory(read_only=True) as session:
+            assert _library_names(session) == ["primary", "Study"]
+    finally:
+        current_user_id.reset(token)
+
+    # ...while everyone else keeps using the replicas
+    token = current_user_id.set(2)
+    try:
+        with factory(read_only=True) as session:
+            assert "Study" not in _library_names(session)
+    finally:
+        current_user_id.reset(token)
+
+
+def test_writes_through_the_api_are_attributed_to_the_user(client, session_factory, user, auth_headers):
+    tracker = ReadYourWrites(window_seconds=60)
+    factory = sessionmaker(class_=RoutingSession, bind=session_factory.kw["bind"], read_your_writes=tracker)
+
+    def override_get_db():
+        with factory() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    response = client.post("/api/libraries", json={"name": "Kitchen"}, headers=auth_headers)
+    assert response.status_code == 201
+    assert tracker.recently_wrote(user.id)
+    assert not tracker.recently_wrote(user.id + 1)
@@ -0,0 +1,87 @@
+import pytest
+from sqlalchemy import text
+
+from core.config_loader import settings
+from core.database import pool_stats
+from health.services.health_service import readiness_probe
+
+
+@pytest.fixture(autouse=True)
+def fresh_probe():
+    readiness_probe.clear()
+    yield
+    readiness_probe.clear()
+
+
+def set_schema_revision(db, revision):
+    db.execute(text("CREATE TABLE alembic_version (version_num VARCHAR(32) NOT NULL)"))
+    db.execute(text("INSERT INTO alembic_version VALUES (:revision)"), {"revision": revision})
+    db.commit()
+
+
+def test_liveness(client):
+    response = client.get("/health/live")
+    assert response.status_code == 200
+    assert response.json() == {"status": "ok"}
+
+
+def test_readiness_reports_each_dependency(client):
+    response = client.get("/health/ready")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "ok" and body["cached"] is False
+    assert body["checks"]["database"]["status"] == "ok"
+    assert body["checks"]["database"]["latency_ms"] >= 0
+    assert body["checks"]["pool"]["status"] == "ok"
+    # create_all databases have no alembic_version table
+    assert body["checks"]["migrations"]["status"] == "unknown"
+    assert body["checks"]["upstreams"] == {"status": "ok", "latency_ms": body["checks"]["upstreams"]["latency_ms"], "hosts": {}}
+
+
+def test_readiness_is_cached(client, query_budget):
+    client.get("/health/ready")
+    with query_budget(0):
+        body = client.get("/health/ready").json()
+    assert body["cached"] is True
+
+
+def test_exhausted_pool_fails_readiness_without_touching_the_database(client, query_budget, monkeypatch):
+    monkeypatch.setattr(pool_stats["sync"], "in_use", settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW)
+    monkeypatch.setattr(pool_stats["sync"], "size", settings.DB_POOL_SIZE)
+    with query_budget(0):
+        response = client.get("/health/ready")
+    assert response.status_code == 503
+    checks = response.json()["checks"]
+    assert checks["pool"]["status"] == "fail" and checks["pool"]["saturation"] == 1.0
+    assert checks["database"]["status"] == "fail"
+
+
+def test_schema_behind_the_code_fails_readiness(client, db):
+    set_schema_revision(db, "ebc0d6244061")  # the first migration
+    response = client.get("/health/ready")
+    assert response.status_code == 503
+    assert response.json()["checks"]["migrations"]["current"] == "ebc0d6244061"
+
+
+def test_schema_at_head_or_newer_stays_ready(client, db):
+    set_schema_revision(db, "f9c1d3e5a7b0")
+    migrations = client.get("/health/ready").json()["checks"]["migrations"]
+    assert migrations["status"] == "ok" and migrations["head"] == "f9c1d3e5a7b0"
+
+    readiness_probe.clear()
+    db.execute(text("UPDATE alembic_version SET version_num = 'from-a-newer-deploy'"))
+    db.commit()
+    response = client.get("/health/ready")
+    assert response.status_code == 200
+    assert response.json()["checks"]["migrations"]["status"] == "degraded"
+
+
+def test_open_circuit_breaker_degrades_readiness(client):
+    breaker = client.app.state.http_client.breaker_for("openlibrary.org")
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    response = client.get("/health/ready")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "degraded"
+    assert body["checks"]["upstreams"]["hosts"]["openlibrary.org"]["state"] == "open"
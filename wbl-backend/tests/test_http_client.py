@@ -0,0 +1,121 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from core.http_client import CircuitBreaker, ResilientHttpClient, UpstreamUnavailableError
+
+
+def test_transient_upstream_errors_are_retried(client, openlibrary_stub):
+    openlibrary_stub.add_book("9780441172719", "Dune", ["Frank Herbert"])
+    openlibrary_stub.failures_left = 1
+    response = client.get("/api/books/details/9780441172719")
+    assert response.status_code == 200
+    assert len(openlibrary_stub.requests) == 2
+
+
+def test_outages_return_503_and_open_the_breaker(client, openlibrary_stub):
+    openlibrary_stub.failures_left = 1000
+    client.app.state.http_client.retry_backoff_seconds = 0
+    breaker = client.app.state.http_client.breaker_for("127.0.0.1")
+    for _ in range(breaker.failure_threshold):
+        assert client.get("/api/books/details/9780441172719").status_code == 503
+    requests_before = len(openlibrary_stub.requests)
+
+    # Open breaker: fail fast without touching the upstream, and don't cache the failure
+    assert client.get("/api/books/details/9780441172719").status_code == 503
+    assert len(openlibrary_stub.requests) == requests_before
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_breaker_half_opens_after_cool_down():
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=0.01)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    time.sleep(0.02)
+    assert breaker.allow()  # one trial call
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def make_client(handler, **overrides) -> ResilientHttpClient:
+    options = dict(timeout_seconds=0.05, max_connections=4, max_concurrency_per_host=1, max_retries=0,
+                   retry_backoff_seconds=0, breaker_failure_threshold=1, breaker_reset_seconds=0)
+    options.update(overrides)
+    http_client = ResilientHttpClient(**options)
+    http_client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return http_client
+
+
+def test_half_open_trial_is_released_when_it_ends_without_a_verdict():
+    def too_many_redirects(request):
+        raise httpx.TooManyRedirects("redirect loop", request=request)
+
+    async def scenario():
+        http_client = make_client(too_many_redirects)
+        breaker = http_client.breaker_for("upstream.test")
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        with pytest.raises(httpx.TooManyRedirects):
+            await http_client.get("http://upstream.test/book")
+        assert breaker.allow()  # the next trial isn't locked out
+        breaker.release_trial()
+
+        async def slow(request):
+            await asyncio.sleep(1)
+        http_client._client = httpx.AsyncClient(transport=httpx.MockTransport(slow))
+        task = asyncio.create_task(http_client.get("http://upstream.test/book"))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert breaker.allow()
+
+    asyncio.run(scenario())
+
+
+def test_call_from_before_the_breaker_opened_leaves_the_trial_alone():
+    async def handler(request):
+        if request.url.path == "/stale":
+            await asyncio.sleep(0.05)
+            raise httpx.TooManyRedirects("redirect loop", request=request)
+        await asyncio.sleep(0.2)
+        return httpx.Response(200)
+
+    async def scenario():
+        http_client = make_client(handler, max_concurrency_per_host=2, timeout_seconds=1)
+        breaker = http_client.breaker_for("upstream.test")
+        stale = asyncio.create_task(http_client.get("http://upstream.test/stale"))  # let through while closed
+        await asyncio.sleep(0.01)
+        breaker.record_failure()
+        trial = asyncio.create_task(http_client.get("http://upstream.test/trial"))
+        await asyncio.sleep(0.01)
+        with pytest.raises(httpx.TooManyRedirects):
+            await stale
+        assert breaker.allow() is None  # still one trial at a time
+        assert (await trial).status_code == 200
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    asyncio.run(scenario())
+
+
+def test_local_concurrency_limit_does_not_trip_the_breaker():
+    async def slow(request):
+        await asyncio.sleep(0.2)
+        return httpx.Response(200)
+
+    async def scenario():
+        http_client = make_client(slow)
+        first = asyncio.create_task(http_client.get("http://upstream.test/book"))
+        await asyncio.sleep(0.01)
+        with pytest.raises(UpstreamUnavailableError, match="Too many requests in flight"):
+            await http_client.get("http://upstream.test/book")
+        assert http_client.breaker_for("upstream.test").failures == 0
+        assert (await first).status_code == 200
+
+    asyncio.run(scenario())
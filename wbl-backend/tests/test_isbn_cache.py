@@ -0,0 +1,74 @@
+from book.models.isbn_metadata_cache import IsbnMetadataCache
+from book.services.isbn_cache import MISSING, isbn_cache
+
+
+def test_repeat_lookups_skip_the_network(client, openlibrary_stub):
+    openlibrary_stub.add_book("9780441172719", "Dune", ["Frank Herbert"], cover="https://covers.example/dune.jpg")
+    for _ in range(3):
+        response = client.get("/api/books/details/978-0-441-17271-9")
+        assert response.status_code == 200
+        assert response.json()["title"] == "Dune"
+        assert response.json()["cover_image"] == "https://covers.example/dune.jpg"
+    assert len(openlibrary_stub.requests) == 1
+    assert isbn_cache.stats()["memory_hits"] == 2
+
+
+def test_misses_are_cached_too(client, openlibrary_stub):
+    assert client.get("/api/books/details/0000000000").status_code == 404
+    assert client.get("/api/books/details/0000000000").status_code == 404
+    assert len(openlibrary_stub.requests) == 1
+    assert isbn_cache.stats()["negative_hits"] == 1
+
+
+def test_input_that_is_not_an_isbn_is_not_looked_up(client, db, openlibrary_stub):
+    assert client.get("/api/books/details/not-an-isbn").status_code == 404
+    assert openlibrary_stub.requests == []
+    assert isbn_cache.get_memory("") is MISSING
+    assert db.query(IsbnMetadataCache).count() == 0
+
+
+def test_durable_tier_survives_a_cold_process_cache(client, db, openlibrary_stub):
+    openlibrary_stub.add_book("9780441172719", "Dune", ["Frank Herbert"])
+    client.get("/api/books/details/9780441172719")
+    assert db.get(IsbnMetadataCache, "9780441172719").found
+
+    isbn_cache.clear()  # as if the worker restarted
+    assert client.get("/api/books/details/9780441172719").json()["author"] == "Frank Herbert"
+    assert len(openlibrary_stub.requests) == 1
+    assert isbn_cache.stats()["db_hits"] == 1
+
+
+def test_expired_entries_are_refetched(client, openlibrary_stub, monkeypatch):
+    openlibrary_stub.add_book("9780441172719", "Dune", ["Frank Herbert"])
+    monkeypatch.setattr(isbn_cache, "ttl_seconds", 0)
+    client.get("/api/books/details/9780441172719")
+    client.get("/api/books/details/9780441172719")
+    assert len(openlibrary_stub.requests) == 2
+
+
+def test_batch_dedupes_uses_cache_and_chunks_misses(client, openlibrary_stub):
+    isbns = [f"978000000{n:04d}" for n in range(120)]
+    for isbn in isbns[:100]:
+        openlibrary_stub.add_book(isbn, f"Book {isbn}", ["Someone"])
+    client.get(f"/api/books/details/{isbns[0]}")  # already cached
+
+    response = client.post("/api/books/details:batch", json={"isbns": isbns + [isbns[5], "978-000-000-0001"]})
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [item["isbn"] for item in results] == isbns
+    assert sum(item["status"] == "found" for item in results) == 100
+    assert results[110]["status"] == "not_found"
+    assert results[3]["details"]["title"] == f"Book {isbns[3]}"
+    # 1 single lookup + 119 misses at 50 bibkeys per request
+    assert len(openlibrary_stub.requests) == 1 + 3
+
+    again = client.post("/api/books/details:batch", json={"isbns": isbns})
+    assert again.json()["results"] == results
+    assert len(openlibrary_stub.requests) == 4
+
+
+def test_batch_reports_unavailable_isbns(client, openlibrary_stub):
+    client.app.state.http_client.retry_backoff_seconds = 0
+    openlibrary_stub.failures_left = 1000
+    response = client.post("/api/books/details:batch", json={"isbns": ["9780441172719"]})
+    assert response.json()["results"] == [{"isbn": "9780441172719", "status": "unavailable", "details": None}]
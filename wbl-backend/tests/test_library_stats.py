@@ -0,0 +1,76 @@
+from sqlalchemy import insert
+
+from book.models.book import Book
+from library.models.library import Library
+
+
+def add_books(db, user, library, rows):
+    db.execute(insert(Book), [
+        {"isbn": f"978{library.id:04d}{n:06d}", "title": f"Book {n}", "author": author, "genre": genre,
+         "library_id": library.id, "owner_id": user.id}
+        for n, (author, genre) in enumerate(rows)
+    ])
+    db.commit()
+
+
+def test_stats_are_only_returned_when_asked_for(client, library, auth_headers):
+    listing = client.get("/api/libraries", headers=auth_headers).json()
+    assert "stats" not in listing[0]
+    assert "stats" not in client.get(f"/api/libraries/{library.id}", headers=auth_headers).json()
+
+
+def test_listing_stats(client, db, user, library, auth_headers):
+    other = Library(name="Empty", user_id=user.id)
+    db.add(other)
+    db.commit()
+    add_books(db, user, library, [("Le Guin", "Fantasy"), ("Le Guin", "Science Fiction"),
+                                  ("Tolkien", "Fantasy"), ("Anonymous", None)])
+
+    response = client.get("/api/libraries", params={"include": "stats"}, headers=auth_headers)
+    assert response.status_code == 200
+    by_name = {entry["name"]: entry["stats"] for entry in response.json()}
+    stats = by_name[library.name]
+    assert stats["book_count"] == 4
+    assert stats["distinct_authors"] == 3
+    assert stats["genres"] == {"Fantasy": 2, "Science Fiction": 1}
+    assert stats["last_modified"] is not None
+    assert by_name["Empty"]["book_count"] == 0
+    assert by_name["Empty"]["genres"] == {}
+    assert by_name["Empty"]["last_modified"] is not None  # the library's own updated_at
+
+
+def test_single_library_stats(client, db, user, library, auth_headers):
+    add_books(db, user, library, [("Austen", "Classic"), ("Austen", "Classic")])
+    response = client.get(f"/api/libraries/{library.id}", params={"include": "stats"}, headers=auth_headers)
+    assert response.json()["stats"]["book_count"] == 2
+    assert response.json()["stats"]["distinct_authors"] == 1
+    assert response.json()["stats"]["genres"] == {"Classic": 2}
+
+
+def test_stats_listing_is_a_fixed_number_of_queries(client, db, user, auth_headers, query_budget):
+    for n in range(20):
+        library = Library(name=f"Library {n}", user_id=user.id)
+        db.add(library)
+        db.commit()
+        add_books(db, user, library, [(f"Author {i % 7}", f"Genre {i % 3}") for i in range(25)])
+    client.get("/api/users/me", headers=auth_headers)  # warm the auth cache
+
+    with query_budget(4):  # library version, book version, libraries, stats
+        response = client.get("/api/libraries", params={"include": "stats"}, headers=auth_headers)
+    assert response.status_code == 200
+    assert len(response.json()) == 20
+    assert all(entry["stats"]["book_count"] == 25 for entry in response.json())
+
+
+def test_stats_etag_changes_with_the_books(client, db, user, library, auth_headers):
+    first = client.get("/api/libraries", params={"include": "stats"}, headers=auth_headers)
+    plain = client.get("/api/libraries", headers=auth_headers)
+    assert first.headers["ETag"] != plain.headers["ETag"]
+
+    add_books(db, user, library, [("Pratchett", "Fantasy")])
+    second = client.get("/api/libraries", params={"include": "stats"},
+                        headers={**auth_headers, "If-None-Match": first.headers["ETag"]})
+    assert second.status_code == 200
+    assert second.json()[0]["stats"]["book_count"] == 1
+    # Adding a book doesn't touch the plain listing
+    assert client.get("/api/libraries", headers={**auth_headers, "If-None-Match": plain.headers["ETag"]}).status_code == 304
@@ -0,0 +1,24 @@
+from benchmarks.load_test import compare, percentile, summarize
+
+
+def report(rps, p95, errors=0):
+    return {"scenarios": {"get": {"throughput_rps": rps, "errors": errors,
+                                  "latency_ms": {"p50": 10.0, "p95": p95, "p99": p95 * 2}}}}
+
+
+def test_percentiles_are_nearest_rank():
+    samples = [n / 1000 for n in range(1, 101)]  # 1..100 ms
+    assert percentile(samples, 0.50) == 0.050
+    assert percentile(samples, 0.99) == 0.099
+    summary = summarize(samples, errors=2, seconds=2.0)
+    assert summary["requests"] == 100 and summary["errors"] == 2
+    assert summary["throughput_rps"] == 50.0
+    assert summary["latency_ms"]["p95"] == 95.0
+
+
+def test_compare_flags_regressions_beyond_threshold():
+    assert compare(report(100, 20), report(95, 21), threshold=0.10)["get"]["regressions"] == []
+    slower = compare(report(100, 20), report(80, 30), threshold=0.10)["get"]
+    assert slower["regressions"] == ["throughput_rps", "p95", "p99"]
+    assert slower["change"]["throughput_rps"] == -0.2
+    assert compare(report(100, 20), report(100, 20, errors=3), threshold=0.10)["get"]["regressions"] == ["errors"]
@@ -0,0 +1,66 @@
+import pytest
+
+from core.metrics import Histogram, registry
+
+
+@pytest.fixture(autouse=True)
+def fresh_metrics():
+    registry.clear()
+    yield
+    registry.clear()
+
+
+def scrape(client):
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    return dict(line.rsplit(" ", 1) for line in response.text.splitlines() if not line.startswith("#"))
+
+
+def test_requests_are_recorded_per_route_template(client, library, auth_headers):
+    client.get("/api/books", headers=auth_headers)
+    client.get("/api/libraries/12345", headers=auth_headers)
+    client.get("/no/such/path")
+    samples = scrape(client)
+
+    assert samples['http_requests_total{method="GET",route="/api/books",status="200"}'] == "1"
+    assert samples['http_requests_total{method="GET",route="/api/libraries/{library_id}",status="404"}'] == "1"
+    assert samples['http_requests_total{method="GET",route="unmatched",status="404"}'] == "1"
+    assert samples['http_request_duration_seconds_count{method="GET",route="/api/books"}'] == "1"
+    assert int(samples['http_response_size_bytes_sum{method="GET",route="/api/books"}']) > 0
+    # The listing runs its version query and the page query
+    assert int(samples['db_queries_per_request_sum{method="GET",route="/api/books"}']) >= 2
+    assert float(samples['db_query_seconds_per_request_sum{method="GET",route="/api/books"}']) > 0
+    assert samples['http_requests_in_progress{method="GET"}'] == "1"  # the scrape itself
+
+
+def test_openlibrary_calls_are_recorded(client, openlibrary_stub):
+    openlibrary_stub.add_book("9780140328721", "Matilda", ["Roald Dahl"])
+    assert client.get("/api/books/details/9780140328721").status_code == 200
+    openlibrary_stub.failures_left = 10
+    client.get("/api/books/details/9780000000002")
+    samples = scrape(client)
+
+    assert samples['upstream_requests_total{host="127.0.0.1",outcome="2xx"}'] == "1"
+    assert samples['upstream_requests_total{host="127.0.0.1",outcome="error"}'] == "1"
+    assert samples['upstream_request_duration_seconds_count{host="127.0.0.1"}'] == "2"
+
+
+def test_collected_gauges_are_exposed(client, auth_headers):
+    samples = scrape(client)
+    assert 'auth_cache_lookups_total{result="hit"}' in samples
+    assert "change_feed_subscribers" in samples
+    assert "isbn_cache_memory_entries" in samples
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("demo_seconds", "Demo", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        histogram.observe(("/x",), value)
+    assert histogram.render() == [
+        'demo_seconds_bucket{route="/x",le="0.1"} 1',
+        'demo_seconds_bucket{route="/x",le="1"} 3',
+        'demo_seconds_bucket{route="/x",le="+Inf"} 4',
+        'demo_seconds_sum{route="/x"} 4.05',
+        'demo_seconds_count{route="/x"} 4',
+    ]
@@ -0,0 +1,104 @@
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from auth.services.auth_service import create_access_token, current_principal
+from auth.services.principal_cache import principal_cache
+from core.database import get_db
+from core.profiling import ProfileStore, ProfilingMiddleware, profile_store
+from main import app
+from user.models.user import User
+
+
+def is_admin():
+    return getattr(current_principal.get(), "is_superuser", False)
+
+
+@pytest.fixture
+def profiled(session_factory):
+    """A client for the app wrapped in the profiler, which main.py only installs when PROFILING_ENABLED"""
+    def override_get_db():
+        session = session_factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    def make(**options):
+        return TestClient(ProfilingMiddleware(app, is_admin=is_admin, **options))
+
+    app.dependency_overrides[get_db] = override_get_db
+    principal_cache.clear()
+    profile_store.clear()
+    yield make
+    profile_store.clear()
+    app.dependency_overrides.pop(get_db, None)
+
+
+@pytest.fixture
+def admin_headers(db):
+    admin = User(username="admin", email="admin@example.com", password="not-a-real-hash", is_superuser=True)
+    db.add(admin)
+    db.commit()
+    return {"Authorization": f"Bearer {create_access_token(data={'sub': admin.email})}"}
+
+
+def test_admin_can_profile_a_request(profiled, library, admin_headers):
+    client = profiled()
+    response = client.get("/api/books", headers={**admin_headers, "X-Profile": "1"})
+    assert response.status_code == 200
+    profile_id = response.headers["X-Profile-Id"]
+
+    listing = client.get("/api/admin/profiles", headers=admin_headers).json()
+    assert [capture["id"] for capture in listing] == [int(profile_id)]
+    assert listing[0]["reason"] == "requested" and listing[0]["path"] == "/api/books"
+
+    capture = client.get(f"/api/admin/profiles/{profile_id}", headers=admin_headers).json()
+    assert capture["status"] == 200
+    selects = [s for s in capture["sql"] if s["statement"].lstrip().upper().startswith("SELECT")]
+    assert selects and all(s["duration_ms"] >= 0 for s in selects)
+    # SQLite's EXPLAIN QUERY PLAN rows, e.g. "... | SCAN books"
+    assert all(s["plan"] for s in selects)
+    assert "folded" in capture["profile"] and "top_self" in capture["profile"]
+
+
+def test_profile_header_is_ignored_for_other_users(profiled, library, auth_headers):
+    client = profiled()
+    response = client.get("/api/books", headers={**auth_headers, "X-Profile": "1"})
+    assert response.status_code == 200
+    assert "X-Profile-Id" not in response.headers
+    assert profile_store.list() == []
+    assert client.get("/api/admin/profiles", headers=auth_headers).status_code == 403
+
+
+def test_sampled_requests_are_kept_only_when_slow(profiled, library, auth_headers):
+    profiled(sample_rate=1.0, slow_seconds=60).get("/api/books", headers=auth_headers)
+    assert profile_store.list() == []
+
+    response = profiled(sample_rate=1.0, slow_seconds=0).get("/api/books", headers=auth_headers)
+    assert "X-Profile-Id" not in response.headers
+    [capture] = profile_store.list()
+    assert capture.reason == "sampled" and capture.statements
+
+
+def test_sampler_records_threadpool_work():
+    def busy(request):
+        deadline = time.perf_counter() + 0.2
+        while time.perf_counter() < deadline:
+            pass
+        return PlainTextResponse("done")
+
+    store = ProfileStore(max_captures=1)
+    starlette_app = Starlette(routes=[Route("/busy", busy)])
+    client = TestClient(ProfilingMiddleware(starlette_app, is_admin=lambda: True, interval_seconds=0.002, store=store))
+    client.get("/busy", headers={"X-Profile": "1"})
+    client.get("/busy", headers={"X-Profile": "1"})
+
+    [capture] = store.list()  # the ring buffer keeps the newest only
+    profile = capture.to_dict()["profile"]
+    assert profile["samples"] > 10
+    assert any(":busy:" in stack.rsplit(";", 1)[-1] for stack in profile["folded"])
@@ -0,0 +1,57 @@
+import pytest
+from sqlalchemy import insert
+
+from book.models.book import Book
+
+
+def add_books(db, user, library, count):
+    db.execute(insert(Book), [
+        {"isbn": f"978{n:010d}", "title": f"Book {n}", "author": "Author", "library_id": library.id, "owner_id": user.id}
+        for n in range(count)
+    ])
+    db.commit()
+
+
+def warm_auth_cache(client, auth_headers):
+    client.get("/api/users/me", headers=auth_headers)
+
+
+def test_deleting_a_full_library_does_not_load_its_books(client, db, user, library, auth_headers, query_budget):
+    add_books(db, user, library, 500)
+    url = f"/api/libraries/{library.id}"
+    warm_auth_cache(client, auth_headers)
+    with query_budget(2) as statements:  # lookup + EXISTS
+        response = client.delete(url, headers=auth_headers)
+    assert response.status_code == 400
+    assert not any("books.title" in statement for statement in statements)
+
+
+def test_deleting_an_empty_library_stays_within_budget(client, library, auth_headers, query_budget):
+    url = f"/api/libraries/{library.id}"
+    warm_auth_cache(client, auth_headers)
+    with query_budget(4):  # lookup, EXISTS, tombstone INSERT ... RETURNING, DELETE
+        assert client.delete(url, headers=auth_headers).status_code == 204
+
+
+def test_embedded_library_is_loaded_in_the_listing_query(client, db, user, library, auth_headers, query_budget):
+    add_books(db, user, library, 30)
+    warm_auth_cache(client, auth_headers)
+
+    with query_budget(3):  # collection version + embedded libraries version + one page query
+        books = client.get("/api/books?embed=library", headers=auth_headers).json()
+    assert len(books) == 30
+    assert all(book["library"] == {"name": library.name, "id": library.id, "user_id": user.id} for book in books)
+
+    with query_budget(2):
+        books = client.get("/api/books", headers=auth_headers).json()
+    assert "library" not in books[0]
+
+    book_id = books[0]["id"]
+    with query_budget(1):  # joined with its library
+        assert client.get(f"/api/books/{book_id}?embed=library", headers=auth_headers).json()["library"]["id"] == library.id
+
+
+def test_budget_reports_overruns(client, library, auth_headers, query_budget):
+    with pytest.raises(AssertionError, match="over a budget of 0"):
+        with query_budget(0):
+            client.get("/api/libraries", headers=auth_headers)
@@ -0,0 +1,54 @@
+import asyncio
+
+from core.config_loader import settings
+from core.events import EventBroker
+from core.server import WorkerServer, build_config
+
+
+def test_development_profile_reloads_in_one_process(monkeypatch):
+    monkeypatch.setattr(settings, "SERVER_PROFILE", "development")
+    config = build_config()
+    assert config.should_reload and config.workers == 1
+    assert config.limit_max_requests is None
+
+
+def test_production_profile_runs_workers_and_recycles_them(monkeypatch):
+    monkeypatch.setattr(settings, "SERVER_PROFILE", "production")
+    monkeypatch.setattr(settings, "WEB_CONCURRENCY", 6)
+    config = build_config()
+    assert not config.should_reload and config.workers == 6
+    assert config.limit_max_requests == settings.SERVER_MAX_REQUESTS
+    assert config.timeout_graceful_shutdown == settings.SERVER_GRACEFUL_TIMEOUT_SECONDS
+
+
+def test_max_requests_jitter_is_drawn_per_worker(monkeypatch):
+    monkeypatch.setattr(settings, "SERVER_PROFILE", "production")
+    # Only what run() does in the worker before serving
+    monkeypatch.setattr("uvicorn.Server.run", lambda self, sockets=None: None)
+    limits = set()
+    for _ in range(20):
+        server = WorkerServer(build_config(limit_max_requests=1000), max_requests_jitter=100)
+        server.run()
+        limits.add(server.config.limit_max_requests)
+    assert all(1000 <= limit <= 1100 for limit in limits) and len(limits) > 1
+
+
+def test_drain_ends_open_streams_straight_away():
+    async def scenario():
+        broker = EventBroker()
+        await broker.start()
+        received = []
+
+        async def consume():
+            async for event in broker.stream(lambda event: True, keepalive_seconds=60):
+                received.append(event)
+
+        task = asyncio.create_task(consume())
+        await asyncio.sleep(0.01)
+        assert broker.subscriber_count == 1
+        broker.drain()
+        await asyncio.wait_for(task, 1)  # instead of the 60s keepalive
+        await broker.stop()
+        return broker.subscriber_count
+
+    assert asyncio.run(scenario()) == 0
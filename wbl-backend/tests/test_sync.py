@@ -0,0 +1,104 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import update
+from sqlalchemy.dialects import postgresql
+
+from book.models.book import Book
+from core.config_loader import settings
+from core.revision import next_revision
+from library.models.library import Library
+from sync.models.tombstone import Tombstone
+
+
+@pytest.fixture
+def settled(monkeypatch):
+    # Treat every change as settled unless a test says otherwise
+    monkeypatch.setattr(settings, "SYNC_SETTLE_SECONDS", 0)
+
+
+def add_book(db, user, library, title, isbn="9780000000001"):
+    book = Book(isbn=isbn, title=title, author="Author", library_id=library.id, owner_id=user.id)
+    db.add(book)
+    db.commit()
+    return book
+
+
+def sync_all(client, auth_headers, since=0, limit=500):
+    books, libraries, deleted = [], [], []
+    while True:
+        page = client.get(f"/api/sync?since={since}&limit={limit}", headers=auth_headers).json()
+        books += page["books"]
+        libraries += page["libraries"]
+        deleted += page["deleted"]
+        since = page["next_since"]
+        if not page["has_more"]:
+            return books, libraries, deleted, since
+
+
+def test_revision_uses_the_shared_sequence_on_postgres():
+    assert str(next_revision().compile(dialect=postgresql.dialect())) == "nextval('change_revision_seq')"
+
+
+def test_revisions_increase_across_tables_and_updates(db, user, library):
+    first = add_book(db, user, library, "Dune")
+    second = add_book(db, user, library, "Emma", isbn="9780000000002")
+    assert library.revision < first.revision < second.revision
+
+    first.title = "Dune Messiah"
+    db.commit()
+    assert first.revision > second.revision
+
+
+def test_sync_returns_only_changes_since_the_last_sync(client, db, user, library, auth_headers, settled):
+    dune = add_book(db, user, library, "Dune")
+    emma = add_book(db, user, library, "Emma", isbn="9780000000002")
+    books, libraries, deleted, since = sync_all(client, auth_headers)
+    assert {book["title"] for book in books} == {"Dune", "Emma"}
+    assert [lib["id"] for lib in libraries] == [library.id]
+    assert deleted == []
+
+    # Nothing changed: an empty delta
+    assert sync_all(client, auth_headers, since)[:3] == ([], [], [])
+
+    client.put(f"/api/books/{dune.id}", json={"title": "Dune Messiah"}, headers=auth_headers)
+    client.delete(f"/api/books/{emma.id}", headers=auth_headers)
+    books, libraries, deleted, since = sync_all(client, auth_headers, since)
+    assert [book["title"] for book in books] == ["Dune Messiah"]
+    assert libraries == []
+    assert [(d["entity"], d["id"]) for d in deleted] == [("book", emma.id)]
+
+
+def test_sync_pages_by_revision(client, db, user, library, auth_headers, settled):
+    for n in range(7):
+        add_book(db, user, library, f"Book {n}", isbn=f"97800000000{n:02d}")
+    first = client.get("/api/sync?since=0&limit=3", headers=auth_headers).json()
+    assert first["has_more"] is True
+    assert len(first["books"]) + len(first["libraries"]) == 3
+
+    books, libraries, _, _ = sync_all(client, auth_headers, limit=3)
+    assert sorted(book["title"] for book in books) == [f"Book {n}" for n in range(7)]
+    assert len(libraries) == 1
+
+
+def test_library_delete_leaves_a_tombstone(client, db, user, library, auth_headers, settled):
+    _, _, _, since = sync_all(client, auth_headers)
+    client.delete(f"/api/libraries/{library.id}", headers=auth_headers)
+    _, _, deleted, _ = sync_all(client, auth_headers, since)
+    assert [(d["entity"], d["id"]) for d in deleted] == [("library", library.id)]
+    assert db.query(Tombstone).count() == 1
+
+
+def test_recent_changes_are_sent_again_until_they_settle(client, db, user, library, auth_headers):
+    # The library was written long ago; the book just now
+    db.execute(update(Library).values(updated_at=datetime.now(timezone.utc) - timedelta(hours=1)))
+    db.commit()
+    db.refresh(library)
+    add_book(db, user, library, "Dune")
+
+    books, _, _, since = sync_all(client, auth_headers)
+    assert [book["title"] for book in books] == ["Dune"]
+    assert since == library.revision
+    # A slower transaction could still commit below the book's revision, so it comes again
+    books, _, _, _ = sync_all(client, auth_headers, since)
+    assert [book["title"] for book in books] == ["Dune"]
@@ -1,5 +1,5 @@
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import Integer, String, Boolean, DateTime
+from sqlalchemy import Integer, String, Boolean, DateTime, false
 from core.database import Base
 from datetime import datetime, timezone
 
@@ -12,8 +12,10 @@ class User(Base):
     email: Mapped[str] = mapped_column(String(64), unique=True, nullable=False)
     password: Mapped[str] = mapped_column(String(128), nullable=False)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
+    # Admins: may manage any user's books and read /api/admin. Granted in the database only.
+    is_superuser: Mapped[bool] = mapped_column(Boolean, default=False, server_default=false(), nullable=False)
     created_at: Mapped[DateTime] = mapped_column(DateTime, default=datetime.now(timezone.utc), nullable=False)
     updated_at: Mapped[DateTime] = mapped_column(DateTime, default=datetime.now(timezone.utc), onupdate=datetime.now(timezone.utc))
       # Relationships
-    books = relationship("Book", back_populates="owner")
-    libraries = relationship("Library", back_populates="owner")
\ No newline at end of file
+    books = relationship("Book", back_populates="owner", lazy="raise_on_sql")
+    libraries = relationship("Library", back_populates="owner", lazy="raise_on_sql")
\ No newline at end of file
@@ -1,12 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException
 
-from sqlalchemy.orm import Session
-
 from auth.services.auth_service import get_current_active_user
-from core.database import get_db
+from core.database import DbSession, get_read_session, get_session
 from user.models.user import User
 from user.schemas.user import UserSchema, UserCreate
-from user.services.user_service import get_users, create_user, get_user, delete_user
+from user.services.user_service import get_users_async, create_user_async, get_user_async, delete_user_async
 
 user_router = APIRouter(
     prefix='/users',
@@ -15,21 +13,21 @@ user_router = APIRouter(
 
 
 @user_router.get('/', response_model=list[UserSchema])
-def user_list(db: Session = Depends(get_db)):
-    db_users = get_users(db)
+async def user_list(db: DbSession = Depends(get_read_session)):
+    db_users = await get_users_async(db)
 
     return db_users
 
 
 @user_router.get('/me', response_model=UserSchema)
-def user_list(current_user: User = Depends(get_current_active_user)):
+async def user_list(current_user: User = Depends(get_current_active_user)):
     return current_user
 
 
 
 @user_router.get('/{user_id}', response_model=UserSchema)
-def user_detail(user_id: int, db: Session = Depends(get_db)):
-    db_user = get_user(db, user_id)
+async def user_detail(user_id: int, db: DbSession = Depends(get_session)):
+    db_user = await get_user_async(db, user_id)
     if db_user is None:
         raise HTTPException(status_code=404, detail="User not found")
 
@@ -37,15 +35,15 @@ def user_detail(user_id: int, db: Session = Depends(get_db)):
 
 
 @user_router.delete('/{user_id}')
-def user_delete(user_id: int, db: Session = Depends(get_db)):
-    db_user = get_user(db, user_id)
+async def user_delete(user_id: int, db: DbSession = Depends(get_session)):
+    db_user = await get_user_async(db, user_id)
     if db_user is None:
         raise HTTPException(status_code=404, detail="User not found")
 
-    delete_user(db, db_user.id)
+    await delete_user_async(db, db_user.id)
     return {"message": "User deleted"}
 
 
 @user_router.post("/", response_model=UserSchema)
-def user_post(user: UserCreate, db:Session = Depends(get_db)):
-    return create_user(db, user)
+async def user_post(user: UserCreate, db: DbSession = Depends(get_session)):
+    return await create_user_async(db, user)
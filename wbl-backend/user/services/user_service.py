@@ -1,6 +1,9 @@
+from sqlalchemy import event
 from sqlalchemy.orm import Session
 
-from auth.utils.auth_utils import get_password_hash
+from auth.services.principal_cache import principal_cache
+from auth.utils.auth_utils import get_password_hash, get_password_hash_async
+from core.database import async_variant, run_db
 from user.models.user import User
 from user.schemas.user import UserCreate
 
@@ -18,10 +21,14 @@ def get_user_by_email(db: Session, email: str):
 
 
 def create_user(db: Session, user: UserCreate):
+    return _insert_user(db, user, get_password_hash(user.password))
+
+
+def _insert_user(db: Session, user: UserCreate, password_hash: str):
     db_user = User(
         email=str(user.email),
         username=user.username,
-        password=get_password_hash(user.password)
+        password=password_hash
     )
     db.add(db_user)
     db.commit()
@@ -35,3 +42,37 @@ def delete_user(db: Session, user_id: int):
         db.delete(db_user)
         db.commit()
     return
+
+
+# Anything that changes a user must drop it from the auth cache too. Hooked on the session so no
+# write path can forget: profile edits, password rehashes on login, is_superuser flips, deletes.
+# Invalidated after the commit, otherwise a concurrent request could re-cache the old row.
+@event.listens_for(Session, "after_flush")
+def _collect_changed_users(session: Session, flush_context) -> None:
+    changed = [obj.id for obj in (*session.dirty, *session.deleted) if isinstance(obj, User)]
+    if changed:
+        session.info.setdefault("changed_user_ids", set()).update(changed)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_users(session: Session) -> None:
+    for user_id in session.info.pop("changed_user_ids", ()):
+        principal_cache.invalidate_user(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changed_users(session: Session) -> None:
+    session.info.pop("changed_user_ids", None)
+
+
+# Async variants for async routes, awaited on whichever session get_session provides
+get_users_async = async_variant(get_users)
+get_user_async = async_variant(get_user)
+get_user_by_email_async = async_variant(get_user_by_email)
+delete_user_async = async_variant(delete_user)
+
+
+async def create_user_async(db, user: UserCreate):
+    # Hash in the password pool first so bcrypt never runs on the event loop
+    password_hash = await get_password_hash_async(user.password)
+    return await run_db(db, _insert_user, user, password_hash)